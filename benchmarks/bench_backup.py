@@ -0,0 +1,67 @@
+"""
+Online backup against a busy till: commit latency of small bill writes on
+their own and while BackupManager copies the database, for a few step
+sizes and pauses.
+
+    python -m benchmarks.bench_backup [--preset medium] [--seconds 3]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks import dataset
+from benchmarks.common import temp_db, print_table, percentile
+from database import backup
+from database.backup import BackupManager
+
+
+def _commit_latencies(db, until) -> list[float]:
+    """One-line bill inserts every 2 ms until ``until()`` is true; ms per commit."""
+    samples = []
+    while not until():
+        start = time.perf_counter()
+        with db.transaction() as cur:
+            cur.execute("INSERT INTO bills(customer_id, date, total) VALUES ('C1', datetime('now'), 1)")
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.002)
+    samples.sort()
+    return samples
+
+
+def _row(label, samples, extra=("", "", "")):
+    return (label, len(samples), f"{percentile(samples, 0.5):.3f}", f"{percentile(samples, 0.99):.3f}",
+            f"{samples[-1]:.3f}", *extra)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=dataset.PRESETS, default="medium")
+    parser.add_argument("--seconds", type=float, default=3.0, help="length of the idle baseline")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="kpa-dataset-")
+    source = os.path.join(scratch, "dataset.db")
+    dataset.generate(source, verbose=False, **dataset.PRESETS[args.preset])
+    try:
+        with temp_db(source=source) as db:
+            deadline = time.perf_counter() + args.seconds
+            rows = [_row("no backup", _commit_latencies(db, lambda: time.perf_counter() > deadline))]
+            manager = BackupManager(db.db_path, os.path.join(scratch, "backups"), keep=1)
+            for pages, pause in ((256, 0.005), (1024, 0.0), (-1, 0.0)):
+                backup.PAGES_PER_STEP, backup.STEP_PAUSE = pages, pause
+                done = []
+                thread = manager.start(on_done=done.append)
+                samples = _commit_latencies(db, lambda: not thread.is_alive())
+                record = done[0]
+                rows.append(_row(f"backup {'all' if pages < 0 else pages} pages/step, {pause * 1000:g} ms pause",
+                                 samples, (f"{record['seconds']:.2f}", record["pages"],
+                                           f"{record['size_bytes'] / 1e6:.1f}")))
+        print_table(["while", "commits", "p50 ms", "p99 ms", "max ms", "backup s", "pages", "gz MB"], rows)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
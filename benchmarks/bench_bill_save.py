@@ -0,0 +1,46 @@
+"""
+Compare per-line bill writes (BillDAO.add_item) with the bulk
+single-transaction path (BillDAO.save_bill).
+
+    python -m benchmarks.bench_bill_save [--repeat N]
+"""
+import argparse
+
+from database.bill_dao import BillDAO
+from benchmarks.common import temp_db, timed, print_table
+
+LINE_COUNTS = (10, 100, 1000)
+
+
+def _lines(n):
+    return [(i % 50 + 1, 1.5, 10.0 + i % 7) for i in range(n)]
+
+
+def per_line(dao, lines):
+    bill_id = dao.create_bill("C1")
+    for product_id, qty, price in lines:
+        dao.add_item(bill_id, product_id, qty, price)
+
+
+def bulk(dao, lines):
+    bill_id = dao.create_bill("C1")
+    dao.save_bill(bill_id, lines)
+
+
+def run(repeat: int = 3):
+    rows = []
+    with temp_db() as db:
+        dao = BillDAO(db.db_path)
+        for n in LINE_COUNTS:
+            lines = _lines(n)
+            old = timed(per_line, dao, lines, repeat=repeat)
+            new = timed(bulk, dao, lines, repeat=repeat)
+            rows.append((n, f"{old:.2f}", f"{new:.2f}", f"{old / new:.1f}x"))
+    print_table(("lines", "add_item ms", "save_bill ms", "speedup"), rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args().repeat)
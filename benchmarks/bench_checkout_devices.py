@@ -0,0 +1,111 @@
+"""
+The checkout path from scale to receipt with no hardware attached: items
+are put on a virtual scale (utils.virtual_scale, a pty streaming real
+frames), WeightManager reads and settles the weight, the bill is saved and
+the receipt is printed to a fake network printer (utils.print_pkg.fake_printer).
+
+Reports per-checkout latency of each stage: pan placed -> stable weight,
+bill saved, print_receipt() returned, and the whole job received by the
+printer.
+
+    python -m benchmarks.bench_checkout_devices [--checkouts 20] [--printer-speed 0]
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks import dataset
+from benchmarks.common import temp_db, print_table, percentile
+from database.bill_dao import BillDAO
+from utils.print_pkg.fake_printer import FakePrinter
+from utils.print_pkg.printer_config import PrinterTester
+from utils.virtual_scale import VirtualScale
+from utils.weight_manager import WeightManager
+
+
+def _placement(rng, rate: float = 20.0):
+    """An item dropped on the pan: a damped swing settling on its weight."""
+    weight = round(rng.uniform(0.1, 8.0), 3)
+    amplitude = weight * rng.uniform(0.05, 0.3)
+    decay, frequency = rng.uniform(3.0, 6.0), rng.uniform(1.5, 4.0)
+    trace = [(i / rate, round(weight + amplitude * math.exp(-decay * i / rate)
+                              * math.cos(2 * math.pi * frequency * i / rate), 3))
+             for i in range(int(math.log(amplitude / 0.001) / decay * rate))]
+    return trace + [(len(trace) / rate, weight)], weight
+
+
+def _wait_for(manager, weight, timeout=5.0) -> float | None:
+    deadline = time.monotonic() + timeout
+    while (left := deadline - time.monotonic()) > 0:
+        stable = manager.get_stable_weight(left)
+        if stable is not None and abs(stable - weight) <= 0.002:
+            return stable
+        time.sleep(0.01)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkouts", type=int, default=20)
+    parser.add_argument("--printer-speed", type=float, default=0.0,
+                        help="bytes a second the fake printer drains, 0 = instant")
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    scale = VirtualScale([(0.0, 0.0)]).start()
+    manager = WeightManager(port=scale.port)
+    manager.start()
+    printer = FakePrinter(speed=args.printer_speed).start()
+    tester = PrinterTester()
+    tester.initialize_target(printer.target)
+    scratch = tempfile.mkdtemp(prefix="kpa-devices-")
+    source = os.path.join(scratch, "dataset.db")
+    dataset.generate(source, products=50, bills=0, verbose=False)
+    stages = {"stable weight": [], "bill saved": [], "print returned": [], "receipt received": []}
+    missed = 0
+    try:
+        with temp_db(source=source) as db:
+            product_id = db.get_read_connection().execute("SELECT id FROM products LIMIT 1").fetchone()[0]
+            bills = BillDAO(db.db_path)
+            for n in range(1, args.checkouts + 1):
+                scale.put(0.0)
+                if _wait_for(manager, 0.0) is None:
+                    raise RuntimeError("the scale never read an empty pan")
+                trace, weight = _placement(rng)
+                start = time.perf_counter()
+                scale.play(trace)
+                stable = _wait_for(manager, weight)
+                if stable is None:
+                    missed += 1
+                    continue
+                marks = [time.perf_counter()]
+                bill_id = bills.create_bill("C1")
+                total = bills.save_bill(bill_id, [(product_id, stable, 40.0)])
+                marks.append(time.perf_counter())
+                tester.print_receipt(f"{'Item':<22}{stable:.3f} kg x 40.00", total)
+                marks.append(time.perf_counter())
+                printer.wait_for_jobs(n - missed, timeout=30)
+                marks.append(time.perf_counter())
+                for stage, mark in zip(stages.values(), marks):
+                    stage.append((mark - start) * 1000)
+    finally:
+        tester.cleanup()
+        manager.stop()
+        printer.stop()
+        scale.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    rows = []
+    for name, ms in stages.items():
+        ms.sort()
+        rows.append((name, len(ms), f"{percentile(ms, 0.5):.0f}", f"{percentile(ms, 0.95):.0f}", f"{ms[-1]:.0f}"))
+    print_table(["since item placed", "checkouts", "p50 ms", "p95 ms", "max ms"], rows)
+    print(f"\n{missed} placement(s) never settled; scale stats: {manager.scale_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Headless checkout load: simulated cashier lanes driving ProductService and
+BillService the way the billing screen does, without Qt or hardware.
+
+Each lane runs sessions back to back (or paced to --rate checkouts per
+minute): barcode scans and weighed items, a checkout that resolves every
+line by name and saves the bill, the title-bar refresh of the latest
+bills, and now and then an edit or deletion of one of its earlier bills.
+
+    python -m benchmarks.bench_checkout_load --lanes 4 --duration 30
+    python -m benchmarks.bench_checkout_load --db big.db --rate 6 --write-behind
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks import dataset
+from benchmarks.common import temp_db, print_table, percentile
+from core.services.bill_service import BillService
+from core.services.bill_writer import BillWriter
+from core.services.product_catalog import ProductCatalog
+from core.services.product_service import ProductService
+
+
+class Lane(threading.Thread):
+    def __init__(self, number: int, args, barcodes, weighed, deadline: float):
+        super().__init__(name=f"lane-{number}", daemon=True)
+        self.args = args
+        self.rng = random.Random(args.seed + number)
+        self.barcodes = barcodes
+        self.weighed = weighed
+        self.deadline = deadline
+        self.products = ProductService()
+        self.bills = BillService()
+        self.writer = BillWriter.get_instance() if args.write_behind else None
+        self.latencies: dict[str, list[int]] = defaultdict(list)
+        self.checkouts = 0
+        self.recent: list[int] = []
+        self.error = None
+
+    def _timed(self, op: str, fn, *args):
+        start = time.perf_counter_ns()
+        result = fn(*args)
+        self.latencies[op].append(time.perf_counter_ns() - start)
+        return result
+
+    def run(self):
+        interval = 60.0 / self.args.rate if self.args.rate else 0.0
+        next_start = time.perf_counter()
+        try:
+            while time.perf_counter() < self.deadline:
+                self._session()
+                if interval:
+                    next_start += interval
+                    time.sleep(max(0.0, next_start - time.perf_counter()))
+        except Exception as e:
+            self.error = e
+
+    def _session(self):
+        rng, args = self.rng, self.args
+        items = []
+        for _ in range(rng.randint(args.min_items, args.max_items)):
+            if self.weighed and (not self.barcodes or rng.random() < args.weighed):
+                # the category grid is already on screen; the click reads the scale
+                product = rng.choice(self._timed("weigh", self.products.get_by_category, "fruits_veg"))
+                qty = round(rng.uniform(0.1, 2.5), 3)
+            else:
+                product = self._timed("scan", self.products.get_by_barcode, rng.choice(self.barcodes))
+                qty = 1
+            items.append((product.name, qty, product.price))
+
+        self.recent.append(self._timed("checkout", self._checkout, items, None))
+        self.checkouts += 1
+        self._timed("refresh", self.bills.latest_bills, 3)
+
+        roll = rng.random()
+        if len(self.recent) > 1 and roll < args.edits:
+            bill_id = rng.choice(self.recent[:-1])
+            self._timed("edit", self._edit, bill_id)
+        elif len(self.recent) > 1 and roll < args.edits + args.deletes:
+            bill_id = self.recent.pop(rng.randrange(len(self.recent) - 1))
+            if self.writer:
+                self.writer.flush()
+            self._timed("delete", self.bills.delete_bill, bill_id)
+        del self.recent[:-50]
+
+    def _checkout(self, items, bill_id):
+        """What ActionButtonsLogic.process_bill does with the billing list."""
+        lines = []
+        for name, qty, price in items:
+            product = self.products.get_by_name(name)
+            if product:
+                lines.append((product.id, qty, price, product.name, product.unit))
+        if self.writer:
+            return self.writer.submit("C1", lines, bill_id=bill_id)
+        if bill_id is None:
+            bill_id = self.bills.create_bill("C1")
+        self.bills.save_bill_items(bill_id, lines, replace=True)
+        return bill_id
+
+    def _edit(self, bill_id):
+        """Load a bill back into the list, change a quantity and save it again."""
+        if self.writer and self.writer.is_pending(bill_id):
+            self.writer.flush()
+        bill = self.bills.get_bill(bill_id)
+        items = [(i.product_name, i.quantity, i.price) for i in bill.items]
+        if items:
+            name, qty, price = items[0]
+            items[0] = (name, qty + 1, price)
+        self._checkout(items, bill_id)
+
+
+def run(args, db) -> dict:
+    read = db.get_read_connection()
+    barcodes = [r[0] for r in read.execute("SELECT barcode FROM products WHERE barcode IS NOT NULL")]
+    weighed = read.execute("SELECT 1 FROM products WHERE category='fruits_veg' LIMIT 1").fetchone() is not None
+    if not barcodes and not weighed:
+        raise RuntimeError("dataset has no scannable or weighed products")
+    ProductCatalog.get_instance().invalidate()
+    ProductService().get_all()   # the till loads the catalog once at startup
+
+    writer = BillWriter.get_instance() if args.write_behind else None
+    if writer:
+        writer.start()
+    started = time.perf_counter()
+    lanes = [Lane(n, args, barcodes, weighed, started + args.duration) for n in range(args.lanes)]
+    for lane in lanes:
+        lane.start()
+    for lane in lanes:
+        lane.join()
+    if writer:
+        writer.stop()   # bills only count once they are on disk
+        BillWriter._instance = None
+    elapsed = time.perf_counter() - started
+
+    errors = [lane.error for lane in lanes if lane.error]
+    if errors:
+        raise errors[0]
+    merged: dict[str, list[int]] = defaultdict(list)
+    for lane in lanes:
+        for op, samples in lane.latencies.items():
+            merged[op].extend(samples)
+    operations = {}
+    for op, samples in merged.items():
+        ms = sorted(s / 1e6 for s in samples)
+        operations[op] = {"count": len(ms), **{f"p{q}_ms": round(percentile(ms, q / 100), 3) for q in (50, 95, 99)}}
+    bills = sum(lane.checkouts for lane in lanes)
+    return {
+        "lanes": args.lanes,
+        "rate_per_lane": args.rate,
+        "write_behind": args.write_behind,
+        "seconds": round(elapsed, 2),
+        "bills": bills,
+        "bills_per_second": round(bills / elapsed, 2),
+        "checkouts_per_minute_per_lane": round(bills / elapsed * 60 / args.lanes, 1),
+        "operations": operations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="dataset to run against (copied first); default: generate --preset")
+    parser.add_argument("--preset", choices=dataset.PRESETS, default="small")
+    parser.add_argument("--lanes", type=int, default=4, help="concurrent cashier sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--rate", type=float, default=0.0, help="checkouts per minute per lane, 0 = flat out")
+    parser.add_argument("--min-items", type=int, default=3)
+    parser.add_argument("--max-items", type=int, default=25)
+    parser.add_argument("--weighed", type=float, default=0.3, help="share of weighed items")
+    parser.add_argument("--edits", type=float, default=0.05, help="share of checkouts followed by an edit")
+    parser.add_argument("--deletes", type=float, default=0.02, help="share followed by a deletion")
+    parser.add_argument("--write-behind", action="store_true", help="save through BillWriter like the UI")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    scratch = None
+    source = args.db
+    if source is None:
+        scratch = tempfile.mkdtemp(prefix="kpa-dataset-")
+        source = os.path.join(scratch, "dataset.db")
+        dataset.generate(source, seed=args.seed, verbose=False, **dataset.PRESETS[args.preset])
+    try:
+        with temp_db(source=source) as db:
+            report = run(args, db)
+    finally:
+        ProductCatalog.get_instance().invalidate()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    rows = [(op, s["count"], s["p50_ms"], s["p95_ms"], s["p99_ms"]) for op, s in sorted(report["operations"].items())]
+    print_table(["operation", "count", "p50 ms", "p95 ms", "p99 ms"], rows)
+    print(f"\n{report['bills']} bills in {report['seconds']}s on {args.lanes} lane(s): "
+          f"{report['bills_per_second']} bills/s, "
+          f"{report['checkouts_per_minute_per_lane']} checkouts/min per lane")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Checkout write latency while report-style readers hammer the database,
+for the legacy rollback-journal profile and the WAL profile.
+
+    python -m benchmarks.bench_concurrent_io [--readers N] [--writes N]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from database.bill_dao import BillDAO
+from benchmarks.common import temp_db, print_table
+
+PROFILES = {
+    "rollback": {"journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0},
+    "wal": {},
+}
+
+REPORT_SQL = """
+    SELECT b.customer_id, COUNT(*), SUM(i.quantity * i.price)
+    FROM bills b JOIN bill_items i ON i.bill_id = b.id
+    GROUP BY b.customer_id
+"""
+
+
+def _seed(dao, bills):
+    for n in range(bills):
+        bill_id = dao.create_bill(f"C{n % 3 + 1}")
+        dao.save_bill(bill_id, [(i + 1, 1.0, 9.5) for i in range(10)])
+
+
+def _reader(db, stop, counter):
+    conn = db.get_read_connection()
+    while not stop.is_set():
+        conn.execute(REPORT_SQL).fetchall()
+        counter.append(1)
+
+
+def run_profile(pragmas, readers, writes, seed_bills):
+    with temp_db(pragmas=pragmas) as db:
+        dao = BillDAO(db.db_path)
+        _seed(dao, seed_bills)
+        stop, reads = threading.Event(), []
+        threads = [threading.Thread(target=_reader, args=(db, stop, reads)) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        latencies = []
+        for _ in range(writes):
+            start = time.perf_counter()
+            bill_id = dao.create_bill("C1")
+            dao.save_bill(bill_id, [(1, 2.0, 10.0)] * 20)
+            latencies.append((time.perf_counter() - start) * 1000)
+        stop.set()
+        for t in threads:
+            t.join()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+        "reads": len(reads),
+    }
+
+
+def run(readers=4, writes=200, seed_bills=2000):
+    rows = []
+    for name, pragmas in PROFILES.items():
+        r = run_profile(pragmas, readers, writes, seed_bills)
+        rows.append((name, f"{r['p50']:.2f}", f"{r['p95']:.2f}", f"{r['max']:.2f}", r["reads"]))
+    print(f"{writes} checkout writes with {readers} concurrent report readers")
+    print_table(("profile", "p50 ms", "p95 ms", "max ms", "reports run"), rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--seed-bills", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.readers, args.writes, args.seed_bills)
@@ -0,0 +1,154 @@
+"""
+Receipt printing on the checkout path: printing each receipt inline (what
+process_bill used to do) against queueing it on PrintSpooler, for a run of
+back-to-back sales.
+
+The printer is a fake network printer (utils.print_pkg.fake_printer)
+behind a PrinterTester that behaves like the USB one: detection waits
+0.5 s as initialize_printer() does, and writes block until the printer
+has taken the bytes at ``--printer-speed``.
+
+Reports how long the till is blocked per sale and how long until the
+last receipt is out; then a run with no printer while the sales are rung
+up, and how long the queued receipts take once one appears.
+
+    python -m benchmarks.bench_print_spooler [--sales 20] [--printer-speed 20000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import print_table, percentile
+from utils.print_pkg.fake_printer import FakePrinter
+from utils.print_pkg.print_spooler import PrintSpooler
+from utils.print_pkg.printer_config import PrinterTester
+
+RECEIPT = "\n".join(f"{n:<4}{'Item ' + str(n):<22}{'40.00':<7}{'1.250':<7}{'50.00':<7}" for n in range(1, 16))
+DETECT_SECONDS = 0.5   # the sleep in PrinterTester.initialize_printer
+
+
+class _Throttled:
+    """An escpos printer whose writes take as long as the printer needs to accept them."""
+
+    def __init__(self, device, speed: float):
+        self._device = device
+        self._speed = speed
+
+    def _raw(self, data):
+        time.sleep(len(data) / self._speed)
+        self._device._raw(data)
+
+    def text(self, text):
+        time.sleep(len(text) / self._speed)
+        self._device.text(text)
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+
+class _UsbLikePrinter(PrinterTester):
+    """PrinterTester on ``target`` (or nothing, while None) with USB-like timing."""
+
+    def __init__(self, target: str | None, speed: float):
+        super().__init__()
+        self.target = target
+        self.speed = speed
+
+    def run(self):
+        time.sleep(DETECT_SECONDS)
+        if self.target is None:
+            return
+        self.initialize_target(self.target)
+        if self.is_printer_initialized() and self.speed:
+            self.p = _Throttled(self.p, self.speed)
+
+
+def _inline(printer, sales, speed) -> tuple[list[float], float]:
+    tester = _UsbLikePrinter(printer.target, speed)
+    blocked = []
+    start = time.perf_counter()
+    for _ in range(sales):
+        began = time.perf_counter()
+        if not tester.is_printer_initialized():
+            tester.run()
+        tester.print_receipt(RECEIPT, 750.0)
+        blocked.append((time.perf_counter() - began) * 1000)
+    printer.wait_for_jobs(sales, timeout=120)
+    elapsed = time.perf_counter() - start
+    tester.cleanup()
+    return blocked, elapsed
+
+
+def _spooled(printer, sales, speed, journal) -> tuple[list[float], float]:
+    spooler = PrintSpooler(_UsbLikePrinter(printer.target, speed), journal)
+    spooler.start()
+    blocked = []
+    start = time.perf_counter()
+    for _ in range(sales):
+        began = time.perf_counter()
+        spooler.submit(RECEIPT, 750.0)
+        blocked.append((time.perf_counter() - began) * 1000)
+    spooler.flush(120)
+    printer.wait_for_jobs(sales, timeout=120)
+    elapsed = time.perf_counter() - start
+    spooler.stop()
+    return blocked, elapsed
+
+
+def _outage(scratch, sales, speed) -> str:
+    """No printer while the sales are rung up; then one appears."""
+    tester = _UsbLikePrinter(None, speed)
+    spooler = PrintSpooler(tester, os.path.join(scratch, "outage.jsonl"))
+    spooler.RETRY_DELAYS = (0.2, 0.5)
+    spooler.start()
+    began = time.perf_counter()
+    for _ in range(sales):
+        spooler.submit(RECEIPT, 750.0)
+    submitted_ms = (time.perf_counter() - began) * 1000
+    time.sleep(1.0)
+    waiting = spooler.pending()
+    printer = FakePrinter().start()
+    back = time.perf_counter()
+    tester.target = printer.target
+    spooler.retry_now()
+    spooler.flush(120)
+    printer.wait_for_jobs(sales, timeout=120)
+    seconds = time.perf_counter() - back
+    printed = len(printer.jobs)
+    spooler.stop()
+    printer.stop()
+    return (f"no printer: {sales} sales queued in {submitted_ms:.1f} ms, {waiting} receipt(s) waiting; "
+            f"{printed} printed {seconds:.2f}s after the printer appeared")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sales", type=int, default=20)
+    parser.add_argument("--printer-speed", type=float, default=20_000, help="bytes a second, 0 = instant")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="kpa-print-")
+    rows = []
+    try:
+        for name, run in (("inline", lambda p: _inline(p, args.sales, args.printer_speed)),
+                          ("spooled", lambda p: _spooled(p, args.sales, args.printer_speed,
+                                                         os.path.join(scratch, "queue.jsonl")))):
+            printer = FakePrinter().start()
+            try:
+                blocked, elapsed = run(printer)
+            finally:
+                printer.stop()
+            blocked.sort()
+            rows.append((name, args.sales, f"{percentile(blocked, 0.5):.2f}", f"{blocked[-1]:.2f}",
+                         f"{sum(blocked) / 1000:.2f}", f"{elapsed:.2f}"))
+        print_table(["printing", "sales", "till blocked p50 ms", "max ms", "total blocked s", "all printed s"], rows)
+        print()
+        print(_outage(scratch, args.sales, args.printer_speed))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Row-to-model mapping: the old SELECT * + sqlite3.Row-by-name + __dict__
+models against positional column lists fetched straight into slotted
+models. Reports wall time and tracemalloc peak.
+
+    python -m benchmarks.bench_row_mapping [--products N] [--items N]
+"""
+import argparse
+import time
+import tracemalloc
+
+from database.bill_dao import BillDAO
+from database.product_repository import ProductRepository
+from benchmarks.common import temp_db, print_table
+
+
+class _DictProduct:
+    def __init__(self, id, name, price, barcode, unit, image_path, order_index, category):
+        self.id, self.name, self.price, self.barcode = id, name, price, barcode
+        self.unit, self.image_path, self.order_index, self.category = unit, image_path, order_index, category
+
+
+class _DictBillItem:
+    def __init__(self, id, bill_id, product_id, quantity, price):
+        self.id, self.bill_id, self.product_id, self.quantity, self.price = id, bill_id, product_id, quantity, price
+
+
+def legacy_products(conn):
+    rows = conn.execute("SELECT * FROM products ORDER BY order_index, name").fetchall()
+    return [_DictProduct(r["id"], r["name"], r["price"], r["barcode"], r["unit"],
+                         r["image_path"], r["order_index"], r["category"]) for r in rows]
+
+
+def legacy_items(conn, bill_id):
+    rows = conn.execute("SELECT * FROM bill_items WHERE bill_id=?", (bill_id,)).fetchall()
+    return [_DictBillItem(r["id"], r["bill_id"], r["product_id"], r["quantity"], r["price"]) for r in rows]
+
+
+def _measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed * 1000, peak / (1024 * 1024)
+
+
+def _seed(db, products, items):
+    with db.transaction() as cur:
+        cur.executemany(
+            "INSERT INTO products(name, price, barcode, unit, order_index, category) VALUES (?,?,?,?,?,?)",
+            ((f"product {i}", 10.0, f"{i:013d}", "pcs", i, "manual") for i in range(products)),
+        )
+        cur.execute("INSERT INTO bills(customer_id, date, total) VALUES ('C1', '2024-01-01', 0)")
+        bill_id = cur.lastrowid
+        cur.executemany(
+            "INSERT INTO bill_items(bill_id, product_id, quantity, price) VALUES (?,?,?,?)",
+            ((bill_id, i % products + 1, 1.0, 10.0) for i in range(items)),
+        )
+    return bill_id
+
+
+def run(products=100_000, items=1_000_000):
+    rows = []
+    with temp_db() as db:
+        bill_id = _seed(db, products, items)
+        conn = db.get_read_connection()
+        repo, dao = ProductRepository(db.db_path), BillDAO(db.db_path)
+        cases = [
+            (f"{products} products", lambda: legacy_products(conn), repo.get_all),
+            (f"{items} bill items", lambda: legacy_items(conn, bill_id), lambda: dao.get_bill(bill_id)),
+        ]
+        for label, old, new in cases:
+            old_ms, old_mb = _measure(old)
+            new_ms, new_mb = _measure(new)
+            rows.append((label, f"{old_ms:.0f}", f"{new_ms:.0f}", f"{old_mb:.1f}", f"{new_mb:.1f}"))
+    print_table(("load", "Row+dict ms", "slotted ms", "Row+dict peak MB", "slotted peak MB"), rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.products, args.items)
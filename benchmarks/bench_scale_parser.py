@@ -0,0 +1,126 @@
+"""
+Scale frame parsing: the old byte-at-a-time loop (read ``[``, read 8,
+flushInput) against FrameParser fed chunked reads, over a simulated serial
+port streaming bracket frames at the line rate, with some frames garbled.
+
+The port keeps a virtual clock: a read that asks for more bytes than have
+arrived waits (advances the clock) for them, and every loop iteration
+costs a random pause standing in for the reader thread losing the GIL to
+the UI. flushInput drops whatever arrived meanwhile, so the old loop loses
+frames. The table shows weights delivered, port calls (reads and flushes,
+each a system call on a real port) and CPU per weight.
+
+    python -m benchmarks.bench_scale_parser [--seconds 600] [--baud 2400] [--garble 0.01]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import print_table
+from utils.scale_protocol import BracketDecoder, FrameParser
+
+
+class FakeSerial:
+    """Bytes of ``stream`` arriving at ``baud`` (10 bits a byte) on a virtual clock."""
+
+    def __init__(self, stream: bytes, baud: int, pause: float, seed: int = 5):
+        self.stream = stream
+        self.byte_seconds = 10 / baud
+        self.pause = pause
+        self.rng = random.Random(seed)
+        self.clock = 0.0
+        self.pos = 0
+        self.reads = 0
+        self.flushes = 0
+
+    def _arrived(self) -> int:
+        return min(len(self.stream), int(self.clock / self.byte_seconds))
+
+    @property
+    def in_waiting(self) -> int:
+        return self._arrived() - self.pos
+
+    def read(self, size: int = 1) -> bytes:
+        self.reads += 1
+        self.clock += self.rng.uniform(0, self.pause)
+        end = min(len(self.stream), self.pos + size)
+        self.clock = max(self.clock, end * self.byte_seconds)   # block until they are here
+        data = self.stream[self.pos:end]
+        self.pos = end
+        return data
+
+    def flushInput(self):
+        self.flushes += 1
+        self.pos = max(self.pos, self._arrived())
+
+    @property
+    def done(self) -> bool:
+        return self.pos >= len(self.stream)
+
+
+def _stream(frames: int, garble: float, seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    out = bytearray()
+    for _ in range(frames):
+        frame = b"[" + b"%06d" % rng.randrange(0, 30000) + b"00"
+        if rng.random() < garble:
+            frame = bytearray(frame)
+            frame[rng.randrange(len(frame))] = rng.randrange(256)
+        out += frame
+    return bytes(out)
+
+
+def _legacy(port) -> int:
+    """The loop WeightManager used to run, minus the weight bookkeeping."""
+    weights = 0
+    while not port.done:
+        if port.read() == b'[':
+            data = port.read(8)
+            if data != b'/////00@':
+                try:
+                    fullstring = data.decode("utf-8")
+                    if "" in fullstring:
+                        weight_str = fullstring[0:6]
+                        round(float(weight_str) / 1000, 3)
+                        weights += 1
+                except:   # noqa: E722 - reproduced as it was
+                    continue
+        port.flushInput()
+    return weights
+
+
+def _chunked(port) -> int:
+    parser = FrameParser(BracketDecoder())
+    read_size = parser.decoder.read_size
+    weights = 0
+    while not port.done:
+        weights += len(parser.feed(port.read(max(read_size, port.in_waiting))))
+    return weights
+
+
+def _run(name, loop, stream, frames, baud, pause):
+    port = FakeSerial(stream, baud, pause)
+    start = time.process_time()
+    weights = loop(port)
+    cpu = time.process_time() - start
+    return (name, f"{pause * 1000:.0f}", frames, weights, f"{weights / frames:.1%}", port.reads + port.flushes,
+            f"{cpu / max(weights, 1) * 1e6:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=600, help="length of the simulated stream")
+    parser.add_argument("--baud", type=int, default=2400)
+    parser.add_argument("--garble", type=float, default=0.01, help="share of frames with a corrupted byte")
+    args = parser.parse_args()
+
+    frames = int(args.seconds * args.baud / 10 / 9)
+    stream = _stream(frames, args.garble)
+    rows = [_run(name, loop, stream, frames, args.baud, pause)
+            for pause in (0.0, 0.02, 0.1)
+            for name, loop in (("byte loop + flush", _legacy), ("chunked parser", _chunked))]
+    print_table(["reader", "pause ms", "frames sent", "weights", "delivered", "port calls", "cpu us/weight"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Scale reconnects: WeightManager reads a virtual scale (utils.virtual_scale)
+that is unplugged for a while and plugged back in, over and over.
+
+For each outage it reports how long after the replug the manager was
+reading frames again and had a stable weight, plus the time-to-recover
+the manager itself reports (loss -> frames again, outage included).
+
+    python -m benchmarks.bench_scale_recovery [--outages 10] [--min 0.2] [--max 4]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import print_table, percentile
+from utils.virtual_scale import VirtualScale
+from utils.weight_manager import CONNECTED, DISCONNECTED, WeightManager
+
+
+def _until(condition, timeout: float) -> float | None:
+    """Seconds until ``condition()`` held, None if it did not within ``timeout``."""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if condition():
+            return time.monotonic() - start
+        time.sleep(0.005)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--outages", type=int, default=10)
+    parser.add_argument("--min", type=float, default=0.2, help="shortest outage, seconds")
+    parser.add_argument("--max", type=float, default=4.0, help="longest outage, seconds")
+    args = parser.parse_args()
+
+    rng = random.Random(4)
+    scale = VirtualScale([(0.0, 2.5)]).start()
+    manager = WeightManager(virtual_scale=scale)
+    manager.start()
+    rows, reconnect_ms, stable_ms = [], [], []
+    try:
+        if _until(lambda: manager.connection()["state"] == CONNECTED, 10) is None:
+            raise RuntimeError("the virtual scale never connected")
+        for n in range(1, args.outages + 1):
+            manager.get_stable_weight(5)
+            outage = rng.uniform(args.min, args.max)
+            scale.unplug()
+            _until(lambda: manager.connection()["state"] == DISCONNECTED, 10)
+            time.sleep(outage)
+            scale.put(round(rng.uniform(0.1, 8.0), 3))
+            scale.replug()
+            replugged = time.monotonic()
+            connected = _until(lambda: manager.connection()["state"] == CONNECTED, 30)
+            stable = _until(lambda: manager.stability()[1] is not None, 30)
+            if stable is not None:
+                stable = time.monotonic() - replugged
+            info = manager.connection()
+            rows.append((n, f"{outage:.2f}", f"{connected * 1000:.0f}" if connected is not None else "never",
+                         f"{stable * 1000:.0f}" if stable is not None else "never",
+                         f"{info['last_recover_seconds']:.2f}", info["reconnects"]))
+            if connected is not None and stable is not None:
+                reconnect_ms.append(connected * 1000)
+                stable_ms.append(stable * 1000)
+    finally:
+        manager.stop()
+        scale.stop()
+
+    print_table(["outage", "seconds", "replug->frames ms", "replug->stable ms", "reported recover s", "reconnects"],
+                rows)
+    if reconnect_ms:
+        reconnect_ms.sort()
+        stable_ms.sort()
+        print(f"\nreplug -> frames p50 {percentile(reconnect_ms, 0.5):.0f} ms, max {reconnect_ms[-1]:.0f} ms; "
+              f"replug -> stable p50 {percentile(stable_ms, 0.5):.0f} ms, max {stable_ms[-1]:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Product search: the old manager-dialog filter (fetch the whole category,
+substring-match in Python) against the FTS5 index, for queries typed one
+character at a time.
+
+    python -m benchmarks.bench_search [--products N] [--limit N]
+"""
+import argparse
+import random
+import time
+
+from core.services.product_catalog import ProductCatalog
+from core.services.product_service import ProductService
+from database import product_search
+from database.product_repository import ProductRepository
+from benchmarks.common import temp_db, print_table, percentile
+from utils.constants import CATEGORIES
+
+WORDS = ("tomato", "potato", "onion", "garlic", "ginger", "basmati", "rice", "sugar", "salt", "tea",
+         "coffee", "milk", "butter", "paneer", "ghee", "atta", "maida", "dal", "toor", "moong",
+         "chana", "rajma", "soap", "shampoo", "biscuit", "cookies", "noodles", "oil", "sunflower",
+         "mustard", "coconut", "jaggery", "honey", "jam", "bread", "egg", "chilli", "turmeric")
+SIZES = ("100g", "250g", "500g", "1kg", "2kg", "5kg", "1l", "500ml")
+QUERIES = ("toma", "basmati 5", "890000012", "sun oil", "ghee 1")
+
+
+def _seed(db, count, rng):
+    with db.transaction() as cur:
+        cur.executemany(
+            "INSERT INTO products(name, price, barcode, unit, order_index, category) VALUES (?,?,?,?,?,?)",
+            ((f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(SIZES)}", 10.0, f"89{i:011d}", "pcs",
+              i, CATEGORIES[i % len(CATEGORIES)]) for i in range(count)),
+        )
+        product_search.create(cur)   # bulk rebuild, as the migration does
+
+
+def legacy_filter(repo, text, category):
+    text = text.strip().lower()
+    return [p for p in repo.get_by_category(category)
+            if text in (p.name or "").lower() or text in (p.barcode or "")]
+
+
+def _latencies(fn, queries, category):
+    samples = []
+    for query in queries:
+        for n in range(1, len(query) + 1):   # as typed
+            start = time.perf_counter()
+            fn(query[:n], category)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with temp_db() as db:
+        _seed(db, args.products, random.Random(1))
+        repo = ProductRepository(db.db_path)
+        ProductCatalog.get_instance().invalidate()
+        service = ProductService()
+        service.get_all()
+        rows = []
+        for label, fn in (
+            ("python substring", lambda q, c: legacy_filter(repo, q, c)),
+            ("ProductRepository.search", lambda q, c: repo.search(q, c, args.limit)),
+            ("ProductService.search", lambda q, c: service.search(q, c, args.limit)),
+        ):
+            ms = _latencies(fn, QUERIES, "manual")
+            rows.append((label, len(ms), f"{percentile(ms, 0.5):.3f}", f"{percentile(ms, 0.95):.3f}",
+                         f"{ms[-1]:.3f}"))
+        print(f"{args.products:,} products, keystroke-by-keystroke queries, limit {args.limit}\n")
+        print_table(["search", "queries", "p50 ms", "p95 ms", "max ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
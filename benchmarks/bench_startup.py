@@ -0,0 +1,104 @@
+"""
+Database open time on a large catalog: the old ALTER TABLE probing plus
+full-table order_index UPDATE versus the user_version migration check.
+
+    python -m benchmarks.bench_startup [--products N] [--opens N]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from database.db_manager import DBManager
+from benchmarks.common import print_table
+
+
+def legacy_init_schema(conn):
+    """The pre-migration DBManager._init_schema, kept here for comparison."""
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id            INTEGER PRIMARY KEY AUTOINCREMENT,
+        name          TEXT    NOT NULL,
+        price         REAL    NOT NULL,
+        barcode       TEXT    UNIQUE,
+        unit          TEXT,
+        image_path    TEXT,
+        order_index   INTEGER NOT NULL DEFAULT 0
+    )""")
+    try:
+        cursor.execute("ALTER TABLE products ADD COLUMN order_index INTEGER NOT NULL DEFAULT 0")
+    except sqlite3.OperationalError:
+        pass
+    cursor.execute("UPDATE products SET order_index = id WHERE order_index = 0")
+    try:
+        cursor.execute("ALTER TABLE products ADD COLUMN category TEXT NOT NULL DEFAULT 'manual'")
+    except sqlite3.OperationalError:
+        pass
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id TEXT, date TEXT, total REAL DEFAULT 0
+    )""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bill_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, bill_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL, quantity REAL NOT NULL, price REAL NOT NULL
+    )""")
+    conn.commit()
+
+
+def _seed(path, products):
+    conn = sqlite3.connect(path)
+    legacy_init_schema(conn)
+    conn.executemany(
+        "INSERT INTO products(name, price, barcode, unit, order_index, category) VALUES (?,?,?,?,?,?)",
+        ((f"product {i}", 10.0, f"{i:013d}", "pcs", i, "manual") for i in range(1, products + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _legacy_open(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    legacy_init_schema(conn)
+    conn.close()
+
+
+def _migrated_open(path):
+    DBManager(path).close()
+
+
+def _best(fn, path, opens):
+    best = float("inf")
+    for _ in range(opens):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(products=100_000, opens=5):
+    workdir = tempfile.mkdtemp(prefix="kpa-bench-")
+    try:
+        path = os.path.join(workdir, "catalog.db")
+        _seed(path, products)
+        legacy = _best(_legacy_open, path, opens)
+        _migrated_open(path)  # one-off upgrade to the current schema version
+        migrated = _best(_migrated_open, path, opens)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"open + schema check, {products} products, best of {opens}")
+    print_table(("path", "ms"), [("legacy _init_schema", f"{legacy:.2f}"),
+                                 ("user_version migrations", f"{migrated:.2f}")])
+    return legacy, migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--opens", type=int, default=5)
+    args = parser.parse_args()
+    run(args.products, args.opens)
@@ -0,0 +1,109 @@
+"""
+Bill sync throughput: a backfilled outbox drained by BillSync into a
+head-office SQLite file directly and through the local HTTP endpoint, for a
+few batch sizes, plus checkout commit latency while the worker syncs
+bills as they are written.
+
+    python -m benchmarks.bench_sync [--preset small] [--batch 50 200 1000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks import dataset
+from benchmarks.common import temp_db, print_table, percentile
+from core.services.bill_sync import BillSync
+from core.services.sync_sinks import HttpSink, SQLiteSink, serve
+from database.bill_dao import BillDAO
+from database.outbox_dao import OutboxDAO
+
+
+def _synced(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM lane_bills").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _drain(source, scratch, transport, batch) -> tuple:
+    head_office = os.path.join(scratch, f"headoffice-{transport}-{batch}.db")
+    sink = SQLiteSink(head_office)
+    server = None
+    if transport == "http":
+        server = serve(sink)
+        sink = HttpSink(f"http://127.0.0.1:{server.server_port}/bills")
+    try:
+        with temp_db(source=source) as db:
+            outbox = OutboxDAO(db.db_path)
+            queued = outbox.backfill()
+            sync = BillSync(sink, outbox, lane_id="bench")
+            sync.BATCH_SIZE = batch
+            start = time.perf_counter()
+            sent = sync.drain()
+            seconds = time.perf_counter() - start
+    finally:
+        if server:
+            server.shutdown()
+            server.sink.close()
+        sink.close()
+    if _synced(head_office) != queued:
+        raise RuntimeError(f"head office has {_synced(head_office)} bills, expected {queued}")
+    return transport, batch, sent, f"{seconds:.2f}", f"{sent / seconds:,.0f}"
+
+
+def _checkout_latency(source, scratch, seconds, sync_running) -> list[float]:
+    """save_bill commits (10 lines) with or without the worker syncing behind them."""
+    with temp_db(source=source) as db:
+        bills = BillDAO(db.db_path, sync=True)
+        product_ids = [r[0] for r in db.get_read_connection().execute("SELECT id FROM products")]
+        sync = BillSync(SQLiteSink(os.path.join(scratch, "headoffice-live.db")), OutboxDAO(db.db_path), "bench")
+        sync.POLL_INTERVAL = 0.05
+        if sync_running:
+            sync.start()
+        rng = random.Random(7)
+        samples = []
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            bill_id = bills.create_bill("C1")
+            lines = [(rng.choice(product_ids), 1.0, 10.0) for _ in range(10)]
+            start = time.perf_counter()
+            bills.save_bill(bill_id, lines)
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.002)
+        sync.stop(timeout=10)
+    samples.sort()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=dataset.PRESETS, default="small")
+    parser.add_argument("--batch", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--seconds", type=float, default=3.0, help="length of each checkout latency run")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="kpa-sync-")
+    source = os.path.join(scratch, "dataset.db")
+    dataset.generate(source, verbose=False, **dataset.PRESETS[args.preset])
+    try:
+        rows = [_drain(source, scratch, transport, batch)
+                for transport in ("sqlite", "http") for batch in args.batch]
+        print_table(["sink", "batch", "bills", "seconds", "bills/s"], rows)
+        print()
+        rows = []
+        for label, running in (("sync idle", False), ("sync running", True)):
+            ms = _checkout_latency(source, scratch, args.seconds, running)
+            rows.append((label, len(ms), f"{percentile(ms, 0.5):.3f}", f"{percentile(ms, 0.99):.3f}", f"{ms[-1]:.3f}"))
+        print_table(["checkout", "bills", "p50 ms", "p99 ms", "max ms"], rows)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Weight stability detection: synthetic placements (a damped oscillation
+around the true weight plus sensor noise, at the scale's sample rate) fed to
+WeightManager with simulated timestamps, for a few window settings.
+
+Reports how long after the pan physically settled (oscillation inside
+the noise) a stable weight was reported, its error against the true
+weight, placements reported stable while still moving, and the CPU cost
+per sample.
+
+    python -m benchmarks.bench_weight_stability [--placements 200] [--rate 10]
+"""
+import argparse
+import math
+import random
+import time
+
+from benchmarks.common import print_table, percentile
+from utils.weight_manager import STABLE, WeightManager
+
+SETTLE_TOLERANCE = 0.002   # kg: the pan counts as settled once the swing is inside this
+NOISE = 0.0005             # kg, sensor noise (std dev)
+
+
+def _placement(rng, rate):
+    """Samples (t, weight) of one item put on the pan, the true weight, and when it settled."""
+    weight = round(rng.uniform(0.05, 15.0), 3)
+    amplitude = weight * rng.uniform(0.05, 0.3)
+    decay = rng.uniform(2.0, 6.0)            # 1/s
+    frequency = rng.uniform(1.5, 4.0)        # Hz
+    settled_at = math.log(amplitude / SETTLE_TOLERANCE) / decay
+    samples = []
+    for i in range(int((settled_at + 2.0) * rate)):
+        t = i / rate
+        swing = amplitude * math.exp(-decay * t) * math.cos(2 * math.pi * frequency * t)
+        samples.append((t, round(weight + swing + rng.gauss(0, NOISE), 3)))
+    return samples, weight, settled_at
+
+
+def _run(placements, rate, seconds, stddev, seed=11):
+    rng = random.Random(seed)
+    manager = WeightManager(stable_seconds=seconds, max_stddev=stddev)
+    clock, latencies, errors = 0.0, [], []
+    early = missed = samples_fed = 0
+    cpu = 0.0
+    for _ in range(placements):
+        samples, weight, settled_at = _placement(rng, rate)
+        manager._update_weight(0.0, clock)   # pan emptied between items
+        clock += 1.0
+        start = clock
+        reported = None
+        for t, w in samples:
+            begin = time.perf_counter()
+            manager._update_weight(w, start + t)
+            cpu += time.perf_counter() - begin
+            samples_fed += 1
+            state, stable = manager.stability()
+            if reported is None and state == STABLE:
+                reported = (t, stable)
+        clock = start + samples[-1][0] + 1.0 / rate
+        if reported is None:
+            missed += 1
+            continue
+        t, stable = reported
+        if t < settled_at and abs(stable - weight) > SETTLE_TOLERANCE:
+            early += 1
+        latencies.append((t - settled_at) * 1000)
+        errors.append(abs(stable - weight) * 1000)
+    latencies.sort()
+    errors.sort()
+    return (f"{seconds:.2f}", f"{stddev * 1000:.1f}", len(latencies), missed, early,
+            f"{percentile(latencies, 0.5):.0f}", f"{percentile(latencies, 0.95):.0f}",
+            f"{percentile(errors, 0.5):.1f}", f"{errors[-1]:.1f}",
+            f"{cpu / samples_fed * 1e6:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--placements", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=10.0, help="scale samples per second")
+    args = parser.parse_args()
+
+    rows = [_run(args.placements, args.rate, seconds, stddev)
+            for seconds, stddev in ((0.3, 0.002), (0.5, 0.002), (0.5, 0.001), (1.0, 0.002))]
+    print_table(["window s", "max sd g", "stable", "missed", "early+wrong",
+                 "p50 latency ms", "p95 latency ms", "p50 err g", "max err g", "us/sample"], rows)
+
+
+if __name__ == "__main__":
+    main()
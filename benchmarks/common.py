@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from database.db_manager import DBManager
+
+
+@contextmanager
+def temp_db(name: str = "bench.db", pragmas: dict | None = None, source: str | None = None):
+    """Open a throw-away database (optionally a copy of ``source``) as the DBManager singleton."""
+    if DBManager._instance is not None:
+        DBManager._instance.close()
+    workdir = tempfile.mkdtemp(prefix="kpa-bench-")
+    path = os.path.join(workdir, name)
+    if source:
+        shutil.copyfile(source, path)
+    manager = DBManager.get_instance(path, pragmas)
+    try:
+        yield manager
+    finally:
+        manager.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def timed(fn, *args, repeat: int = 1, **kwargs) -> float:
+    """Best wall-clock time of ``repeat`` calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..1) of an already sorted list."""
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
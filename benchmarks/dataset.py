@@ -0,0 +1,111 @@
+"""
+Synthetic pos.db-compatible datasets for benchmarking.
+
+    python -m benchmarks.dataset out.db --products 5000 --bills 1000000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from database import product_search, sales_summary
+from database.db_manager import DBManager
+from utils.constants import CATEGORIES
+
+PRESETS = {
+    "small": {"products": 500, "bills": 2_000},
+    "medium": {"products": 5_000, "bills": 100_000},
+    "large": {"products": 20_000, "bills": 1_000_000},
+}
+_CHUNK = 10_000
+
+
+def _products(count, rng):
+    for i in range(1, count + 1):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        unit = "kg" if category == "fruits_veg" else "pcs"
+        barcode = f"89{i:011d}" if category != "fruits_veg" else None
+        yield (i, f"product {i}", round(rng.uniform(5, 500), 2), barcode, unit, None, i, category)
+
+
+def _bills(count, products, items_per_bill, days, rng):
+    """Yield (bill_row, item_rows) with dates spread over the last ``days``."""
+    end = datetime.now().replace(microsecond=0)
+    step = timedelta(days=days) / max(count, 1)
+    start = end - timedelta(days=days)
+    item_id = 1
+    for bill_id in range(1, count + 1):
+        date = (start + step * bill_id).isoformat()
+        items = []
+        for _ in range(rng.randint(*items_per_bill)):
+            pid = rng.randint(1, products)
+            qty = round(rng.uniform(0.1, 3.0), 3)
+            price = round(rng.uniform(5, 500), 2)
+            items.append((item_id, bill_id, pid, qty, price, f"product {pid}", "pcs"))
+            item_id += 1
+        total = sum(i[3] * i[4] for i in items)
+        yield (bill_id, f"C{bill_id % 3 + 1}", date, total), items
+
+
+def generate(path: str, products: int = 500, bills: int = 2_000, items_per_bill=(1, 12),
+             days: int = 365, seed: int = 42, verbose: bool = True) -> dict:
+    """Create ``path`` with the current schema and fill it; returns the sizes."""
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    if DBManager._instance is not None:
+        DBManager._instance.close()
+    db = DBManager(path)
+    try:
+        with db.transaction() as cur:
+            cur.executemany(
+                "INSERT INTO products(id,name,price,barcode,unit,image_path,order_index,category) "
+                "VALUES (?,?,?,?,?,?,?,?)",
+                _products(products, rng),
+            )
+            product_search.create(cur)   # rebuild the search index over the bulk insert
+        bill_rows, item_rows, item_count = [], [], 0
+        for n, (bill, items) in enumerate(_bills(bills, products, items_per_bill, days, rng), start=1):
+            bill_rows.append(bill)
+            item_rows.extend(items)
+            if len(bill_rows) == _CHUNK or n == bills:
+                with db.transaction() as cur:
+                    cur.executemany("INSERT INTO bills(id,customer_id,date,total) VALUES (?,?,?,?)", bill_rows)
+                    cur.executemany(
+                        "INSERT INTO bill_items(id,bill_id,product_id,quantity,price,product_name,unit) "
+                        "VALUES (?,?,?,?,?,?,?)",
+                        item_rows,
+                    )
+                item_count += len(item_rows)
+                bill_rows, item_rows = [], []
+                if verbose and n % (_CHUNK * 10) == 0:
+                    print(f"  {n:,} bills")
+        with db.transaction() as cur:
+            sales_summary.rebuild(cur)
+        db.conn.execute("ANALYZE")
+        db.checkpoint()
+    finally:
+        db.close()
+    sizes = {"products": products, "bills": bills, "bill_items": item_count, "days": days, "seed": seed}
+    if verbose:
+        print(f"generated {path}: {sizes} in {time.perf_counter() - started:.1f}s")
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--preset", choices=PRESETS)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--bills", type=int)
+    parser.add_argument("--min-items", type=int, default=1)
+    parser.add_argument("--max-items", type=int, default=12)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    sizes = dict(PRESETS[args.preset or "small"])
+    sizes.update({k: v for k, v in (("products", args.products), ("bills", args.bills)) if v})
+    generate(args.path, items_per_bill=(args.min_items, args.max_items),
+             days=args.days, seed=args.seed, **sizes)
@@ -0,0 +1,327 @@
+"""
+Data-layer benchmark suite.
+
+Times every public ProductRepository, BillDAO, ProductService and
+BillService method against a synthetic dataset (see benchmarks.dataset)
+and saves per-method latency statistics as JSON, so two runs can be
+compared and regressions flagged.
+
+    python -m benchmarks.suite run --preset medium --out before.json
+    python -m benchmarks.suite run --db big.db --out after.json
+    python -m benchmarks.suite compare before.json after.json [--threshold 0.2]
+
+``run --db`` works on a copy; the given database is never modified.
+``compare`` exits with status 1 when any method got slower than the
+threshold allows.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+
+from benchmarks import dataset
+from benchmarks.common import temp_db, print_table, percentile
+from core.services.bill_service import BillService
+from core.services.product_catalog import ProductCatalog
+from core.services.product_service import ProductService
+from database.bill_dao import BillDAO
+from database.product_repository import ProductRepository
+
+BENCHMARKED = (ProductRepository, BillDAO, ProductService, BillService)
+CALLS = 200           # timed calls per method, scaled by --scale
+HEAVY_CALLS = 5       # for methods that read or write a whole table
+NOISE_FLOOR_US = 5.0  # smaller p50 differences are never a regression
+
+
+def _lines(rng, product_ids, count):
+    return [(rng.choice(product_ids), round(rng.uniform(0.1, 3.0), 3), round(rng.uniform(5, 500), 2))
+            for _ in range(count)]
+
+
+def _cases(rng, scale: float, workdir: str):
+    """
+    Yield (label, call, args) per public method. ``args`` is an iterable of
+    argument tuples, one per timed call; it is consumed lazily and outside
+    the timed region, so destructive methods can set up their own targets.
+    """
+    n = max(1, int(CALLS * scale))
+    heavy = max(1, int(HEAVY_CALLS * scale))
+    products, bills = ProductRepository(), BillDAO()
+    product_service, bill_service = ProductService(), BillService()
+    read = products.db.get_read_connection()
+    product_ids = [r[0] for r in read.execute("SELECT id FROM products")]
+    barcodes = [r[0] for r in read.execute("SELECT barcode FROM products WHERE barcode IS NOT NULL")]
+    bill_ids = [r[0] for r in read.execute("SELECT id FROM bills")]
+    cursors = [tuple(r) for r in read.execute("SELECT date, id FROM bills")]
+    if not product_ids or not bill_ids:
+        raise RuntimeError("dataset needs at least one product and one bill")
+    sample = lambda pool: [(rng.choice(pool),) for _ in range(n)]
+    names = lambda: [(f"product {rng.choice(product_ids)}",) for _ in range(n)]
+    # as typed: "pro", "product 1", "product 12", ... with and without a category
+    queries = lambda: [(f"product {rng.choice(product_ids)}"[:rng.randint(3, 12)],
+                        rng.choice((None, *dataset.CATEGORIES))) for _ in range(n)]
+
+    def fresh_products(prefix, by_name=False):
+        for i in range(n):
+            pid = products.create(f"{prefix} {i}", 1.0, None, "pcs", None)
+            yield (f"{prefix} {i}",) if by_name else (pid,)
+
+    def fresh_bills(lines=10):
+        for _ in range(n):
+            bill_id = bills.create_bill("C1")
+            bills.save_bill(bill_id, _lines(rng, product_ids, lines))
+            yield (bill_id,)
+
+    def fresh_items():
+        bill_id = bills.create_bill("C1")
+        for _ in range(n):
+            yield (bills.add_item(bill_id, rng.choice(product_ids), 1.0, 10.0),)
+
+    def reservations():
+        for _ in range(n):
+            first = bills.reserve_bill_ids(50)
+            yield first, first + 49
+
+    def upsert_chunks():
+        rows = [(f"bulk {i}", float(i % 500), f"66{i:011d}", "pcs", None, "manual") for i in range(1000)]
+        for _ in range(heavy):
+            yield (rows,)   # first call inserts, the rest update
+
+    def write_batches():
+        for _ in range(heavy):
+            first = bills.reserve_bill_ids(64)
+            yield ([{"bill_id": first + k, "customer_id": "C1", "date": datetime.now().isoformat(),
+                     "lines": _lines(rng, product_ids, 10)} for k in range(64)],)
+
+    def transfer_files(fmt):
+        source = os.path.join(workdir, f"import.{fmt}")
+        with open(source, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("name", "price", "barcode", "unit", "category"))
+            writer.writerows((f"imported {i}", 9.5, f"55{i:011d}", "pcs", "manual") for i in range(1000))
+        for _ in range(heavy):
+            yield (source,)
+
+    def moves(listing):
+        # one product dragged up to 50 places, the common reorder
+        for _ in range(n):
+            category = rng.choice(dataset.CATEGORIES)
+            order = [p.id for p in listing(category)]
+            if order:
+                pos = rng.randrange(len(order))
+                order.insert(max(0, pos + rng.randint(-50, 50)), order.pop(pos))
+            yield category, order
+
+    def repo_cases():
+        yield "create", products.create, ((f"bench {i}", 1.0, f"77{i:011d}", "pcs", None, "manual") for i in range(n))
+        yield "get_all", products.get_all, [()] * heavy
+        yield "get_by_category", products.get_by_category, [(c,) for c in islice(dataset.CATEGORIES * n, n)]
+        yield "get_by_barcode", products.get_by_barcode, sample(barcodes or ["none"])
+        yield "get_by_id", products.get_by_id, sample(product_ids)
+        yield "get_by_name", products.get_by_name, names()
+        yield "update", lambda pid: products.update(pid, price=rng.uniform(5, 500)), sample(product_ids)
+        yield "swap_order", products.swap_order, [tuple(rng.sample(product_ids, 2)) for _ in range(n)] \
+            if len(product_ids) > 1 else [(product_ids[0], product_ids[0])] * n
+        yield "apply_order", products.apply_order, moves(products.get_by_category)
+        yield "delete", products.delete, fresh_products("doomed")
+        yield "delete_by_name", products.delete_by_name, fresh_products("doomed by name", by_name=True)
+        yield "upsert_many", products.upsert_many, upsert_chunks()
+        yield "iter_all", lambda: sum(1 for _ in products.iter_all()), [()] * heavy
+        yield "search_ids", products.search_ids, queries()
+        yield "search", products.search, queries()
+        yield "change_version", products.change_version, [()] * n
+
+    def bill_cases():
+        yield "create_bill", bills.create_bill, [("C1",)] * n
+        yield "add_item", bills.add_item, [(rng.choice(bill_ids), rng.choice(product_ids), 1.0, 10.0)
+                                           for _ in range(n)]
+        yield "save_bill", bills.save_bill, ((bills.create_bill("C1"), _lines(rng, product_ids, 20))
+                                             for _ in range(n))
+        yield "write_bills", bills.write_bills, write_batches()
+        yield "reserve_bill_ids", bills.reserve_bill_ids, [(50,)] * n
+        yield "release_bill_ids", bills.release_bill_ids, reservations()
+        yield "clear_items", bills.clear_items, fresh_bills()
+        yield "get_bill", bills.get_bill, sample(bill_ids)
+        yield "list_bills", lambda before: bills.list_bills(limit=50, before=before), sample(cursors)
+        yield "latest_bills", bills.latest_bills, [(3,)] * n
+        yield "iter_bills", lambda: sum(1 for _ in islice(bills.iter_bills(), 2000)), [()] * heavy
+        yield "remove_item", bills.remove_item, fresh_items()
+        yield "delete_bill", bills.delete_bill, fresh_bills()
+
+    def product_service_cases():
+        product_service.get_all()   # warm the catalog; lookups below are cache hits
+        yield "create_product", lambda i: product_service.create_product(
+            name=f"service {i}", price=1.0, barcode=f"88{i:011d}", unit="pcs", image_path=None), \
+            ((i,) for i in range(n))
+        yield "update_product", lambda pid: product_service.update_product(pid, price=rng.uniform(5, 500)), \
+            sample(product_ids)
+        yield "delete_product_by_name", product_service.delete_product_by_name, \
+            ((f"service {i}",) for i in range(n))
+        yield "get_all", product_service.get_all, [()] * n
+        yield "get_by_barcode", product_service.get_by_barcode, sample(barcodes or ["none"])
+        yield "get_by_id", product_service.get_by_id, sample(product_ids)
+        yield "get_by_name", product_service.get_by_name, names()
+        yield "get_by_category", product_service.get_by_category, \
+            [(c,) for c in islice(dataset.CATEGORIES * n, n)]
+        yield "search", product_service.search, queries()
+        yield "reorder_products", product_service.reorder_products, \
+            [tuple(rng.sample(product_ids, 2)) for _ in range(n)] if len(product_ids) > 1 \
+            else [(product_ids[0], product_ids[0])] * n
+        yield "apply_order", product_service.apply_order, moves(product_service.get_by_category)
+        yield "cache_stats", product_service.cache_stats, [()] * n
+        yield "export_products", lambda: product_service.export_products(os.path.join(workdir, "export.csv")), \
+            [()] * heavy
+        # last: an import invalidates the catalog
+        yield "import_products", product_service.import_products, transfer_files("csv")
+
+    def bill_service_cases():
+        yield "create_bill", bill_service.create_bill, [("C2",)] * n
+        yield "add_item_to_bill", bill_service.add_item_to_bill, \
+            [(rng.choice(bill_ids), rng.choice(product_ids), 1.0, 10.0) for _ in range(n)]
+        yield "save_bill_items", bill_service.save_bill_items, \
+            ((bill_service.create_bill("C2"), _lines(rng, product_ids, 20)) for _ in range(n))
+        yield "clear_bill_items", bill_service.clear_bill_items, fresh_bills()
+        yield "get_bill", bill_service.get_bill, sample(bill_ids)
+        yield "list_bills", lambda before: bill_service.list_bills(limit=50, before=before), sample(cursors)
+        yield "latest_bills", bill_service.latest_bills, [(3,)] * n
+        yield "iter_bills", lambda: sum(1 for _ in islice(bill_service.iter_bills(), 2000)), [()] * heavy
+        yield "remove_item", bill_service.remove_item, fresh_items()
+        yield "delete_bill", bill_service.delete_bill, fresh_bills()
+
+    for cls, cases in zip(BENCHMARKED, (repo_cases, bill_cases, product_service_cases, bill_service_cases)):
+        for name, call, args in cases():
+            yield f"{cls.__name__}.{name}", call, args
+
+
+def _public_methods(cls) -> set[str]:
+    return {f"{cls.__name__}.{n}" for n in vars(cls) if not n.startswith("_") and callable(getattr(cls, n))}
+
+
+def _stats(samples_ns: list[int]) -> dict:
+    us = sorted(s / 1000 for s in samples_ns)
+    return {
+        "calls": len(us),
+        "mean_us": round(statistics.fmean(us), 2),
+        "p50_us": round(percentile(us, 0.50), 2),
+        "p95_us": round(percentile(us, 0.95), 2),
+        "min_us": round(us[0], 2),
+        "max_us": round(us[-1], 2),
+    }
+
+
+def run(db_path: str, scale: float = 1.0, seed: int = 42, only: str | None = None) -> dict:
+    """Benchmark every method on a copy of ``db_path``; returns the JSON document."""
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="kpa-suite-")
+    results = {}
+    try:
+        with temp_db(source=db_path) as db:
+            ProductCatalog.get_instance().invalidate()
+            read = db.get_read_connection()
+            sizes = {table: read.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                     for table in ("products", "bills", "bill_items")}
+            for label, call, args in _cases(rng, scale, workdir):
+                if only and only not in label:
+                    continue
+                samples = []
+                for params in args:
+                    start = time.perf_counter_ns()
+                    call(*params)
+                    samples.append(time.perf_counter_ns() - start)
+                results[label] = _stats(samples)
+                print(f"  {label:45} p50 {results[label]['p50_us']:>10,.1f} us")
+    finally:
+        ProductCatalog.get_instance().invalidate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not only:
+        missing = set().union(*map(_public_methods, BENCHMARKED)) - results.keys()
+        if missing:
+            raise RuntimeError(f"benchmark suite does not cover: {', '.join(sorted(missing))}")
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "dataset": sizes,
+            "scale": scale,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict, threshold: float = 0.2) -> list[str]:
+    """Print a side-by-side p50 table; return the labels that regressed."""
+    rows, regressions = [], []
+    for label in sorted(old["results"].keys() | new["results"].keys()):
+        before, after = old["results"].get(label), new["results"].get(label)
+        if before is None or after is None:
+            status = "new" if before is None else "gone"
+            rows.append((label, (before or {}).get("p50_us", "-"), (after or {}).get("p50_us", "-"), "", status))
+            continue
+        ratio = after["p50_us"] / before["p50_us"] if before["p50_us"] else float("inf")
+        regressed = ratio > 1 + threshold and after["p50_us"] - before["p50_us"] > NOISE_FLOOR_US
+        if regressed:
+            regressions.append(label)
+        flag = "REGRESSION" if regressed else ("faster" if ratio < 1 - threshold else "")
+        rows.append((label, before["p50_us"], after["p50_us"], f"{ratio:.2f}x", flag))
+    if old["meta"].get("dataset") != new["meta"].get("dataset"):
+        print(f"warning: datasets differ: {old['meta'].get('dataset')} vs {new['meta'].get('dataset')}")
+    print_table(["method", "old p50 us", "new p50 us", "ratio", ""], rows)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Data-layer benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="benchmark every data-layer method")
+    run_p.add_argument("--db", help="dataset to benchmark (copied first); default: generate --preset")
+    run_p.add_argument("--preset", choices=dataset.PRESETS, default="small")
+    run_p.add_argument("--scale", type=float, default=1.0, help="multiplier for the number of timed calls")
+    run_p.add_argument("--seed", type=int, default=42)
+    run_p.add_argument("--only", help="only methods whose Class.method label contains this")
+    run_p.add_argument("--out", help="write the results as JSON")
+    cmp_p = sub.add_parser("compare", help="flag regressions between two result files")
+    cmp_p.add_argument("old")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old) as f_old, open(args.new) as f_new:
+            regressions = compare(json.load(f_old), json.load(f_new), args.threshold)
+        print(f"\n{len(regressions)} regression(s)" if regressions else "\nno regressions")
+        return 1 if regressions else 0
+
+    scratch = None
+    db_path = args.db
+    if db_path is None:
+        scratch = tempfile.mkdtemp(prefix="kpa-dataset-")
+        db_path = os.path.join(scratch, "dataset.db")
+        dataset.generate(db_path, seed=args.seed, **dataset.PRESETS[args.preset])
+    try:
+        report = run(db_path, args.scale, args.seed, args.only)
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
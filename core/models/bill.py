@@ -1,12 +1,20 @@
 class BillItem:
-    def __init__(self, id: int, bill_id: int, product_id: int, quantity: float, price: float):
+    __slots__ = ("id", "bill_id", "product_id", "quantity", "price", "product_name", "unit")
+
+    def __init__(self, id: int, bill_id: int, product_id: int, quantity: float, price: float,
+                 product_name: str | None = None, unit: str | None = None):
         self.id = id
         self.bill_id = bill_id
         self.product_id = product_id
         self.quantity = quantity
         self.price = price
+        # name/unit as they were when the line was sold
+        self.product_name = product_name
+        self.unit = unit
 
 class Bill:
+    __slots__ = ("id", "customer_id", "date", "total", "items")
+
     def __init__(self, id: int, customer_id: str, date: str, total: float):
         self.id = id
         self.customer_id = customer_id
@@ -1,4 +1,6 @@
 class Product:
+    __slots__ = ("id", "name", "price", "barcode", "unit", "image_path", "order_index", "category")
+
     def __init__(
         self,
         id: int,
@@ -0,0 +1,10 @@
+class SalesReport:
+    __slots__ = ("start", "end", "revenue", "bill_count", "days", "products")
+
+    def __init__(self, start: str, end: str, days: list, products: list):
+        self.start = start
+        self.end = end
+        self.days = days              # (day, revenue, bill_count)
+        self.products = products      # (product_id, name, quantity, revenue)
+        self.revenue = sum(d[1] for d in days)
+        self.bill_count = sum(d[2] for d in days)
@@ -9,11 +9,7 @@ class BillService:
         """
         Removes all items for the given bill and resets the total.
         """
-        dao = self.dao
-        cur = dao.conn.cursor()
-        cur.execute("DELETE FROM bill_items WHERE bill_id = ?", (bill_id,))
-        cur.execute("UPDATE bills SET total = 0 WHERE id = ?", (bill_id,))
-        dao.conn.commit()
+        self.dao.clear_items(bill_id)
 
     def create_bill(self, customer_id: str) -> int:
         return self.dao.create_bill(customer_id)
@@ -21,11 +17,25 @@ class BillService:
     def add_item_to_bill(self, bill_id: int, product_id: int, qty: float, price: float) -> int:
         return self.dao.add_item(bill_id, product_id, qty, price)
 
-    def get_bill(self, bill_id: int) -> Bill | None:
-        return self.dao.get_bill(bill_id)
+    def save_bill_items(self, bill_id: int, items, replace: bool = False) -> float:
+        """
+        Saves all (product_id, qty, price) lines of a bill in one transaction.
+        """
+        return self.dao.save_bill(bill_id, items, replace=replace)
+
+    def get_bill(self, bill_id: int, include_archives: bool = False) -> Bill | None:
+        return self.dao.get_bill(bill_id, include_archives=include_archives)
+
+    def list_bills(self, limit: int | None = None, before: tuple[str, int] | None = None,
+                   include_archives: bool = False) -> list[Bill]:
+        return self.dao.list_bills(limit=limit, before=before, include_archives=include_archives)
+
+    def latest_bills(self, count: int = 3) -> list[Bill]:
+        return self.dao.latest_bills(count)
 
-    def list_bills(self) -> list[Bill]:
-        return self.dao.list_bills()
+    def iter_bills(self, page_size: int = 500, before: tuple[str, int] | None = None,
+                   include_archives: bool = False):
+        return self.dao.iter_bills(page_size=page_size, before=before, include_archives=include_archives)
 
     def delete_bill(self, bill_id: int) -> bool:
         return self.dao.delete_bill(bill_id)
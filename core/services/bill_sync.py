@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from datetime import datetime
+
+from core.services.sync_sinks import sink_for
+from database.outbox_dao import OutboxDAO
+from utils.constants import LANE_ID, SYNC_TARGET
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class BillSync:
+    """
+    Background sync of bill changes to the head office.
+
+    With KPA_SYNC_TARGET set, BillDAO queues every change in the outbox
+    inside the same transaction, so checkout only ever pays for one extra
+    row write. A worker thread
+    takes due entries in batches, hands them to the sink and deletes them
+    once the sink accepted them. A failed batch is held back with
+    exponential backoff (with jitter, capped) and retried; nothing is lost
+    while the head office or the network is down.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    BATCH_SIZE = 200
+    POLL_INTERVAL = 2.0        # seconds between looks at an idle outbox
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 300.0
+
+    def __init__(self, sink, dao: OutboxDAO | None = None, lane_id: str = LANE_ID):
+        self.sink = sink
+        self.dao = dao or OutboxDAO()
+        self.lane_id = lane_id
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_sync_at = None
+
+    @classmethod
+    def get_instance(cls):
+        """The app's worker for SYNC_TARGET, or None when sync is not configured."""
+        with cls._lock:
+            if cls._instance is None and SYNC_TARGET:
+                cls._instance = cls(sink_for(SYNC_TARGET))
+        return cls._instance
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="bill-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop after the batch in flight; unsent entries stay in the outbox."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        thread.join(timeout)
+        self._thread = None
+        self.sink.close()
+
+    def notify(self) -> None:
+        """Look at the outbox now instead of at the next poll."""
+        self._wake.set()
+
+    # --- Worker ---
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                sent = self.sync_once()
+            except Exception:
+                log.exception("Bill sync failed")
+                sent = 0
+            if sent < self.BATCH_SIZE:
+                # drained (or backing off): wait for the next poll or notify()
+                self._wake.wait(self.POLL_INTERVAL)
+                self._wake.clear()
+
+    def sync_once(self) -> int:
+        """Send one batch of due entries. Returns how many were sent."""
+        entries = self.dao.due(self.BATCH_SIZE)
+        if not entries:
+            return 0
+        try:
+            self.sink.send(self.lane_id, entries)
+        except Exception as e:
+            attempts = max(entry["attempts"] for entry in entries)
+            delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempts) * random.uniform(0.5, 1.0)
+            self.dao.retry_later(entries, str(e), delay)
+            self.failures += 1
+            self.last_error = str(e)
+            log.warning(f"Syncing {len(entries)} bill(s) failed, retrying in {delay:.1f}s: {e}")
+            return 0
+        self.dao.acknowledge(entries)
+        self.sent += len(entries)
+        self.batches += 1
+        self.last_error = None
+        self.last_sync_at = datetime.now().isoformat()
+        return len(entries)
+
+    def drain(self, timeout: float | None = None) -> int:
+        """Send due batches on the calling thread until none are left."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        total = 0
+        while deadline is None or time.monotonic() < deadline:
+            sent = self.sync_once()
+            total += sent
+            if sent == 0:
+                break
+        return total
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "batches": self.batches, "failures": self.failures,
+                "last_error": self.last_error, "last_sync_at": self.last_sync_at, **self.dao.backlog()}
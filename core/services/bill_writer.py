@@ -0,0 +1,243 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+from database.bill_dao import BillDAO
+from utils.jsonl_journal import JsonlJournal, path_beside
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_STOP = object()
+
+
+class BillWriter:
+    """
+    Write-behind persistence for finalized bills.
+
+    submit() assigns the bill id, appends the bill to a journal file and
+    returns at once. A worker thread writes queued bills to SQLite in
+    group-committed batches and then drops them from the journal, so bills
+    that were queued but not written when the process died are replayed by
+    the next start(). Batches commit durably (fsynced even under
+    synchronous=NORMAL), so a bill is never only in an unsynced WAL once
+    it has left the journal.
+
+    When a batch fails its bills are written one at a time, so one bad
+    bill cannot hold back the rest; bills that still fail stay in the
+    journal and are retried in the background with backoff (the last
+    delay repeating) until they are written.
+
+    on_saved(bill_ids) and on_failed(bill_id, error) are called from the
+    worker thread (on_failed once, when a bill first fails); the UI bridges
+    them to Qt signals.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    ID_BLOCK = 50              # bill ids reserved per round trip
+    BATCH_SIZE = 64
+    BATCH_LINGER = 0.02        # seconds to wait for more bills before committing
+    RETRY_DELAYS = (0.5, 2.0, 5.0, 15.0, 60.0)   # the last one repeats
+
+    def __init__(self, dao: BillDAO | None = None, journal_path: str | None = None):
+        self.dao = dao or BillDAO()
+        self.journal_path = journal_path or path_beside(self.dao.db.db_path, "pending")
+        self.on_saved = None
+        self.on_failed = None
+        self._queue = queue.Queue()
+        self._state = threading.Condition()
+        self._pending: dict[int, dict] = {}
+        self._outstanding = 0      # queued or being written; not waiting for a retry
+        self._retry_at: dict[int, float] = {}   # bill id -> monotonic time of its next attempt
+        self._attempts: dict[int, int] = {}
+        self._journal = JsonlJournal(self.journal_path, "bill_id")
+        self._next_id = self._reserved_end = 0
+        self._thread = None
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        with self._state:
+            if self._thread is not None:
+                return
+            recovered = self._journal.open()
+            self._thread = threading.Thread(target=self._run, name="bill-writer", daemon=True)
+            self._thread.start()
+        if recovered:
+            log.info(f"Replaying {len(recovered)} bill(s) left in {self.journal_path}")
+            for job in recovered:
+                self._enqueue(job)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Drain the queue, make the writes durable and stop the worker."""
+        with self._state:
+            thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._state:
+            self._thread = None
+            if self._next_id <= self._reserved_end:
+                self.dao.release_bill_ids(self._next_id, self._reserved_end)
+            self._next_id = self._reserved_end = 0
+            self._retry_at.clear()   # still in the journal: replayed by the next start()
+            self._attempts.clear()
+            self._journal.close(self._pending.values())
+        self.dao.db.checkpoint()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every submitted bill has been written (or is waiting for a retry)."""
+        with self._state:
+            return self._state.wait_for(lambda: self._outstanding == 0, timeout)
+
+    # --- Producer side (UI thread) ---
+    def submit(self, customer_id: str, lines, bill_id: int | None = None) -> int:
+        """
+        Queue a finalized bill and return its id without touching the database.
+
+        ``lines`` are ``(product_id, quantity, price)``. Pass ``bill_id`` to
+        replace the lines of an existing bill.
+        """
+        self.start()
+        with self._state:
+            if bill_id is None:
+                bill_id = self._allocate_id()
+            job = {
+                "bill_id": bill_id,
+                "customer_id": customer_id,
+                "date": datetime.now().isoformat(),
+                "lines": [list(line) for line in lines],
+            }
+            earlier = self._pending.get(bill_id)
+            if earlier is not None:
+                # an edit of a bill that is still queued keeps its header
+                job["customer_id"], job["date"] = earlier["customer_id"], earlier["date"]
+            self._journal.append(job)
+        self._enqueue(job)
+        return bill_id
+
+    def is_pending(self, bill_id: int) -> bool:
+        with self._state:
+            return bill_id in self._pending
+
+    def _enqueue(self, job: dict) -> None:
+        with self._state:
+            self._pending[job["bill_id"]] = job
+            self._retry_at.pop(job["bill_id"], None)   # the new version goes out now
+            self._outstanding += 1
+        self._queue.put(job["bill_id"])
+
+    def _allocate_id(self) -> int:
+        if self._next_id == 0 or self._next_id > self._reserved_end:
+            self._next_id = self.dao.reserve_bill_ids(self.ID_BLOCK)
+            self._reserved_end = self._next_id + self.ID_BLOCK - 1
+        bill_id = self._next_id
+        self._next_id += 1
+        return bill_id
+
+    # --- Worker side ---
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self._next_retry_in())
+            except queue.Empty:
+                first = None
+            if first is _STOP:
+                break
+            ids = self._due_retries() + ([first] if first is not None else [])
+            if not ids:
+                continue
+            deadline = time.monotonic() + self.BATCH_LINGER
+            while len(ids) < self.BATCH_SIZE:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                ids.append(nxt)
+            self._write_batch(ids)
+
+    def _next_retry_in(self) -> float | None:
+        with self._state:
+            if not self._retry_at:
+                return None
+            return max(0.0, min(self._retry_at.values()) - time.monotonic())
+
+    def _due_retries(self) -> list[int]:
+        """Take the bills whose retry is due back into flight."""
+        now = time.monotonic()
+        with self._state:
+            due = [bill_id for bill_id, at in self._retry_at.items() if at <= now]
+            for bill_id in due:
+                del self._retry_at[bill_id]
+            self._outstanding += len(due)
+        return due
+
+    def _write_batch(self, ids: list[int]) -> None:
+        with self._state:
+            jobs = [self._pending[i] for i in dict.fromkeys(ids) if i in self._pending]
+
+        saved, failed = [], []
+        try:
+            if jobs:
+                self.dao.write_bills(jobs)
+            saved = jobs
+        except Exception as e:
+            if len(jobs) == 1:
+                failed = [(jobs[0], e)]
+            else:
+                log.warning(f"Writing {len(jobs)} bill(s) failed ({e}); writing them one at a time")
+                for job in jobs:
+                    try:
+                        self.dao.write_bills([job])
+                        saved.append(job)
+                    except Exception as e:
+                        failed.append((job, e))
+
+        first_failures = []
+        with self._state:
+            for job in saved:
+                if self._pending.get(job["bill_id"]) is job:
+                    del self._pending[job["bill_id"]]
+                self._attempts.pop(job["bill_id"], None)
+            for job, error in failed:
+                bill_id = job["bill_id"]
+                if self._pending.get(bill_id) is not job:
+                    continue   # edited meanwhile: the newer version is queued
+                attempt = self._attempts.get(bill_id, 0)
+                self._attempts[bill_id] = attempt + 1
+                delay = self.RETRY_DELAYS[min(attempt, len(self.RETRY_DELAYS) - 1)]
+                self._retry_at[bill_id] = time.monotonic() + delay
+                log.warning(f"Writing bill {bill_id} failed (attempt {attempt + 1}): {error}; retrying in {delay:g}s")
+                if attempt == 0:
+                    first_failures.append((bill_id, str(error)))
+            if saved:
+                self._journal.rewrite(self._pending.values())
+            self._outstanding -= len(ids)
+            self._state.notify_all()
+
+        if saved:
+            self._notify(self.on_saved, [job["bill_id"] for job in saved])
+        for bill_id, error in first_failures:
+            self._notify(self.on_failed, bill_id, error)
+
+    @staticmethod
+    def _notify(callback, *args) -> None:
+        if callback:
+            try:
+                callback(*args)
+            except Exception:
+                log.exception("Bill writer callback failed")
@@ -0,0 +1,227 @@
+import bisect
+import threading
+import time
+
+from core.models.product import Product
+
+
+# set_order() re-sorts whole lists beyond this many changed products
+_RESORT_THRESHOLD = 32
+# how often a loaded catalog asks SQLite whether another process changed products
+CHECK_SECONDS = 1.0
+
+
+def _sort_key(product: Product):
+    return product.order_index, product.name
+
+
+class ProductCatalog:
+    """
+    Process-wide in-memory copy of the products table.
+
+    The catalog is loaded once from the repository and then patched by
+    ProductService on every write, so till lookups (barcode scans, category
+    grids, name lookups while billing) never go to SQLite.
+
+    Writes from elsewhere (the product_io CLI, another till on the same
+    database) are noticed through the products change version: at most
+    every CHECK_SECONDS a lookup compares it with the version the catalog
+    is in step with and reloads if it moved. ProductService moves that
+    version along with its own patches (advance()).
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._mutex = threading.RLock()
+        self._loaded = False
+        self._by_id: dict[int, Product] = {}
+        self._by_barcode: dict[str, Product] = {}
+        self._by_name: dict[str, Product] = {}
+        self._by_category: dict[str, list[Product]] = {}
+        self._all: list[Product] = []
+        self._version = None      # products change version the catalog matches
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    # --- Loading ---
+    def ensure_loaded(self, repo, check: bool = False) -> None:
+        """Load on first use; reload if products changed behind our back (``check``: look now)."""
+        now = time.monotonic()
+        if self._loaded and not check and now - self._checked_at < CHECK_SECONDS:
+            return
+        with self._mutex:
+            self._checked_at = now
+            version = repo.change_version()
+            if self._loaded and version == self._version:
+                return
+            self._rebuild(repo.get_all())
+            self._version = version
+
+    def advance(self, before: int, after: int) -> None:
+        """
+        A write of ours moved the change version from ``before`` to
+        ``after`` and has been patched in; stay in step unless something
+        else had changed products first.
+        """
+        with self._mutex:
+            if self._loaded and self._version == before:
+                self._version = after
+
+    def invalidate(self) -> None:
+        """Drop everything; the next lookup reloads from the repository."""
+        with self._mutex:
+            self._loaded = False
+            self._version = None
+            self._by_id.clear()
+            self._by_barcode.clear()
+            self._by_name.clear()
+            self._by_category.clear()
+            self._all = []
+
+    def _rebuild(self, products: list[Product]) -> None:
+        self._by_id = {p.id: p for p in products}
+        self._reindex()
+        self._loaded = True
+        self.loads += 1
+
+    def _reindex(self) -> None:
+        by_barcode, by_name, by_category = {}, {}, {}
+        # Name lookups return the oldest product, matching SQLite's rowid order.
+        for pid in sorted(self._by_id):
+            p = self._by_id[pid]
+            if p.barcode:
+                by_barcode[p.barcode] = p
+            by_name.setdefault(p.name, p)
+            by_category.setdefault(p.category, []).append(p)
+        for products in by_category.values():
+            products.sort(key=_sort_key)
+        self._by_barcode, self._by_name, self._by_category = by_barcode, by_name, by_category
+        self._all = sorted(self._by_id.values(), key=_sort_key)
+
+    # --- Patching ---
+    def put(self, product: Product | None) -> None:
+        """Insert or replace one product after a create/update."""
+        if not self._loaded or product is None:
+            return
+        with self._mutex:
+            self._remove(product.id)
+            self._add(product)
+
+    def put_many(self, products: list[Product]) -> None:
+        if not self._loaded:
+            return
+        with self._mutex:
+            for p in products:
+                self._by_id[p.id] = p
+            self._reindex()
+
+    def set_order(self, order_indexes: dict[int, int]) -> None:
+        """Apply new order_index values (after a reorder) and re-sort."""
+        if not self._loaded or not order_indexes:
+            return
+        with self._mutex:
+            moved = [self._by_id[pid] for pid in order_indexes if pid in self._by_id]
+            if len(moved) > _RESORT_THRESHOLD:
+                for product in moved:
+                    product.order_index = order_indexes[product.id]
+                for category in {product.category for product in moved}:
+                    self._by_category[category].sort(key=_sort_key)
+                self._all.sort(key=_sort_key)
+                return
+            # a typical move touches a row or two: re-insert just those
+            for product in moved:
+                category = self._by_category[product.category]
+                category.remove(product)
+                self._all.remove(product)
+                product.order_index = order_indexes[product.id]
+                bisect.insort(category, product, key=_sort_key)
+                bisect.insort(self._all, product, key=_sort_key)
+
+    def discard(self, product_id: int) -> None:
+        if not self._loaded:
+            return
+        with self._mutex:
+            self._remove(product_id)
+
+    def discard_name(self, name: str) -> None:
+        """Drop every product with this name (mirrors delete_by_name)."""
+        if not self._loaded:
+            return
+        with self._mutex:
+            for pid in [pid for pid, p in self._by_id.items() if p.name == name]:
+                self._remove(pid)
+
+    def _add(self, product: Product) -> None:
+        self._by_id[product.id] = product
+        if product.barcode:
+            self._by_barcode[product.barcode] = product
+        current = self._by_name.get(product.name)
+        if current is None or product.id < current.id:
+            self._by_name[product.name] = product
+        bisect.insort(self._by_category.setdefault(product.category, []), product, key=_sort_key)
+        bisect.insort(self._all, product, key=_sort_key)
+
+    def _remove(self, product_id: int) -> None:
+        old = self._by_id.pop(product_id, None)
+        if old is None:
+            return
+        if old.barcode and self._by_barcode.get(old.barcode) is old:
+            del self._by_barcode[old.barcode]
+        if self._by_name.get(old.name) is old:
+            del self._by_name[old.name]
+            same_name = [p for p in self._by_id.values() if p.name == old.name]
+            if same_name:
+                self._by_name[old.name] = min(same_name, key=lambda p: p.id)
+        category = self._by_category.get(old.category)
+        if category is not None:
+            category.remove(old)
+            if not category:
+                del self._by_category[old.category]
+        self._all.remove(old)
+
+    # --- Lookups ---
+    def _count(self, product):
+        if product is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return product
+
+    def get_by_id(self, product_id: int) -> Product | None:
+        return self._count(self._by_id.get(product_id))
+
+    def get_by_barcode(self, barcode: str) -> Product | None:
+        return self._count(self._by_barcode.get(barcode))
+
+    def get_by_name(self, name: str) -> Product | None:
+        return self._count(self._by_name.get(name))
+
+    def get_by_category(self, category: str) -> list[Product]:
+        products = self._by_category.get(category)
+        self._count(products)
+        return list(products) if products else []
+
+    def get_all(self) -> list[Product]:
+        self.hits += 1
+        return list(self._all)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "products": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+        }
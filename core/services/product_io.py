@@ -0,0 +1,185 @@
+"""
+Streaming bulk import/export of the product catalog (CSV or NDJSON).
+
+    python -m core.services.product_io import prices.csv [--chunk-size N]
+    python -m core.services.product_io export catalog.ndjson
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from itertools import islice
+
+from database.product_repository import ProductRepository
+from utils.constants import CATEGORIES
+
+UNITS = ("kg", "pcs")
+EXPORT_FIELDS = ("id", "name", "price", "barcode", "unit", "image_path", "category", "order_index")
+MAX_REJECTS_KEPT = 1000
+
+
+class TransferReport:
+    def __init__(self, action: str, path: str):
+        self.action = action
+        self.path = path
+        self.rows_read = 0
+        self.rows_written = 0
+        self.rejected = 0
+        self.errors: list[tuple[int, str]] = []   # (line, reason), first MAX_REJECTS_KEPT
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REJECTS_KEPT:
+            self.errors.append((line, reason))
+
+    def __str__(self):
+        text = (f"{self.action} {self.path}: {self.rows_read} read, {self.rows_written} written, "
+                f"{self.rejected} rejected in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)")
+        for line, reason in self.errors[:20]:
+            text += f"\n  line {line}: {reason}"
+        if self.rejected > 20:
+            text += f"\n  ... {self.rejected - 20} more"
+        return text
+
+
+def _format_of(path: str, fmt: str | None) -> str:
+    fmt = fmt or ("ndjson" if os.path.splitext(path)[1].lower() in (".ndjson", ".jsonl") else "csv")
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"Unsupported format: {fmt}")
+    return fmt
+
+
+def _read_records(f, fmt: str):
+    """Yield (line_number, record dict) without loading the whole file."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, e
+                continue
+            yield line_no, record
+
+
+def validate(record, seen: set) -> tuple:
+    """
+    Return an upsert row for ProductRepository or raise ValueError.
+
+    ``seen`` collects the barcodes, and the (name, category) of rows
+    without one, that the file already had: upsert_many() matches rows on
+    those, so a second row for the same product is refused.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"not a record: {record}")
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {record.get('price')!r}")
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"invalid price {price}")
+    barcode = str(record.get("barcode") or "").strip() or None
+    unit = str(record.get("unit") or "pcs").strip().lower()
+    if unit not in UNITS:
+        raise ValueError(f"unknown unit {unit!r}")
+    category = str(record.get("category") or "manual").strip()
+    if category not in CATEGORIES:
+        raise ValueError(f"unknown category {category!r}")
+    image_path = str(record.get("image_path") or "").strip() or None
+    key = barcode if barcode is not None else (name, category)
+    if key in seen:
+        raise ValueError(f"duplicate barcode {barcode} in file" if barcode is not None
+                         else f"duplicate product {name!r} in {category} without a barcode in file")
+    seen.add(key)
+    return name, price, barcode, unit, image_path, category
+
+
+def import_products(path: str, fmt: str | None = None, chunk_size: int = 1000,
+                    repo: ProductRepository | None = None) -> TransferReport:
+    """
+    Validate and upsert every product in the file: on barcode, or on name
+    and category for rows without one, so re-importing an export updates
+    the catalog instead of duplicating it.
+
+    Rows are streamed in chunks of ``chunk_size`` and written with
+    executemany inside a single transaction, so either the whole valid part
+    of the file lands or nothing does. Invalid rows are skipped and listed
+    in the report.
+    """
+    repo = repo or ProductRepository()
+    fmt = _format_of(path, fmt)
+    report = TransferReport("import", path)
+    seen = set()
+    start = time.perf_counter()
+    with open(path, newline="", encoding="utf-8") as f, repo.db.transaction():
+        records = _read_records(f, fmt)
+        while True:
+            batch = list(islice(records, chunk_size))
+            if not batch:
+                break
+            chunk = []
+            for line_no, record in batch:
+                report.rows_read += 1
+                try:
+                    if isinstance(record, Exception):
+                        raise ValueError(str(record))
+                    chunk.append(validate(record, seen))
+                except ValueError as e:
+                    report.reject(line_no, str(e))
+            if chunk:
+                report.rows_written += repo.upsert_many(chunk)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def export_products(path: str, fmt: str | None = None, chunk_size: int = 1000,
+                    repo: ProductRepository | None = None) -> TransferReport:
+    """Write the catalog to ``path`` with constant memory (fetchmany chunks)."""
+    repo = repo or ProductRepository()
+    fmt = _format_of(path, fmt)
+    report = TransferReport("export", path)
+    start = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_FIELDS)
+        for product in repo.iter_all(chunk_size):
+            values = [getattr(product, field) for field in EXPORT_FIELDS]
+            if writer:
+                writer.writerow(values)
+            else:
+                f.write(json.dumps(dict(zip(EXPORT_FIELDS, values))) + "\n")
+            report.rows_read += 1
+    report.rows_written = report.rows_read
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk product import/export")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    run = import_products if args.action == "import" else export_products
+    print(run(args.path, args.format, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,89 @@
 from core.models.product import Product
+from core.services import product_io
+from core.services.product_catalog import ProductCatalog
+from database import product_search
 from database.product_repository import ProductRepository
 
 
 class ProductService:
     def __init__(self):
         self.repo = ProductRepository()
+        self.catalog = ProductCatalog.get_instance()
+
+    def _cached(self) -> ProductCatalog:
+        self.catalog.ensure_loaded(self.repo)
+        return self.catalog
+
+    def _write(self, write, patch):
+        """
+        Run ``write()`` in one transaction, then ``patch(result)`` into the
+        catalog and keep it in step with the change version the write moved.
+        """
+        with self.repo.db.transaction():
+            before = self.repo.change_version(writer=True)
+            result = write()
+            after = self.repo.change_version(writer=True)
+        patch(result)
+        self.catalog.advance(before, after)
+        return result
 
     def create_product(self, **kwargs) -> int:
-        return self.repo.create(**kwargs)
+        return self._write(lambda: self.repo.create(**kwargs),
+                           lambda new_id: self.catalog.put(self.repo.get_by_id(new_id)))
 
     def update_product(self, product_id: int, **kwargs) -> bool:
-        return self.repo.update(product_id, **kwargs)
+        return self._write(lambda: self.repo.update(product_id, **kwargs),
+                           lambda updated: updated and self.catalog.put(self.repo.get_by_id(product_id)))
 
     def delete_product_by_name(self, name: str) -> bool:
-        return self.repo.delete_by_name(name)
+        return self._write(lambda: self.repo.delete_by_name(name),
+                           lambda deleted: deleted and self.catalog.discard_name(name))
 
     def get_all(self) -> list[Product]:
-        return self.repo.get_all()
+        return self._cached().get_all()
 
     def get_by_barcode(self, barcode: str) -> Product | None:
-        return self.repo.get_by_barcode(barcode)
+        return self._cached().get_by_barcode(barcode)
 
     def get_by_id(self, id: int) -> Product | None:
-        return self.repo.get_by_id(id)
+        return self._cached().get_by_id(id)
 
     def get_by_name(self, name: str) -> Product | None:
-        return self.repo.get_by_name(name)
+        return self._cached().get_by_name(name)
 
     def get_by_category(self, category):
-        result = self.repo.get_by_category(category)  # or however it's implemented
-        return result if result is not None else []
+        return self._cached().get_by_category(category)
+
+    def search(self, query: str, category: str | None = None, limit: int = 50) -> list[Product]:
+        """Ranked prefix search on product names and barcodes (as-you-type)."""
+        catalog = self._cached()
+        ids = self.repo.search_ids(query, category)
+        candidates = [catalog.get_by_id(i) for i in ids]
+        if None in candidates:
+            # the index knows products the catalog does not: changed elsewhere since the last check
+            catalog.ensure_loaded(self.repo, check=True)
+            candidates = [catalog.get_by_id(i) for i in ids]
+        return product_search.rank([p for p in candidates if p], query)[:limit]
 
     def reorder_products(self, id1: int, id2: int):
-        self.repo.swap_order(id1, id2)
+        def patch(_):
+            self.catalog.put(self.repo.get_by_id(id1))
+            self.catalog.put(self.repo.get_by_id(id2))
+        self._write(lambda: self.repo.swap_order(id1, id2), patch)
+
+    def apply_order(self, category: str, ordered_ids) -> None:
+        """Save a whole new ordering of ``category`` in one write."""
+        self._write(lambda: self.repo.apply_order(category, ordered_ids), self.catalog.set_order)
+
+    def import_products(self, path: str, fmt: str | None = None, chunk_size: int = 1000):
+        report = product_io.import_products(path, fmt, chunk_size, repo=self.repo)
+        if report.rows_written:
+            self.catalog.invalidate()
+        return report
+
+    def export_products(self, path: str, fmt: str | None = None, chunk_size: int = 1000):
+        return product_io.export_products(path, fmt, chunk_size, repo=self.repo)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the shared product catalog."""
+        return self.catalog.stats()
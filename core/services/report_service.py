@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from core.models.report import SalesReport
+from database.report_dao import ReportDAO
+
+
+class ReportService:
+    def __init__(self):
+        self.dao = ReportDAO()
+
+    def range(self, start: date, end: date, top_products: int | None = None) -> SalesReport:
+        start_s, end_s = start.isoformat(), end.isoformat()
+        return SalesReport(
+            start_s,
+            end_s,
+            self.dao.daily_sales(start_s, end_s),
+            self.dao.product_sales(start_s, end_s, top_products),
+        )
+
+    def day(self, day: date, top_products: int | None = None) -> SalesReport:
+        return self.range(day, day, top_products)
+
+    def week(self, day: date, top_products: int | None = None) -> SalesReport:
+        """Monday to Sunday of the week containing ``day``."""
+        monday = day - timedelta(days=day.weekday())
+        return self.range(monday, monday + timedelta(days=6), top_products)
+
+    def month(self, year: int, month: int, top_products: int | None = None) -> SalesReport:
+        first = date(year, month, 1)
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        return self.range(first, next_month - timedelta(days=1), top_products)
+
+    def rebuild(self, since: date | None = None) -> None:
+        self.dao.rebuild(since.isoformat() if since else None)
@@ -0,0 +1,184 @@
+"""
+Destinations for BillSync batches.
+
+A sink has one method, ``send(lane_id, entries)``, which stores a batch of
+outbox entries (see OutboxDAO.due) or raises. Sends must be idempotent:
+a batch whose acknowledgement was lost is sent again.
+
+SQLiteSink writes into a head-office SQLite file (also the stand-in for a
+real central store); HttpSink POSTs the batch as JSON. serve() runs a small
+HTTP endpoint in front of any sink, for a head-office box or for tests:
+
+    python -m core.services.sync_sinks --db headoffice.db --port 8765
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_ITEM_FIELDS = ("product_id", "quantity", "price", "product_name", "unit")
+
+
+def payload(lane_id: str, entries) -> dict:
+    """What goes over the wire: bookkeeping fields stripped."""
+    return {"lane_id": lane_id,
+            "entries": [{"bill_id": e["bill_id"], "op": e["op"], "bill": e.get("bill")} for e in entries]}
+
+
+class SQLiteSink:
+    """Bills of every lane in one SQLite file, keyed by (lane_id, bill_id)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS lane_bills (
+                lane_id     TEXT    NOT NULL,
+                bill_id     INTEGER NOT NULL,
+                customer_id TEXT,
+                date        TEXT,
+                total       REAL,
+                synced_at   TEXT    NOT NULL,
+                PRIMARY KEY (lane_id, bill_id)
+            ) WITHOUT ROWID""")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS lane_bill_items (
+                lane_id      TEXT    NOT NULL,
+                bill_id      INTEGER NOT NULL,
+                line         INTEGER NOT NULL,
+                product_id   INTEGER,
+                quantity     REAL,
+                price        REAL,
+                product_name TEXT,
+                unit         TEXT,
+                PRIMARY KEY (lane_id, bill_id, line)
+            ) WITHOUT ROWID""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_lane_bills_date ON lane_bills(date)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def send(self, lane_id: str, entries) -> None:
+        synced_at = datetime.now().isoformat()
+        bills, items, gone = [], [], []
+        for entry in entries:
+            gone.append((lane_id, entry["bill_id"]))
+            bill = entry.get("bill")
+            if entry["op"] != "upsert" or bill is None:
+                continue
+            bills.append((lane_id, bill["id"], bill["customer_id"], bill["date"], bill["total"], synced_at))
+            items += [(lane_id, bill["id"], n, *(item[f] for f in _ITEM_FIELDS))
+                      for n, item in enumerate(bill["items"], 1)]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                # replace each bill whole: drop what the sink had, write the current state
+                conn.executemany("DELETE FROM lane_bill_items WHERE lane_id = ? AND bill_id = ?", gone)
+                conn.executemany("DELETE FROM lane_bills WHERE lane_id = ? AND bill_id = ?", gone)
+                conn.executemany("INSERT INTO lane_bills VALUES (?,?,?,?,?,?)", bills)
+                conn.executemany("INSERT INTO lane_bill_items VALUES (?,?,?,?,?,?,?,?)", items)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class HttpSink:
+    """POST each batch as JSON; any non-2xx answer or network error fails the batch."""
+
+    def __init__(self, url: str, timeout: float = 10.0, token: str | None = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+
+    def send(self, lane_id: str, entries) -> None:
+        body = json.dumps(payload(lane_id, entries)).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        # urlopen raises HTTPError for 4xx/5xx
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def close(self) -> None:
+        pass
+
+
+def sink_for(target: str):
+    """HttpSink for an http(s):// URL, otherwise SQLiteSink on that path."""
+    if target.startswith(("http://", "https://")):
+        return HttpSink(target)
+    return SQLiteSink(target)
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self.server.sink.send(body["lane_id"], body["entries"])
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        except Exception as e:
+            log.exception("Sync sink failed")
+            self._reply(500, {"error": str(e)})
+            return
+        self._reply(200, {"stored": len(body["entries"])})
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass   # one line per batch is noise; failures are logged above
+
+
+def serve(sink, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start an HTTP endpoint that stores POSTed batches in ``sink``, on a
+    daemon thread. ``port=0`` picks a free port (see server.server_port).
+    Stop it with server.shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), _SinkHandler)
+    server.sink = sink
+    threading.Thread(target=server.serve_forever, name="sync-sink-http", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Head-office endpoint storing synced bills in SQLite")
+    parser.add_argument("--db", default="headoffice.db")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    server = serve(SQLiteSink(args.db), args.host, args.port)
+    print(f"storing synced bills in {args.db}, listening on {args.host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
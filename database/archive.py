@@ -0,0 +1,211 @@
+"""
+Monthly archive databases for old bills.
+
+BillArchive.rollover() moves bills dated before a cutoff day, together with
+their lines, into one SQLite file per month (``archive/bills-YYYY-MM.db``
+next to the live database), records each file in ``bill_archives`` and
+vacuums the live database. BillDAO reads the archives only when asked
+(``include_archives=True``), ATTACHing one file at a time.
+
+The daily summary tables are not touched, so reports keep covering
+archived days.
+
+    python -m database.archive 2024-01-01 [--no-vacuum]
+"""
+import argparse
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from sqlite3 import Connection, Cursor
+
+from utils.logger import get_logger
+from .db_manager import DBManager
+
+log = get_logger(__name__)
+
+# Alias archive files are ATTACHed under, on the reader or the writer.
+ARCHIVE_SCHEMA = "archive"
+
+ARCHIVE_DIR = "archive"
+
+
+def ensure_schema(cur: Cursor, schema: str = ARCHIVE_SCHEMA) -> None:
+    """bills/bill_items as in the live database, with the same read indexes."""
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS {schema}.bills (
+        id          INTEGER PRIMARY KEY,
+        customer_id TEXT,
+        date        TEXT,
+        total       REAL    DEFAULT 0
+    )""")
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS {schema}.bill_items (
+        id           INTEGER PRIMARY KEY,
+        bill_id      INTEGER NOT NULL,
+        product_id   INTEGER NOT NULL,
+        quantity     REAL    NOT NULL,
+        price        REAL    NOT NULL,
+        product_name TEXT,
+        unit         TEXT
+    )""")
+    cur.execute(f"""
+    CREATE INDEX IF NOT EXISTS {schema}.idx_bills_date_id
+        ON bills(date, id, customer_id, total)""")
+    cur.execute(f"""
+    CREATE INDEX IF NOT EXISTS {schema}.idx_bill_items_bill
+        ON bill_items(bill_id, id, product_id, quantity, price, product_name, unit)""")
+
+
+@contextmanager
+def attached(conn: Connection, path: str, schema: str = ARCHIVE_SCHEMA):
+    """ATTACH an archive file for the duration of the block."""
+    conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+    try:
+        yield schema
+    finally:
+        conn.execute(f"DETACH DATABASE {schema}")
+
+
+def _resolve(db_path: str, relative: str) -> str | None:
+    path = os.path.join(os.path.dirname(os.path.abspath(db_path)), relative)
+    if not os.path.exists(path):
+        # ATTACH would silently create an empty file
+        log.warning(f"Bill archive {path} is missing")
+        return None
+    return path
+
+
+def paths_for_bill(conn: Connection, db_path: str, bill_id: int) -> list[str]:
+    """Archive files whose id range covers ``bill_id``."""
+    rows = conn.execute(
+        "SELECT path FROM bill_archives WHERE last_id >= ? AND first_id <= ?",
+        (bill_id, bill_id),
+    ).fetchall()
+    return [p for p in (_resolve(db_path, row[0]) for row in rows) if p]
+
+
+def paths_before(conn: Connection, db_path: str, before_date: str | None) -> list[str]:
+    """Archive files holding bills dated up to ``before_date``, newest first."""
+    if before_date is None:
+        rows = conn.execute("SELECT path FROM bill_archives ORDER BY first_date DESC").fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT path FROM bill_archives WHERE first_date <= ? ORDER BY first_date DESC",
+            (before_date,),
+        ).fetchall()
+    return [p for p in (_resolve(db_path, row[0]) for row in rows) if p]
+
+
+def horizon(cur: Cursor) -> str | None:
+    """Day before which bills may have been moved out of the live tables."""
+    cur.execute("SELECT MAX(archived_before) FROM bill_archives")
+    return cur.fetchone()[0]
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}-01"
+
+
+class BillArchive:
+    def __init__(self, db_path: str = "pos.db", archive_dir: str | None = None):
+        self.db = DBManager.get_instance(db_path)
+        self.archive_dir = archive_dir or os.path.join(
+            os.path.dirname(os.path.abspath(self.db.db_path)), ARCHIVE_DIR)
+
+    def archives(self) -> list[tuple]:
+        """(month, path, first_id, last_id, first_date, last_date, bill_count) per file."""
+        cur = self.db.get_read_connection().cursor()
+        cur.row_factory = None
+        cur.execute(
+            "SELECT month, path, first_id, last_id, first_date, last_date, bill_count "
+            "FROM bill_archives ORDER BY month"
+        )
+        return cur.fetchall()
+
+    def rollover(self, cutoff: str, vacuum: bool = True) -> dict[str, int]:
+        """
+        Move every bill dated before ``cutoff`` (YYYY-MM-DD) into its month's
+        archive file. Returns {month: bills moved}.
+
+        Each month is first copied (one transaction on the archive file) and
+        then deleted from the live tables (one transaction on pos.db). A
+        crash in between leaves the bills in both places; running the
+        rollover again finishes the move, since copies overwrite by id.
+        """
+        cutoff = date.fromisoformat(cutoff).isoformat()
+        os.makedirs(self.archive_dir, exist_ok=True)
+        cur = self.db.get_read_connection().cursor()
+        cur.execute("SELECT DISTINCT substr(date, 1, 7) FROM bills WHERE date < ?", (cutoff,))
+        months = [row[0] for row in cur.fetchall()]
+
+        moved = {}
+        for month in months:
+            moved[month] = self._move_month(month, f"{month}-01", min(_next_month(month), cutoff), cutoff)
+            log.info(f"Archived {moved[month]} bill(s) of {month}")
+        if moved and vacuum:
+            with self.db.transaction() as cur:
+                cur.execute("VACUUM")
+            self.db.checkpoint()
+        return moved
+
+    def _move_month(self, month: str, start: str, end: str, cutoff: str) -> int:
+        path = os.path.join(self.archive_dir, f"bills-{month}.db")
+        relative = os.path.relpath(path, os.path.dirname(os.path.abspath(self.db.db_path)))
+        span = (start, end)
+        with self.db.transaction() as cur:
+            cur.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+        try:
+            with self.db.transaction() as cur:
+                ensure_schema(cur)
+                cur.execute(f"""
+                INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.bills(id, customer_id, date, total)
+                SELECT id, customer_id, date, total FROM main.bills
+                WHERE date >= ? AND date < ?""", span)
+                cur.execute(f"""
+                INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.bill_items
+                    (id, bill_id, product_id, quantity, price, product_name, unit)
+                SELECT i.id, i.bill_id, i.product_id, i.quantity, i.price, i.product_name, i.unit
+                FROM main.bills b JOIN main.bill_items i ON i.bill_id = b.id
+                WHERE b.date >= ? AND b.date < ?""", span)
+                cur.execute(
+                    f"SELECT MIN(id), MAX(id), MIN(date), MAX(date), COUNT(*) FROM {ARCHIVE_SCHEMA}.bills")
+                first_id, last_id, first_date, last_date, count = cur.fetchone()
+
+            with self.db.transaction() as cur:
+                cur.execute("""
+                INSERT INTO bill_archives(month, path, first_id, last_id, first_date, last_date,
+                                          bill_count, archived_before, archived_at)
+                VALUES (?,?,?,?,?,?,?,?,?)
+                ON CONFLICT(month) DO UPDATE SET
+                    path = excluded.path,
+                    first_id = excluded.first_id, last_id = excluded.last_id,
+                    first_date = excluded.first_date, last_date = excluded.last_date,
+                    bill_count = excluded.bill_count,
+                    archived_before = max(archived_before, excluded.archived_before),
+                    archived_at = excluded.archived_at""",
+                    (month, relative, first_id, last_id, first_date, last_date, count,
+                     cutoff, datetime.now().isoformat()))
+                cur.execute(
+                    "DELETE FROM main.bill_items WHERE bill_id IN "
+                    "(SELECT id FROM main.bills WHERE date >= ? AND date < ?)", span)
+                cur.execute("DELETE FROM main.bills WHERE date >= ? AND date < ?", span)
+                moved = cur.rowcount
+        finally:
+            with self.db.transaction() as cur:
+                cur.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+        return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old bills into monthly archive databases")
+    parser.add_argument("cutoff", help="archive bills dated before this day (YYYY-MM-DD)")
+    parser.add_argument("--db", default="pos.db")
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args(argv)
+    moved = BillArchive(args.db).rollover(args.cutoff, vacuum=not args.no_vacuum)
+    print(f"archived {sum(moved.values())} bill(s) from {len(moved)} month(s)")
+
+
+if __name__ == "__main__":
+    main()
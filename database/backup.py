@@ -0,0 +1,280 @@
+"""
+Online backups of the live database.
+
+BackupManager copies pos.db with SQLite's online backup API while the till
+keeps running. The copy is a consistent snapshot: its source connection
+holds one read transaction for the whole run, so checkout commits made
+meanwhile neither block it nor restart it (they land in the WAL, which is
+not checkpointed past the snapshot until the copy is done). Pages are
+copied a few at a time with a pause between steps to leave the disk to
+the writer.
+
+Each copy is checked with PRAGMA integrity_check, gzipped to
+``backups/pos-YYYYmmdd-HHMMSS.db.gz`` with a ``.sha256`` file next to it
+(``sha256sum -c`` format), and the oldest snapshots beyond ``keep`` are
+deleted. Every run, good or failed, is recorded in ``backup_history``.
+
+    python -m database.backup [--dir backups] [--keep 14]
+    python -m database.backup --verify backups/pos-20240101-210000.db.gz
+    python -m database.backup --history
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from utils.logger import get_logger
+from .db_manager import DBManager
+
+log = get_logger(__name__)
+
+BACKUP_DIR = "backups"
+KEEP = 14                 # snapshots kept by rotation
+PAGES_PER_STEP = 256      # 1 MB at the default 4 KiB page size
+STEP_PAUSE = 0.005        # seconds between steps
+_CHUNK = 1024 * 1024
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def integrity_errors(conn: sqlite3.Connection) -> list[str]:
+    """PRAGMA integrity_check problems; empty when the database is sound."""
+    rows = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+    return [] if rows == ["ok"] else rows
+
+
+class BackupManager:
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, db_path: str = "pos.db", backup_dir: str | None = None, keep: int = KEEP):
+        self.db = DBManager.get_instance(db_path)
+        self.backup_dir = backup_dir or os.path.join(
+            os.path.dirname(os.path.abspath(self.db.db_path)), BACKUP_DIR)
+        self.keep = keep
+        self.prefix = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        self._running = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    # --- Running ---
+    def start(self, on_done=None) -> threading.Thread | None:
+        """
+        Back up on a background thread. ``on_done(record)`` is called from
+        that thread with the history row. None if a backup is already running.
+        """
+        if self._running.locked():
+            return None
+
+        def run():
+            try:
+                record = self.backup()
+            except Exception:
+                return   # logged and recorded by backup()
+            if on_done:
+                try:
+                    on_done(record)
+                except Exception:
+                    log.exception("Backup callback failed")
+
+        thread = threading.Thread(target=run, name="db-backup", daemon=True)
+        thread.start()
+        return thread
+
+    def start_if_due(self, max_age: timedelta = timedelta(days=1), on_done=None) -> threading.Thread | None:
+        """start() unless a good backup younger than ``max_age`` exists."""
+        last = self.last_success()
+        if last is not None and datetime.now() - datetime.fromisoformat(last["started_at"]) < max_age:
+            return None
+        return self.start(on_done)
+
+    def backup(self) -> dict:
+        """Take, verify, compress and rotate one snapshot. Returns its history row."""
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("a backup is already running")
+        started = datetime.now()
+        record = {"started_at": started.isoformat(), "path": None, "pages": 0, "size_bytes": 0,
+                  "seconds": 0.0, "sha256": None, "status": "failed", "error": None}
+        clock = time.perf_counter()
+        try:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            self._remove_partials()
+            name = f"{self.prefix}-{started:%Y%m%d-%H%M%S}.db.gz"
+            copy = os.path.join(self.backup_dir, f".{name}.part")
+            try:
+                record["pages"] = self._copy(copy)
+                target = os.path.join(self.backup_dir, name)
+                record["sha256"] = self._compress(copy, target)
+            finally:
+                if os.path.exists(copy):
+                    os.remove(copy)
+            record.update(path=os.path.relpath(target, os.path.dirname(os.path.abspath(self.db.db_path))),
+                          size_bytes=os.path.getsize(target), status="ok")
+            self._rotate()
+        except Exception as e:
+            record["error"] = str(e)
+            log.exception("Database backup failed")
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - clock, 3)
+            self._record(record)
+            self._running.release()
+        log.info(f"Backed up {record['pages']} page(s) to {record['path']} in {record['seconds']}s")
+        return record
+
+    def _copy(self, path: str) -> int:
+        """Snapshot the live database into ``path``; returns the page count."""
+        source = sqlite3.connect(self.db.db_path)
+        target = sqlite3.connect(path)
+        try:
+            source.execute("PRAGMA query_only = ON")
+            # pin one snapshot for every step of the copy
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            pages = 0
+
+            def progress(status, remaining, total):
+                nonlocal pages
+                pages = total
+                time.sleep(STEP_PAUSE)   # let checkout commits through
+
+            source.backup(target, pages=PAGES_PER_STEP, progress=progress)
+            source.rollback()
+            # a self-contained file: no -wal to restore alongside it
+            target.execute("PRAGMA journal_mode = DELETE")
+            errors = integrity_errors(target)
+            if errors:
+                raise sqlite3.DatabaseError(f"backup copy failed integrity_check: {errors[:5]}")
+            return pages
+        finally:
+            target.close()
+            source.close()
+
+    @staticmethod
+    def _compress(copy: str, target: str) -> str:
+        """gzip ``copy`` to ``target`` and write its checksum file; returns the sha256."""
+        partial = target + ".part"
+        with open(copy, "rb") as src, gzip.open(partial, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, _CHUNK)
+        digest = _sha256(partial)
+        os.replace(partial, target)
+        with open(target + ".sha256", "w", encoding="utf-8") as f:
+            f.write(f"{digest}  {os.path.basename(target)}\n")
+        return digest
+
+    def _remove_partials(self) -> None:
+        # left by a run that died with the process
+        for path in glob.glob(os.path.join(self.backup_dir, "*.part")) + \
+                glob.glob(os.path.join(self.backup_dir, ".*.part")):
+            os.remove(path)
+
+    def snapshots(self) -> list[str]:
+        """Snapshot files of this database, oldest first."""
+        return sorted(glob.glob(os.path.join(self.backup_dir, f"{self.prefix}-*.db.gz")))
+
+    def _rotate(self) -> None:
+        for path in self.snapshots()[:-self.keep] if self.keep > 0 else []:
+            for stale in (path, path + ".sha256"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            log.info(f"Removed old backup {path}")
+
+    # --- History ---
+    def _record(self, record: dict) -> None:
+        try:
+            with self.db.transaction() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO backup_history
+                      (started_at, path, pages, size_bytes, seconds, sha256, status, error)
+                    VALUES (:started_at, :path, :pages, :size_bytes, :seconds, :sha256, :status, :error)
+                    """,
+                    record,
+                )
+        except sqlite3.Error:
+            log.exception("Could not record backup history")
+
+    def history(self, limit: int = 20) -> list[dict]:
+        """Most recent backup runs first."""
+        cur = self.db.get_read_connection().cursor()
+        cur.execute("SELECT * FROM backup_history ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in cur.fetchall()]
+
+    def last_success(self) -> dict | None:
+        cur = self.db.get_read_connection().cursor()
+        cur.execute("SELECT * FROM backup_history WHERE status = 'ok' ORDER BY id DESC LIMIT 1")
+        row = cur.fetchone()
+        return dict(row) if row else None
+
+
+def verify(path: str) -> list[str]:
+    """
+    Check a snapshot against its .sha256 file and run integrity_check on a
+    decompressed copy. Returns the problems found; empty when it is good.
+    """
+    problems = []
+    checksum = path + ".sha256"
+    if not os.path.exists(checksum):
+        problems.append(f"{checksum} is missing")
+    else:
+        with open(checksum, encoding="utf-8") as f:
+            expected = f.read().split()[0]
+        if _sha256(path) != expected:
+            problems.append("sha256 mismatch")
+    with tempfile.TemporaryDirectory(prefix="kpa-verify-") as scratch:
+        copy = os.path.join(scratch, "restore.db")
+        with gzip.open(path, "rb") as src, open(copy, "wb") as dst:
+            shutil.copyfileobj(src, dst, _CHUNK)
+        conn = sqlite3.connect(copy)
+        try:
+            problems += integrity_errors(conn)
+        except sqlite3.DatabaseError as e:
+            problems.append(str(e))
+        finally:
+            conn.close()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online backup of the POS database")
+    parser.add_argument("--db", default="pos.db")
+    parser.add_argument("--dir", help=f"snapshot folder (default: {BACKUP_DIR}/ next to the database)")
+    parser.add_argument("--keep", type=int, default=KEEP)
+    parser.add_argument("--verify", metavar="FILE", help="check a snapshot instead of taking one")
+    parser.add_argument("--history", action="store_true", help="list recent backup runs")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        problems = verify(args.verify)
+        print("ok" if not problems else "\n".join(problems))
+        raise SystemExit(1 if problems else 0)
+    manager = BackupManager(args.db, args.dir, args.keep)
+    if args.history:
+        for row in manager.history():
+            print(f"{row['started_at']}  {row['status']:6}  {row['pages']:>8} pages  "
+                  f"{row['seconds']:>7.2f}s  {row['path'] or row['error']}")
+        return
+    record = manager.backup()
+    print(f"{record['path']}: {record['pages']} pages, {record['size_bytes']:,} bytes, {record['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,271 @@
-from sqlite3 import Row
 from datetime import datetime
 
 from core.models.bill import Bill, BillItem
+from . import archive, outbox, sales_summary
 from .db_manager import DBManager
+from utils.constants import SYNC_TARGET
+
+# Column order matches the model constructors, so rows map positionally.
+BILL_COLUMNS = "id, customer_id, date, total"
+BILL_ITEM_COLUMNS = "id, bill_id, product_id, quantity, price, product_name, unit"
+
+# Lines snapshot the product name/unit; when the caller does not pass them
+# they are copied from the product row in the same statement.
+_INSERT_ITEM = """
+    INSERT INTO bill_items(bill_id,product_id,quantity,price,product_name,unit)
+    VALUES(?,?,?,?,
+           COALESCE(?, (SELECT name FROM products WHERE id=?)),
+           COALESCE(?, (SELECT unit FROM products WHERE id=?)))"""
+
+# {schema} is "main" for the live tables or an ATTACHed archive.
+_GET_BILL = f"""
+    SELECT b.id, b.customer_id, b.date, b.total,
+           {", ".join("i." + c.strip() for c in BILL_ITEM_COLUMNS.split(","))}
+    FROM {{schema}}.bills b LEFT JOIN {{schema}}.bill_items i ON i.bill_id = b.id
+    WHERE b.id=?
+    ORDER BY i.id"""
+
+
+def _bill_factory(cursor, row) -> Bill:
+    return Bill(*row)
+
+
+def _item_params(bill_id, line) -> tuple:
+    """(product_id, quantity, price[, product_name[, unit]]) -> _INSERT_ITEM params."""
+    product_id, quantity, price, *snapshot = line
+    name, unit = (*snapshot, None, None)[:2]
+    return bill_id, product_id, quantity, price, name, product_id, unit, product_id
 
 
 class BillDAO:
-    def __init__(self, db_path: str = "pos.db"):
-        self.conn = DBManager.get_instance(db_path).get_connection()
+    def __init__(self, db_path: str = "pos.db", sync: bool | None = None):
+        self.db = DBManager.get_instance(db_path)
+        self.conn = self.db.get_connection()
+        # queue changes in the outbox only when something drains it (KPA_SYNC_TARGET);
+        # OutboxDAO.backfill() catches up on bills written before sync was turned on
+        self.sync = bool(SYNC_TARGET) if sync is None else sync
+
+    def _reader(self):
+        return self.db.get_read_connection().cursor()
+
+    def _mark(self, cur, bill_ids, op: str = outbox.UPSERT) -> None:
+        if self.sync:
+            outbox.mark(cur, bill_ids, op)
 
     def create_bill(self, customer_id:str, date:str=None) -> int:
         date = date or datetime.now().isoformat()
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO bills(customer_id,date) VALUES(?,?)",
-            (customer_id, date),
-        )
-        self.conn.commit()
-        return cur.lastrowid
-
-    def add_item(self, bill_id:int, product_id:int, quantity:float, price:float) -> int:
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO bill_items(bill_id,product_id,quantity,price) VALUES(?,?,?,?)",
-            (bill_id, product_id, quantity, price),
-        )
-        # update bill total
-        cur.execute(
-            "UPDATE bills SET total = total + ? WHERE id = ?",
-            (quantity * price, bill_id),
-        )
-        self.conn.commit()
-        return cur.lastrowid
-
-    def get_bill(self, bill_id:int) -> Bill|None:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM bills WHERE id=?", (bill_id,))
-        row = cur.fetchone()
-        if not row:
+        with self.db.transaction() as cur:
+            cur.execute(
+                "INSERT INTO bills(customer_id,date) VALUES(?,?)",
+                (customer_id, date),
+            )
+            bill_id = cur.lastrowid
+            sales_summary.add_bills(cur, date[:10], 1)
+            self._mark(cur, [bill_id])
+        return bill_id
+
+    def add_item(self, bill_id:int, product_id:int, quantity:float, price:float,
+                 product_name:str=None, unit:str=None) -> int:
+        with self.db.transaction() as cur:
+            cur.execute(
+                _INSERT_ITEM,
+                _item_params(bill_id, (product_id, quantity, price, product_name, unit)),
+            )
+            item_id = cur.lastrowid
+            # update bill total
+            cur.execute(
+                "UPDATE bills SET total = total + ? WHERE id = ?",
+                (quantity * price, bill_id),
+            )
+            sales_summary.add_lines(cur, sales_summary.bill_day(cur, bill_id),
+                                    [(product_id, quantity, price, product_name)])
+            self._mark(cur, [bill_id])
+        return item_id
+
+    def save_bill(self, bill_id:int, items, replace:bool=False) -> float:
+        """
+        Write all lines of a bill in one transaction.
+
+        ``items`` is an iterable of ``(product_id, quantity, price)``,
+        optionally followed by the product name and unit to snapshot. With
+        ``replace`` the existing lines are dropped first (editing a bill).
+        Returns the amount added to the bill total; nothing is written if
+        any statement fails.
+        """
+        rows = [_item_params(bill_id, line) for line in items]
+        amount = sum(row[2] * row[3] for row in rows)
+        with self.db.transaction() as cur:
+            day = sales_summary.bill_day(cur, bill_id)
+            if replace:
+                sales_summary.remove_bill_lines(cur, day, bill_id)
+                cur.execute("DELETE FROM bill_items WHERE bill_id=?", (bill_id,))
+                cur.execute("UPDATE bills SET total = 0 WHERE id = ?", (bill_id,))
+            cur.executemany(_INSERT_ITEM, rows)
+            cur.execute(
+                "UPDATE bills SET total = total + ? WHERE id = ?",
+                (amount, bill_id),
+            )
+            sales_summary.add_lines(cur, day, (row[1:5] for row in rows))
+            self._mark(cur, [bill_id])
+        return amount
+
+    def write_bills(self, bills) -> None:
+        """
+        Persist finalized bills in one group-committed transaction.
+
+        Each bill is a dict with ``bill_id``, ``customer_id``, ``date`` and
+        ``lines`` (``(product_id, quantity, price)`` tuples). Bills that do
+        not exist yet are created with the given id; existing ones get their
+        lines replaced, so replaying the same bill twice is harmless. The
+        commit is fsynced (durable transaction): callers drop their journal
+        copy of the bills once this returns.
+        """
+        with self.db.transaction(durable=True) as cur:
+            for bill in bills:
+                cur.execute(
+                    "INSERT OR IGNORE INTO bills(id,customer_id,date) VALUES(?,?,?)",
+                    (bill["bill_id"], bill["customer_id"], bill["date"]),
+                )
+                if cur.rowcount == 1:
+                    sales_summary.add_bills(cur, (bill["date"] or "")[:10], 1)
+                self.save_bill(bill["bill_id"], bill["lines"], replace=True)
+
+    def reserve_bill_ids(self, count:int) -> int:
+        """
+        Claim ``count`` consecutive bill ids by advancing the AUTOINCREMENT
+        counter, so create_bill() can never hand them out. Returns the first.
+        """
+        with self.db.transaction() as cur:
+            cur.execute("SELECT seq FROM sqlite_sequence WHERE name='bills'")
+            row = cur.fetchone()
+            if row is None:
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM bills")
+                seq = cur.fetchone()[0]
+                cur.execute("INSERT INTO sqlite_sequence(name,seq) VALUES('bills',?)", (seq + count,))
+            else:
+                seq = row[0]
+                cur.execute("UPDATE sqlite_sequence SET seq=? WHERE name='bills'", (seq + count,))
+        return seq + 1
+
+    def release_bill_ids(self, next_unused:int, reserved_end:int) -> None:
+        """Give back the unused tail of a reservation if nobody reserved after it."""
+        with self.db.transaction() as cur:
+            cur.execute(
+                "UPDATE sqlite_sequence SET seq=? WHERE name='bills' AND seq=?",
+                (next_unused - 1, reserved_end),
+            )
+
+    def clear_items(self, bill_id:int) -> None:
+        with self.db.transaction() as cur:
+            sales_summary.remove_bill_lines(cur, sales_summary.bill_day(cur, bill_id), bill_id)
+            cur.execute("DELETE FROM bill_items WHERE bill_id = ?", (bill_id,))
+            cur.execute("UPDATE bills SET total = 0 WHERE id = ?", (bill_id,))
+            self._mark(cur, [bill_id])
+
+    def get_bill(self, bill_id:int, include_archives:bool=False) -> Bill|None:
+        """
+        The bill with all its lines, in one query. With ``include_archives``
+        a bill that is no longer live is looked up in the monthly archive
+        whose id range covers it.
+        """
+        cur = self._reader()
+        cur.row_factory = None
+        bill = self._load_bill(cur, "main", bill_id)
+        if bill is None and include_archives:
+            for path in archive.paths_for_bill(cur.connection, self.db.db_path, bill_id):
+                with archive.attached(cur.connection, path) as schema:
+                    bill = self._load_bill(cur, schema, bill_id)
+                if bill is not None:
+                    break
+        return bill
+
+    @staticmethod
+    def _load_bill(cur, schema:str, bill_id:int) -> Bill|None:
+        rows = cur.execute(_GET_BILL.format(schema=schema), (bill_id,)).fetchall()
+        if not rows:
             return None
-        bill = Bill(id=row["id"], customer_id=row["customer_id"], date=row["date"], total=row["total"])
-        cur.execute("SELECT * FROM bill_items WHERE bill_id=?", (bill_id,))
-        for r in cur.fetchall():
-            bill.items.append(BillItem(r["id"], r["bill_id"], r["product_id"], r["quantity"], r["price"]))
+        bill = Bill(*rows[0][:4])
+        if rows[0][4] is not None:
+            bill.items = [BillItem(*row[4:]) for row in rows]
         return bill
 
-    def list_bills(self) -> list[Bill]:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM bills ORDER BY date DESC")
-        bills = []
-        for r in cur.fetchall():
-            b = Bill(r["id"], r["customer_id"], r["date"], r["total"])
-            bills.append(b)
+    def list_bills(self, limit:int|None=None, before:tuple[str, int]|None=None,
+                   include_archives:bool=False) -> list[Bill]:
+        """
+        Bills newest first. ``before`` is the ``(date, id)`` of the last bill
+        of the previous page (keyset pagination), so every page is an index
+        seek no matter how deep it is.
+
+        With ``include_archives`` the page continues into the monthly
+        archives (all older than the live bills), newest first, attaching
+        only as many of them as it takes to fill the page.
+        """
+        cur = self._reader()
+        bills = self._list_bills(cur, "main", limit, before)
+        if include_archives:
+            for path in archive.paths_before(cur.connection, self.db.db_path, before and before[0]):
+                if limit is not None and len(bills) >= limit:
+                    break
+                with archive.attached(cur.connection, path) as schema:
+                    bills += self._list_bills(cur, schema, limit and limit - len(bills), before)
+        return bills
+
+    @staticmethod
+    def _list_bills(cur, schema:str, limit:int|None, before:tuple[str, int]|None) -> list[Bill]:
+        sql = f"SELECT {BILL_COLUMNS} FROM {schema}.bills"
+        params = []
+        if before is not None:
+            sql += " WHERE (date, id) < (?, ?)"
+            params += list(before)
+        sql += " ORDER BY date DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cur.row_factory = _bill_factory
+        cur.execute(sql, params)
+        bills = cur.fetchall()
+        cur.row_factory = None
         return bills
 
+    def latest_bills(self, count:int) -> list[Bill]:
+        return self.list_bills(limit=count)
+
+    def iter_bills(self, page_size:int=500, before:tuple[str, int]|None=None,
+                   include_archives:bool=False):
+        """Yield every bill newest first, holding one page in memory at a time."""
+        while True:
+            page = self.list_bills(limit=page_size, before=before, include_archives=include_archives)
+            yield from page
+            if len(page) < page_size:
+                return
+            before = (page[-1].date, page[-1].id)
+
     def remove_item(self, item_id:int) -> bool:
-        cur = self.conn.cursor()
-        # get item to adjust total
-        cur.execute("SELECT bill_id, quantity, price FROM bill_items WHERE id=?", (item_id,))
-        item = cur.fetchone()
-        if not item:
-            return False
-        cur.execute(
-            "UPDATE bills SET total = total - ? WHERE id = ?",
-            (item["quantity"] * item["price"], item["bill_id"]),
-        )
-        cur.execute("DELETE FROM bill_items WHERE id=?", (item_id,))
-        self.conn.commit()
+        with self.db.transaction() as cur:
+            # get item to adjust total
+            cur.execute("SELECT bill_id, product_id, quantity, price FROM bill_items WHERE id=?", (item_id,))
+            item = cur.fetchone()
+            if not item:
+                return False
+            sales_summary.add_lines(
+                cur, sales_summary.bill_day(cur, item["bill_id"]),
+                [(item["product_id"], item["quantity"], item["price"])], sign=-1,
+            )
+            cur.execute(
+                "UPDATE bills SET total = total - ? WHERE id = ?",
+                (item["quantity"] * item["price"], item["bill_id"]),
+            )
+            cur.execute("DELETE FROM bill_items WHERE id=?", (item_id,))
+            self._mark(cur, [item["bill_id"]])
         return True
 
     def delete_bill(self, bill_id:int) -> bool:
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM bill_items WHERE bill_id=?", (bill_id,))
-        cur.execute("DELETE FROM bills WHERE id=?", (bill_id,))
-        self.conn.commit()
-        return True
\ No newline at end of file
+        with self.db.transaction() as cur:
+            day = sales_summary.bill_day(cur, bill_id)
+            sales_summary.remove_bill_lines(cur, day, bill_id)
+            cur.execute("DELETE FROM bill_items WHERE bill_id=?", (bill_id,))
+            cur.execute("DELETE FROM bills WHERE id=?", (bill_id,))
+            if cur.rowcount:
+                sales_summary.add_bills(cur, day, -1)
+                self._mark(cur, [bill_id], outbox.DELETE)
+        return True
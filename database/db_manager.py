@@ -1,76 +1,128 @@
+import atexit
 import sqlite3
 from sqlite3 import Connection
 import threading
+from contextlib import contextmanager
+
+from utils.constants import SQL_STATS, SQL_STATS_FILE, SQL_SLOW_MS
+from .migrations import migrate
+from .sql_stats import InstrumentedConnection, SQLStats
+
+# Pragma profile applied to every connection. journal_mode and synchronous
+# only matter for the writer; readers additionally run with query_only.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",   # durable across app crashes in WAL mode
+    "cache_size": -16000,      # negative = KiB, i.e. ~16 MB page cache
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,      # ms to wait on a lock before SQLITE_BUSY
+}
+
+_WRITER_ONLY_PRAGMAS = {"journal_mode", "synchronous"}
+
 
 class DBManager:
     _instance = None
     _lock = threading.Lock()
 
-    def __init__(self, db_path: str = "pos.db"):
+    def __init__(self, db_path: str = "pos.db", pragmas: dict | None = None, sql_stats: bool | None = None):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        # per-statement timings (database.sql_stats); off unless asked for
+        self.sql_stats = SQLStats(SQL_SLOW_MS) if (SQL_STATS if sql_stats is None else sql_stats) else None
+        if self.sql_stats is not None:
+            atexit.register(self.sql_stats.log_summary, SQL_STATS_FILE)
+        self._write_lock = threading.RLock()
+        self._tx_depth = 0
+        self._readers: dict[int, Connection] = {}
+        self._readers_lock = threading.Lock()
+        self.conn = self._connect(writer=True)
         self._init_schema()
 
     @classmethod
-    def get_instance(cls, db_path: str = "pos.db"):
+    def get_instance(cls, db_path: str = "pos.db", pragmas: dict | None = None, sql_stats: bool | None = None):
         with cls._lock:
             if cls._instance is None:
-                cls._instance = cls(db_path)
+                cls._instance = cls(db_path, pragmas, sql_stats)
         return cls._instance
 
+    def _connect(self, writer: bool) -> Connection:
+        if self.sql_stats is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=InstrumentedConnection)
+            conn.sql_stats = self.sql_stats
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if value is None or (not writer and name in _WRITER_ONLY_PRAGMAS):
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        if not writer:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
     def _init_schema(self):
-        cursor = self.conn.cursor()
-        # products table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS products (
-            id            INTEGER PRIMARY KEY AUTOINCREMENT,
-            name          TEXT    NOT NULL,
-            price         REAL    NOT NULL,
-            barcode       TEXT    UNIQUE,
-            unit          TEXT,
-            image_path    TEXT,
-            order_index   INTEGER NOT NULL DEFAULT 0
-        )""")
-        # ensure order_index exists
-        try:
-            cursor.execute("ALTER TABLE products ADD COLUMN order_index INTEGER NOT NULL DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass
-        cursor.execute("UPDATE products SET order_index = id WHERE order_index = 0")
-
-        # <<< NEW: category column, default 'manual' >>>
-        try:
-            cursor.execute(
-                "ALTER TABLE products ADD COLUMN category TEXT NOT NULL DEFAULT 'manual'"
-            )
-        except sqlite3.OperationalError:
-            # already added
-            pass
-
-        # bills & items
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS bills (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id TEXT,
-            date        TEXT,
-            total       REAL    DEFAULT 0
-        )""")
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS bill_items (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            bill_id     INTEGER NOT NULL,
-            product_id  INTEGER NOT NULL,
-            quantity    REAL    NOT NULL,
-            price       REAL    NOT NULL,
-            FOREIGN KEY(bill_id) REFERENCES bills(id),
-            FOREIGN KEY(product_id) REFERENCES products(id)
-        )""")
-        self.conn.commit()
+        self.schema_version = migrate(self.conn)
 
     def get_connection(self) -> Connection:
+        """The single writer connection. Write through transaction()."""
         return self.conn
 
+    def get_read_connection(self) -> Connection:
+        """A query-only connection owned by the calling thread."""
+        ident = threading.get_ident()
+        conn = self._readers.get(ident)
+        if conn is None:
+            conn = self._connect(writer=False)
+            with self._readers_lock:
+                self._drop_dead_readers()
+                self._readers[ident] = conn
+        return conn
+
+    def _drop_dead_readers(self):
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._readers if i not in alive]:
+            self._readers.pop(ident).close()
+
+    @contextmanager
+    def transaction(self, durable: bool = False):
+        """
+        Serialize a unit of work on the writer connection.
+
+        Yields a cursor; commits when the outermost block exits and rolls
+        back if it raises. Nested blocks join the enclosing transaction.
+        ``durable`` commits with synchronous=FULL, so the WAL is fsynced and
+        the commit survives a power cut, not just an app crash; for callers
+        that drop their own copy of the data once it is committed.
+        """
+        with self._write_lock:
+            self._tx_depth += 1
+            full = durable and self._tx_depth == 1 and str(self.pragmas.get("synchronous")).upper() != "FULL"
+            try:
+                if full:
+                    self.conn.execute("PRAGMA synchronous = FULL")
+                yield self.conn.cursor()
+                if self._tx_depth == 1:
+                    self.conn.commit()
+            except BaseException:
+                if self._tx_depth == 1:
+                    self.conn.rollback()
+                raise
+            finally:
+                self._tx_depth -= 1
+                if full:
+                    self.conn.execute(f"PRAGMA synchronous = {self.pragmas.get('synchronous') or 'NORMAL'}")
+
+    def checkpoint(self):
+        """Fold the WAL back into the main file (fsynced) before shutdown."""
+        with self._write_lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
     def close(self):
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
         self.conn.close()
-        DBManager._instance = None
\ No newline at end of file
+        DBManager._instance = None
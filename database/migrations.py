@@ -0,0 +1,309 @@
+from sqlite3 import Connection, Cursor
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def _columns(cur: Cursor, table: str) -> set[str]:
+    return {row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _001_base_schema(cur: Cursor) -> None:
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id            INTEGER PRIMARY KEY AUTOINCREMENT,
+        name          TEXT    NOT NULL,
+        price         REAL    NOT NULL,
+        barcode       TEXT    UNIQUE,
+        unit          TEXT,
+        image_path    TEXT,
+        order_index   INTEGER NOT NULL DEFAULT 0,
+        category      TEXT    NOT NULL DEFAULT 'manual'
+    )""")
+    # databases created before order_index/category existed
+    columns = _columns(cur, "products")
+    if "order_index" not in columns:
+        cur.execute("ALTER TABLE products ADD COLUMN order_index INTEGER NOT NULL DEFAULT 0")
+    if "category" not in columns:
+        cur.execute("ALTER TABLE products ADD COLUMN category TEXT NOT NULL DEFAULT 'manual'")
+    cur.execute("UPDATE products SET order_index = id WHERE order_index = 0")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS bills (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id TEXT,
+        date        TEXT,
+        total       REAL    DEFAULT 0
+    )""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS bill_items (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        bill_id     INTEGER NOT NULL,
+        product_id  INTEGER NOT NULL,
+        quantity    REAL    NOT NULL,
+        price       REAL    NOT NULL,
+        FOREIGN KEY(bill_id) REFERENCES bills(id),
+        FOREIGN KEY(product_id) REFERENCES products(id)
+    )""")
+
+
+def _002_hot_path_indexes(cur: Cursor) -> None:
+    # bill lines by bill; covers every column get_bill reads
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_bill_items_bill
+        ON bill_items(bill_id, product_id, quantity, price)""")
+    # newest-first bill listing
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_bills_date
+        ON bills(date, customer_id, total)""")
+    # category grid, already in display order
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_products_category
+        ON products(category, order_index, name)""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)")
+
+
+def _003_bill_keyset_index(cur: Cursor) -> None:
+    # (date, id) is the keyset for newest-first paging; id must sit right
+    # after date so ORDER BY date DESC, id DESC walks the index directly
+    cur.execute("DROP INDEX IF EXISTS idx_bills_date")
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_bills_date_id
+        ON bills(date, id, customer_id, total)""")
+
+
+def _004_bill_item_snapshot(cur: Cursor) -> None:
+    # bill lines keep the product name/unit as sold, so renames and deletes
+    # no longer change or drop old bills
+    columns = _columns(cur, "bill_items")
+    if "product_name" not in columns:
+        cur.execute("ALTER TABLE bill_items ADD COLUMN product_name TEXT")
+    if "unit" not in columns:
+        cur.execute("ALTER TABLE bill_items ADD COLUMN unit TEXT")
+    cur.execute("""
+    UPDATE bill_items SET
+        product_name = (SELECT name FROM products WHERE products.id = bill_items.product_id),
+        unit         = (SELECT unit FROM products WHERE products.id = bill_items.product_id)
+    WHERE product_name IS NULL""")
+    # covering index for the single-query get_bill, in line (id) order
+    cur.execute("DROP INDEX IF EXISTS idx_bill_items_bill")
+    cur.execute("""
+    CREATE INDEX idx_bill_items_bill
+        ON bill_items(bill_id, id, product_id, quantity, price, product_name, unit)""")
+
+
+def _005_daily_summaries(cur: Cursor) -> None:
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS daily_sales (
+        day         TEXT    PRIMARY KEY,
+        revenue     REAL    NOT NULL DEFAULT 0,
+        bill_count  INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""")
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS daily_product_sales (
+        day         TEXT    NOT NULL,
+        product_id  INTEGER NOT NULL,
+        quantity    REAL    NOT NULL DEFAULT 0,
+        revenue     REAL    NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID""")
+    # filled from the existing bills (product_name arrives in version 11)
+    cur.execute("""
+    INSERT INTO daily_sales(day, revenue, bill_count)
+    SELECT substr(b.date, 1, 10) AS day,
+           COALESCE(SUM(i.revenue), 0),
+           COUNT(*)
+    FROM bills b
+    LEFT JOIN (SELECT bill_id, SUM(quantity * price) AS revenue
+               FROM bill_items GROUP BY bill_id) i ON i.bill_id = b.id
+    WHERE b.date IS NOT NULL
+    GROUP BY day""")
+    cur.execute("""
+    INSERT INTO daily_product_sales(day, product_id, quantity, revenue)
+    SELECT substr(b.date, 1, 10) AS day, i.product_id,
+           SUM(i.quantity), SUM(i.quantity * i.price)
+    FROM bill_items i JOIN bills b ON b.id = i.bill_id
+    WHERE b.date IS NOT NULL
+    GROUP BY day, i.product_id""")
+
+
+def _006_bill_archives(cur: Cursor) -> None:
+    # one row per monthly archive file written by database.archive
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS bill_archives (
+        id              INTEGER PRIMARY KEY,
+        month           TEXT    NOT NULL UNIQUE,  -- YYYY-MM
+        path            TEXT    NOT NULL,         -- relative to the live database's folder
+        first_id        INTEGER NOT NULL,
+        last_id         INTEGER NOT NULL,
+        first_date      TEXT    NOT NULL,
+        last_date       TEXT    NOT NULL,
+        bill_count      INTEGER NOT NULL,
+        archived_before TEXT    NOT NULL,         -- latest rollover cutoff into this file
+        archived_at     TEXT    NOT NULL
+    )""")
+    # get_bill(include_archives=True) looks archives up by id range,
+    # history listings by date
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bill_archives_ids ON bill_archives(last_id, first_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bill_archives_date ON bill_archives(first_date)")
+
+
+def _007_product_search(cur: Cursor) -> None:
+    # external-content index over product names (database.product_search)
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name,
+        content = 'products', content_rowid = 'id',
+        prefix = '1 2 3',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""")
+    cur.execute("INSERT INTO products_fts(products_fts) VALUES('rebuild')")
+
+
+def _008_sparse_order_index(cur: Cursor) -> None:
+    # renumber every category 1024, 2048, ... (ProductRepository.ORDER_GAP at
+    # the time) so a moved product fits between its neighbours
+    cur.execute("""
+    UPDATE products SET order_index = r.position * 1024
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY category ORDER BY order_index, name, id) AS position
+        FROM products
+    ) AS r
+    WHERE products.id = r.id""")
+
+
+def _009_backup_history(cur: Cursor) -> None:
+    # one row per run of database.backup, failed ones included
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS backup_history (
+        id          INTEGER PRIMARY KEY,
+        started_at  TEXT    NOT NULL,
+        path        TEXT,                 -- relative to the live database's folder
+        pages       INTEGER NOT NULL DEFAULT 0,
+        size_bytes  INTEGER NOT NULL DEFAULT 0,
+        seconds     REAL    NOT NULL DEFAULT 0,
+        sha256      TEXT,
+        status      TEXT    NOT NULL,     -- 'ok' or 'failed'
+        error       TEXT
+    )""")
+
+
+def _010_sync_outbox(cur: Cursor) -> None:
+    # bills waiting to be sent to the head office (database.outbox)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS outbox (
+        id              INTEGER PRIMARY KEY,
+        bill_id         INTEGER NOT NULL UNIQUE,
+        op              TEXT    NOT NULL,            -- 'upsert' or 'delete'
+        version         INTEGER NOT NULL DEFAULT 1,  -- bumped by every later change
+        created_at      TEXT    NOT NULL,
+        attempts        INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL    NOT NULL DEFAULT 0,  -- unix time; backoff after failures
+        last_error      TEXT
+    )""")
+    # the sync worker takes due entries oldest first
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(next_attempt_at, id)")
+
+
+def _011_daily_product_names(cur: Cursor) -> None:
+    # product reports name products as sold (bill line snapshot), not as
+    # they are named now; days already archived keep falling back to that
+    if "product_name" not in _columns(cur, "daily_product_sales"):
+        cur.execute("ALTER TABLE daily_product_sales ADD COLUMN product_name TEXT")
+    cur.execute("SELECT MAX(archived_before) FROM bill_archives")   # archive.horizon()
+    since = cur.fetchone()[0] or ""
+    # the bare product_name comes from the row with MAX(i.id): the day's last line
+    cur.execute("""
+    CREATE TEMP TABLE day_names (
+        day          TEXT    NOT NULL,
+        product_id   INTEGER NOT NULL,
+        product_name TEXT,
+        PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID""")
+    cur.execute("""
+    INSERT INTO temp.day_names(day, product_id, product_name)
+    SELECT day, product_id, product_name FROM (
+        SELECT substr(b.date, 1, 10) AS day, i.product_id, i.product_name, MAX(i.id)
+        FROM bill_items i JOIN bills b ON b.id = i.bill_id
+        WHERE b.date >= ? AND i.product_name IS NOT NULL
+        GROUP BY day, i.product_id)""", (since,))
+    cur.execute("""
+    UPDATE daily_product_sales SET product_name = (
+        SELECT n.product_name FROM temp.day_names n
+        WHERE n.day = daily_product_sales.day AND n.product_id = daily_product_sales.product_id)
+    WHERE day >= ?""", (since,))
+    cur.execute("DROP TABLE temp.day_names")
+
+
+def _012_product_version(cur: Cursor) -> None:
+    # bumped on every products change by any process (the CLI import, a
+    # second till), so a running till can tell its ProductCatalog is stale
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS change_versions (
+        name     TEXT    PRIMARY KEY,
+        version  INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""")
+    cur.execute("INSERT OR IGNORE INTO change_versions(name, version) VALUES('products', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS products_version_{event.lower()} AFTER {event} ON products
+        BEGIN
+            UPDATE change_versions SET version = version + 1 WHERE name = 'products';
+        END""")
+
+
+
+def _013_product_name_prefix_index(cur: Cursor) -> None:
+    # product search reads names starting with the first typed word as a
+    # range on lower(name) (database.product_search.name_filter)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_name_lower ON products(lower(name))")
+
+
+# Ordered (version, description, step). Append new steps; never edit or
+# reorder shipped ones — PRAGMA user_version records the last one applied.
+MIGRATIONS = [
+    (1, "base schema", _001_base_schema),
+    (2, "hot path indexes", _002_hot_path_indexes),
+    (3, "keyset index for bill listing", _003_bill_keyset_index),
+    (4, "product name/unit snapshot on bill lines", _004_bill_item_snapshot),
+    (5, "daily sales summary tables", _005_daily_summaries),
+    (6, "monthly bill archive index", _006_bill_archives),
+    (7, "product full-text search index", _007_product_search),
+    (8, "sparse product order_index", _008_sparse_order_index),
+    (9, "backup history", _009_backup_history),
+    (10, "bill sync outbox", _010_sync_outbox),
+    (11, "product names in daily product sales", _011_daily_product_names),
+    (12, "products change version", _012_product_version),
+    (13, "lower-case product name index for search", _013_product_name_prefix_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn: Connection) -> int:
+    """
+    Bring the database up to SCHEMA_VERSION.
+
+    Each pending step runs in its own transaction together with the
+    user_version bump, so a failed step leaves the database at the previous
+    version. An up-to-date database costs a single pragma read.
+    """
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current >= SCHEMA_VERSION:
+        return current
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            log.exception(f"Migration {version} ({description}) failed")
+            raise
+        log.info(f"Migrated database to version {version}: {description}")
+        current = version
+    return current
@@ -0,0 +1,27 @@
+"""
+Outbox of bill changes waiting to be synced to the head office.
+
+When sync is configured, BillDAO calls mark() inside its own write
+transactions, so a bill change and its outbox entry commit (or roll back)
+together. There is one entry per bill: changing a bill again before it was sent only bumps the entry's
+version, and the sync worker sends the bill as it is at that moment.
+Acknowledging an entry deletes it only if its version is unchanged, so an
+edit made while a batch was in flight is sent again.
+"""
+from datetime import datetime
+from sqlite3 import Cursor
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+_MARK = """
+    INSERT INTO outbox(bill_id, op, created_at) VALUES(?,?,?)
+    ON CONFLICT(bill_id) DO UPDATE SET
+        op      = excluded.op,
+        version = version + 1"""
+
+
+def mark(cur: Cursor, bill_ids, op: str = UPSERT) -> None:
+    """Queue the given bills for sync (``op`` is UPSERT or DELETE)."""
+    now = datetime.now().isoformat()
+    cur.executemany(_MARK, [(bill_id, op, now) for bill_id in bill_ids if bill_id is not None])
@@ -0,0 +1,111 @@
+import json
+import time
+from datetime import datetime
+
+from . import outbox
+from .bill_dao import BillDAO
+from .db_manager import DBManager
+
+_DUE = """
+    SELECT bill_id, op, version, attempts FROM outbox
+    WHERE next_attempt_at <= ?
+    ORDER BY next_attempt_at, id
+    LIMIT ?"""
+
+# Bills of a batch with their lines, one query for the whole batch.
+_BATCH_BILLS = """
+    SELECT b.id, b.customer_id, b.date, b.total,
+           i.product_id, i.quantity, i.price, i.product_name, i.unit
+    FROM bills b LEFT JOIN bill_items i ON i.bill_id = b.id
+    WHERE b.id IN (SELECT value FROM json_each(?))
+    ORDER BY b.id, i.id"""
+
+
+class OutboxDAO:
+    def __init__(self, db_path: str = "pos.db"):
+        self.db = DBManager.get_instance(db_path)
+        self.bills = BillDAO(db_path)
+
+    def due(self, limit: int, now: float | None = None) -> list[dict]:
+        """
+        Up to ``limit`` entries whose backoff has passed: never-failed ones
+        in queue order, then retries. Each is a dict with ``bill_id``,
+        ``op``, ``version``, ``attempts`` and, for upserts, ``bill`` as it is
+        now (header plus ``items``).
+        """
+        cur = self.db.get_read_connection().cursor()
+        cur.row_factory = None
+        cur.execute(_DUE, (time.time() if now is None else now, limit))
+        entries = [{"bill_id": bill_id, "op": op, "version": version, "attempts": attempts}
+                   for bill_id, op, version, attempts in cur.fetchall()]
+        wanted = [e["bill_id"] for e in entries if e["op"] == outbox.UPSERT]
+        bills = {}
+        if wanted:
+            cur.execute(_BATCH_BILLS, (json.dumps(wanted),))
+            for bill_id, customer_id, date, total, *line in cur.fetchall():
+                bill = bills.get(bill_id)
+                if bill is None:
+                    bill = bills[bill_id] = {"id": bill_id, "customer_id": customer_id, "date": date,
+                                             "total": total, "items": []}
+                if line[0] is not None:
+                    bill["items"].append(dict(zip(("product_id", "quantity", "price", "product_name", "unit"), line)))
+        for entry in entries:
+            if entry["op"] != outbox.UPSERT:
+                continue
+            bill = bills.get(entry["bill_id"]) or self._archived(entry["bill_id"])
+            if bill is None:
+                entry["op"] = outbox.DELETE   # gone before it was ever sent
+            else:
+                entry["bill"] = bill
+        return entries
+
+    def _archived(self, bill_id: int) -> dict | None:
+        """A queued bill that a rollover moved out before it was sent."""
+        bill = self.bills.get_bill(bill_id, include_archives=True)
+        if bill is None:
+            return None
+        return {"id": bill.id, "customer_id": bill.customer_id, "date": bill.date, "total": bill.total,
+                "items": [{"product_id": i.product_id, "quantity": i.quantity, "price": i.price,
+                           "product_name": i.product_name, "unit": i.unit} for i in bill.items]}
+
+    def acknowledge(self, entries) -> int:
+        """
+        Drop sent entries. An entry whose bill changed after due() read it
+        stays queued, so the newer state is sent too. Returns entries dropped.
+        """
+        with self.db.transaction() as cur:
+            cur.executemany(
+                "DELETE FROM outbox WHERE bill_id = ? AND version = ?",
+                [(e["bill_id"], e["version"]) for e in entries],
+            )
+        return cur.rowcount
+
+    def retry_later(self, entries, error: str, delay: float) -> None:
+        """Count a failed attempt and hold the entries back for ``delay`` seconds."""
+        with self.db.transaction() as cur:
+            cur.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                "WHERE bill_id = ?",
+                [(time.time() + delay, error, e["bill_id"]) for e in entries],
+            )
+
+    def backfill(self, since: str | None = None) -> int:
+        """Queue every live bill dated ``since`` (YYYY-MM-DD) or later, e.g. for a first sync."""
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                INSERT INTO outbox(bill_id, op, created_at)
+                SELECT id, ?, ? FROM bills WHERE date >= ?
+                ON CONFLICT(bill_id) DO UPDATE SET op = excluded.op, version = version + 1
+                """,
+                (outbox.UPSERT, datetime.now().isoformat(), since or ""),
+            )
+        return cur.rowcount
+
+    def backlog(self) -> dict:
+        """Entries waiting, how many have failed before, and when the oldest was queued."""
+        cur = self.db.get_read_connection().cursor()
+        cur.row_factory = None
+        cur.execute("SELECT COUNT(*), COUNT(NULLIF(attempts, 0)), MIN(created_at) FROM outbox")
+        pending, failing, oldest = cur.fetchone()
+        return {"pending": pending, "failing": failing, "oldest": oldest}
@@ -1,11 +1,110 @@
-from sqlite3 import Row
+import bisect
+import json
 
 from core.models.product import Product
+from . import product_search
 from .db_manager import DBManager
 
+# Column order matches Product.__init__, so rows map positionally.
+PRODUCT_COLUMNS = "id, name, price, barcode, unit, image_path, order_index, category"
+_SELECT = f"SELECT {PRODUCT_COLUMNS} FROM products"
+
+# Spacing between consecutive order_index values within a category. A moved
+# product takes a value inside the gap between its new neighbours, so a move
+# rewrites one row; a category is renumbered only once a gap runs out.
+ORDER_GAP = 1024
+
+
+def _product_factory(cursor, row) -> Product:
+    return Product(*row)
+
+
+def _next_order_index(cur, category: str) -> int:
+    cur.execute("SELECT MAX(order_index) FROM products WHERE category = ?", (category,))
+    return (cur.fetchone()[0] or 0) + ORDER_GAP
+
+
+def _ids_for_names(cur, keys) -> dict[tuple[str, str], int]:
+    """(name, category) -> id of the oldest barcode-less product with them."""
+    if not keys:
+        return {}
+    cur.execute(
+        """
+        SELECT name, category,
+               (SELECT MIN(p.id) FROM products p
+                WHERE p.name = k.name AND p.category = k.category AND p.barcode IS NULL)
+        FROM (SELECT json_extract(value, '$[0]') AS name, json_extract(value, '$[1]') AS category
+              FROM json_each(?)) k
+        """,
+        (json.dumps(keys),),
+    )
+    return {(name, category): pid for name, category, pid in cur.fetchall() if pid is not None}
+
+
+def _kept_positions(values: list[int]) -> set[int]:
+    """Positions of a longest strictly increasing subsequence of ``values``."""
+    # tails[n]: position of the smallest value ending an increasing run of length n + 1
+    tails, tail_values, previous = [], [], [None] * len(values)
+    for pos, value in enumerate(values):
+        length = bisect.bisect_left(tail_values, value)
+        if length:
+            previous[pos] = tails[length - 1]
+        if length == len(tails):
+            tails.append(pos)
+            tail_values.append(value)
+        else:
+            tails[length] = pos
+            tail_values[length] = value
+    kept, pos = set(), tails[-1] if tails else None
+    while pos is not None:
+        kept.add(pos)
+        pos = previous[pos]
+    return kept
+
+
+def _spread_order(values: list[int]) -> list[int] | None:
+    """
+    New order_index values for products listed in their new order, given
+    their current ones. The longest already-increasing run keeps its values;
+    every other product is spread evenly over the gap between its kept
+    neighbours. None when some gap is too narrow (renumber instead).
+    """
+    kept = _kept_positions(values)
+    result = list(values)
+    pos = 0
+    while pos < len(values):
+        if pos in kept:
+            pos += 1
+            continue
+        start = pos
+        while pos < len(values) and pos not in kept:
+            pos += 1
+        count = pos - start
+        low = result[start - 1] if start else None
+        high = result[pos] if pos < len(values) else None
+        if low is None and high is None:
+            low = 0
+        if low is None:
+            low = high - (count + 1) * ORDER_GAP
+        if high is None:
+            high = low + (count + 1) * ORDER_GAP
+        step = (high - low) // (count + 1)
+        if step < 1:
+            return None
+        for n in range(count):
+            result[start + n] = low + step * (n + 1)
+    return result
+
+
 class ProductRepository:
     def __init__(self, db_path: str = "pos.db"):
-        self.conn = DBManager.get_instance(db_path).get_connection()
+        self.db = DBManager.get_instance(db_path)
+        self.conn = self.db.get_connection()
+
+    def _reader(self):
+        cur = self.db.get_read_connection().cursor()
+        cur.row_factory = _product_factory
+        return cur
 
     def create(
         self,
@@ -16,47 +115,51 @@ class ProductRepository:
         image_path: str,
         category: str = "manual"
     ) -> int:
-        cur = self.conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO products
-              (name, price, barcode, unit, image_path, category)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (name, price, barcode or None, unit, image_path or None, category),
-        )
-        new_id = cur.lastrowid
-        cur.execute("UPDATE products SET order_index = ? WHERE id = ?", (new_id, new_id))
-        self.conn.commit()
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                INSERT INTO products
+                  (name, price, barcode, unit, image_path, category, order_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (name, price, barcode or None, unit, image_path or None, category,
+                 _next_order_index(cur, category)),
+            )
+            new_id = cur.lastrowid
+            product_search.index(cur, [new_id])
         return new_id
 
+    def change_version(self, writer: bool = False) -> int:
+        """
+        Counter bumped by every change to products, from any connection or
+        process; ``writer`` reads it inside the current write transaction.
+        """
+        conn = self.db.get_connection() if writer else self.db.get_read_connection()
+        return conn.execute("SELECT version FROM change_versions WHERE name = 'products'").fetchone()[0]
+
     def get_all(self) -> list[Product]:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM products ORDER BY order_index, name")
-        rows = cur.fetchall()
-        return [self._row_to_obj(r) for r in rows]
+        cur = self._reader()
+        cur.execute(f"{_SELECT} ORDER BY order_index, name")
+        return cur.fetchall()
 
     def get_by_category(self, category: str) -> list[Product]:
-        cur = self.conn.cursor()
+        cur = self._reader()
         cur.execute(
-            "SELECT * FROM products WHERE category = ? ORDER BY order_index, name",
+            f"{_SELECT} WHERE category = ? ORDER BY order_index, name",
             (category,),
         )
-        rows = cur.fetchall()
-        return [self._row_to_obj(r) for r in rows]
+        return cur.fetchall()
 
     def get_by_barcode(self, barcode: str) -> Product | None:
         """Get product by barcode for scanning functionality"""
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM products WHERE barcode = ?", (barcode,))
-        row = cur.fetchone()
-        return self._row_to_obj(row) if row else None
+        cur = self._reader()
+        cur.execute(f"{_SELECT} WHERE barcode = ?", (barcode,))
+        return cur.fetchone()
 
     def get_by_id(self, id: int) -> Product | None:
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM products WHERE id = ?", (id,))
-        row = cur.fetchone()
-        return self._row_to_obj(row) if row else None
+        cur = self._reader()
+        cur.execute(f"{_SELECT} WHERE id = ?", (id,))
+        return cur.fetchone()
 
     def update(self, id: int, **fields) -> bool:
         allowed = {"name", "price", "barcode", "unit", "image_path", "order_index", "category"}
@@ -64,48 +167,186 @@ class ProductRepository:
         params = [fields[k] for k in fields if k in allowed] + [id]
         if not setters:
             return False
-        self.conn.cursor().execute(f"UPDATE products SET {setters} WHERE id = ?", params)
-        self.conn.commit()
+        reindex = bool(fields.keys() & {"name", "barcode"})
+        with self.db.transaction() as cur:
+            if reindex:
+                product_search.unindex(cur, [id])
+            cur.execute(f"UPDATE products SET {setters} WHERE id = ?", params)
+            if reindex:
+                product_search.index(cur, [id])
         return True
 
     def delete(self, id: int) -> bool:
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM products WHERE id = ?", (id,))
-        self.conn.commit()
+        with self.db.transaction() as cur:
+            product_search.unindex(cur, [id])
+            cur.execute("DELETE FROM products WHERE id = ?", (id,))
         return cur.rowcount > 0
 
     def swap_order(self, id1: int, id2: int) -> None:
-        cur = self.conn.cursor()
-        cur.execute("SELECT order_index FROM products WHERE id = ?", (id1,))
-        o1 = cur.fetchone()["order_index"]
-        cur.execute("SELECT order_index FROM products WHERE id = ?", (id2,))
-        o2 = cur.fetchone()["order_index"]
-        cur.execute("UPDATE products SET order_index = ? WHERE id = ?", (o2, id1))
-        cur.execute("UPDATE products SET order_index = ? WHERE id = ?", (o1, id2))
-        self.conn.commit()
-
-    def _row_to_obj(self, row: Row) -> Product:
-        return Product(
-            id = row["id"],
-            name = row["name"],
-            price = row["price"],
-            barcode = row["barcode"],
-            unit = row["unit"],
-            image_path = row["image_path"],
-            order_index = row["order_index"],
-            category = row["category"],
-        )
+        with self.db.transaction() as cur:
+            cur.execute("SELECT order_index FROM products WHERE id = ?", (id1,))
+            o1 = cur.fetchone()["order_index"]
+            cur.execute("SELECT order_index FROM products WHERE id = ?", (id2,))
+            o2 = cur.fetchone()["order_index"]
+            cur.execute("UPDATE products SET order_index = ? WHERE id = ?", (o2, id1))
+            cur.execute("UPDATE products SET order_index = ? WHERE id = ?", (o1, id2))
+
+    def apply_order(self, category: str, ordered_ids) -> dict[int, int]:
+        """
+        Give ``category`` the order of ``ordered_ids`` in one transaction.
+
+        Products of the category missing from ``ordered_ids`` follow in
+        their current order; ids from other categories are ignored. Only
+        rows whose order_index changes are written. Returns
+        {product id: new order_index}.
+        """
+        with self.db.transaction() as cur:
+            cur.execute(
+                "SELECT id, order_index FROM products WHERE category = ? ORDER BY order_index, name",
+                (category,),
+            )
+            current = {row[0]: row[1] for row in cur.fetchall()}
+            order = [pid for pid in dict.fromkeys(ordered_ids) if pid in current]
+            listed = set(order)
+            order += [pid for pid in current if pid not in listed]
+            indexes = _spread_order([current[pid] for pid in order])
+            if indexes is None:
+                indexes = [(n + 1) * ORDER_GAP for n in range(len(order))]
+            changes = {pid: index for pid, index in zip(order, indexes) if current[pid] != index}
+            cur.executemany(
+                "UPDATE products SET order_index = ? WHERE id = ?",
+                [(index, pid) for pid, index in changes.items()],
+            )
+        return changes
+
+    def upsert_many(self, rows) -> int:
+        """
+        Insert or update products in one transaction.
+
+        ``rows`` are ``(name, price, barcode, unit, image_path, category)``.
+        Rows whose barcode already exists update that product in place and
+        keep its position; so do rows without a barcode matching a
+        barcode-less product of the same name and category. New rows are
+        appended to the end of their category. Returns the number of rows
+        written.
+        """
+        rows = list(rows)
+        with self.db.transaction() as cur:
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM products")
+            last_id = cur.fetchone()[0]
+            existing = product_search.ids_for_barcodes(cur, (row[2] for row in rows if row[2]))
+            unbarcoded = _ids_for_names(cur, [(row[0], row[5]) for row in rows if not row[2]])
+            existing += list(unbarcoded.values())
+            product_search.unindex(cur, existing)
+            updates = []
+            next_index = {}
+            params = []
+            for name, price, barcode, unit, image_path, category in rows:
+                if not barcode and (name, category) in unbarcoded:
+                    updates.append((price, unit, image_path or None, unbarcoded[name, category]))
+                    continue
+                if category not in next_index:
+                    next_index[category] = _next_order_index(cur, category)
+                params.append((name, price, barcode or None, unit, image_path or None, category,
+                               next_index[category]))
+                next_index[category] += ORDER_GAP
+            cur.executemany(
+                """
+                INSERT INTO products
+                  (name, price, barcode, unit, image_path, category, order_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(barcode) DO UPDATE SET
+                  name = excluded.name,
+                  price = excluded.price,
+                  unit = excluded.unit,
+                  image_path = COALESCE(excluded.image_path, image_path),
+                  category = excluded.category
+                """,
+                params,
+            )
+            cur.executemany(
+                "UPDATE products SET price = ?, unit = ?, image_path = COALESCE(?, image_path) WHERE id = ?",
+                updates,
+            )
+            cur.execute("SELECT id FROM products WHERE id > ?", (last_id,))
+            product_search.index(cur, existing + [row[0] for row in cur.fetchall()])
+        return len(params) + len(updates)
+
+    def iter_all(self, chunk_size: int = 1000):
+        """Yield every product in id order, ``chunk_size`` rows in memory at a time."""
+        cur = self._reader()
+        cur.execute(f"{_SELECT} ORDER BY id")
+        while True:
+            chunk = cur.fetchmany(chunk_size)
+            if not chunk:
+                return
+            yield from chunk
+
+    def search_ids(self, query: str, category: str | None = None,
+                   limit: int = product_search.CANDIDATES) -> list[int]:
+        """
+        Ids of products whose barcode starts with the typed text (exact
+        barcode first), then of those whose name starts with the first typed
+        word, then of the other ones whose name words start with every typed
+        word (product_search.name_filter()).
+        """
+        cur = self.db.get_read_connection().cursor()
+        where, params = "", []
+        if category is not None:
+            # unary + keeps the planner off idx_products_category: the barcode
+            # range, the name range or the FTS match is the selective part
+            where, params = " AND +p.category = ?", [category]
+        ids = []
+        prefix = product_search.barcode_prefix(query)
+        if prefix is not None:
+            cur.execute(
+                f"SELECT p.id FROM products p WHERE p.barcode >= ? AND p.barcode < ?{where} "
+                "ORDER BY p.barcode LIMIT ?",
+                (*product_search.barcode_range(prefix), *params, limit),
+            )
+            ids = [row[0] for row in cur.fetchall()]
+        names = product_search.name_filter(query)
+        if names is not None and len(ids) < limit:
+            # names starting with the first word, in index order: a bounded range read
+            clause, name_params = names
+            cur.execute(
+                f"SELECT p.id FROM products p WHERE {clause}{where} ORDER BY lower(p.name) LIMIT ?",
+                (*name_params, *params, limit),
+            )
+            seen = set(ids)
+            ids += [row[0] for row in cur.fetchall() if row[0] not in seen][:limit - len(ids)]
+        match = product_search.match_query(query)
+        if match is not None and len(ids) < limit:
+            # the rest of the window from mid-name matches; CROSS JOIN keeps the FTS
+            # index first and the category filter is a rowid lookup
+            cur.execute(
+                "SELECT p.id FROM products_fts CROSS JOIN products p ON p.id = products_fts.rowid "
+                f"WHERE products_fts MATCH ?{where} "
+                "AND p.id NOT IN (SELECT value FROM json_each(?)) LIMIT ?",
+                (match, *params, json.dumps(ids), limit - len(ids)),
+            )
+            ids += [row[0] for row in cur.fetchall()]
+        return ids
+
+    def search(self, query: str, category: str | None = None, limit: int = 50) -> list[Product]:
+        """Ranked prefix search on product names and barcodes."""
+        ids = self.search_ids(query, category)
+        if not ids:
+            return []
+        cur = self._reader()
+        cur.execute(f"{_SELECT} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+        return product_search.rank(cur.fetchall(), query)[:limit]
 
     def get_by_name(self, name) -> Product | None:
         """Get product by name, useful for editing"""
-        cur = self.conn.cursor()
-        cur.execute("SELECT * FROM products WHERE name = ?", (name,))
-        row = cur.fetchone()
-        return self._row_to_obj(row) if row else None
+        cur = self._reader()
+        cur.execute(f"{_SELECT} WHERE name = ?", (name,))
+        return cur.fetchone()
 
     def delete_by_name(self, name ) -> bool:
         """Delete product by name, useful for editing"""
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM products WHERE name = ?", (name,))
-        self.conn.commit()
-        return cur.rowcount > 0
\ No newline at end of file
+        with self.db.transaction() as cur:
+            cur.execute("SELECT id FROM products WHERE name = ?", (name,))
+            product_search.unindex(cur, [row[0] for row in cur.fetchall()])
+            cur.execute("DELETE FROM products WHERE name = ?", (name,))
+        return cur.rowcount > 0
@@ -0,0 +1,139 @@
+"""
+Product search: an FTS5 index over product names plus prefix ranges on the
+barcode index.
+
+products_fts is an external-content index on products (rowid = id), so it
+stores only the token lists. Barcodes stay out of it: every barcode is a
+distinct term, so a barcode prefix longer than the FTS prefix indexes
+would expand to thousands of terms, while a range on the UNIQUE barcode
+index is a single seek. ProductRepository keeps it in sync inside its
+own write transactions: a product is unindexed *before* its row changes
+(FTS5 reads the old values to find the tokens to drop) and indexed again
+afterwards.
+
+Name candidates come in two tiers, each a bounded read. Names starting
+with the first typed word are a range on the lower(name) index
+(name_filter()), taken in index order; only when that leaves room does
+the FTS match fill the remaining slots with mid-name hits. Neither tier
+sorts its whole match set, so a common prefix on a large catalog costs a
+LIMIT-sized read; rank() orders the window in Python. bm25 is not used:
+it needs corpus-wide statistics for every term a prefix expands to,
+which costs tens of milliseconds per keystroke on a large catalog.
+"""
+import json
+import re
+from sqlite3 import Cursor
+
+# matches looked at per search; narrower queries are ranked exhaustively
+CANDIDATES = 100
+
+_TOKEN = re.compile(r"\w+")
+
+
+def create(cur: Cursor) -> None:
+    """Create the index and build it from products (migration)."""
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name,
+        content = 'products', content_rowid = 'id',
+        prefix = '1 2 3',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""")
+    cur.execute("INSERT INTO products_fts(products_fts) VALUES('rebuild')")
+
+
+def index(cur: Cursor, ids) -> None:
+    """Add the current rows of the given products to the index."""
+    cur.executemany(
+        "INSERT INTO products_fts(rowid, name) SELECT id, name FROM products WHERE id = ?",
+        [(i,) for i in ids],
+    )
+
+
+def unindex(cur: Cursor, ids) -> None:
+    """Drop the given products from the index; call before changing their rows."""
+    cur.executemany(
+        "INSERT INTO products_fts(products_fts, rowid, name) "
+        "SELECT 'delete', id, name FROM products WHERE id = ?",
+        [(i,) for i in ids],
+    )
+
+
+def ids_for_barcodes(cur: Cursor, barcodes) -> list[int]:
+    cur.execute(
+        "SELECT id FROM products WHERE barcode IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(barcodes)),),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def match_query(text: str) -> str | None:
+    """
+    Turn what the user typed into an FTS5 query: every word must match as
+    a prefix of a name word, so "tom 1k" finds "Tomato 1kg" while it is
+    being typed. None when there is nothing to search for.
+    """
+    words = tokens(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def barcode_prefix(text: str) -> str | None:
+    """What to range-match against barcodes: a single typed word."""
+    text = text.strip()
+    return text if text and not any(c.isspace() for c in text) else None
+
+
+def barcode_range(prefix: str) -> tuple[str, str]:
+    """Bounds for ``barcode >= ? AND barcode < ?`` (U+10FFFF sorts after any text)."""
+    return prefix, prefix + "\U0010ffff"
+
+
+def _like(word: str) -> str:
+    return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def name_filter(text: str, table: str = "p") -> tuple[str, list] | None:
+    """
+    ``WHERE`` condition and parameters for names starting with the first
+    typed word that also contain a word starting with each of the others:
+    a range on idx_products_name_lower plus a LIKE per extra word. None
+    when there is nothing to search for.
+    """
+    words = tokens(text)
+    if not words:
+        return None
+    name = f"lower({table}.name)"
+    clause = f"{name} >= ? AND {name} < ?" + "".join(
+        f" AND ' ' || {name} LIKE ? ESCAPE '\\'" for _ in words[1:])
+    return clause, [words[0], words[0] + "\U0010ffff"] + [f"% {_like(word)}%" for word in words[1:]]
+
+
+def rank(products, text: str) -> list:
+    """
+    Best match first: exact barcode, barcode prefix, then names starting
+    with the first word, then more whole-word hits, then shorter names,
+    then grid order.
+    """
+    words = tokens(text)
+    if not words:
+        return list(products)
+    query = text.strip()
+
+    def key(product):
+        name_words = (product.name or "").lower().split()
+        return (
+            product.barcode != query,
+            not (product.barcode or "").startswith(query),
+            not (name_words and name_words[0].startswith(words[0])),
+            -sum(word in name_words for word in words),
+            len(product.name or ""),
+            product.order_index,
+        )
+
+    return sorted(products, key=key)
@@ -0,0 +1,193 @@
+"""
+Query-plan regression check for the data layer.
+
+Runs every public ProductRepository, BillDAO, ReportDAO, BillArchive and OutboxDAO method
+against a scratch database, captures the SQL each one issues and runs EXPLAIN QUERY PLAN on
+it. Any statement that falls back to a plain full-table scan is reported.
+
+    python -m database.query_plan        # exit status 1 on regressions
+"""
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from . import archive
+from .archive import BillArchive
+from .bill_dao import BillDAO
+from .db_manager import DBManager
+from .outbox_dao import OutboxDAO
+from .product_repository import ProductRepository
+from .report_dao import ReportDAO
+
+# Methods whose job is to read a whole table.
+ALLOWED_FULL_SCANS = {
+    "ProductRepository.get_all",
+    "ProductRepository.iter_all",
+    # sqlite_sequence holds one row per AUTOINCREMENT table
+    "BillDAO.reserve_bill_ids",
+    "BillDAO.release_bill_ids",
+    "ReportDAO.rebuild",
+    # offline job; aggregates over the month's archive file
+    "BillArchive.rollover",
+    # the outbox holds only bills not yet synced
+    "OutboxDAO.backlog",
+}
+
+_DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+# "SCAN bills" / "SCAN b" without "USING ... INDEX" is a table scan
+_TABLE_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _exercises(products: ProductRepository, bills: BillDAO, reports: ReportDAO, archives: BillArchive,
+               outbox: OutboxDAO):
+    """One call per public data-layer method, labelled Class.method."""
+    def product_calls():
+        pid = products.create("probe", 1.0, "000probe", "pcs", None, "manual")
+        other = products.create("probe 2", 2.0, "000probe2", "kg", None, "manual")
+        yield "create", lambda: products.create("probe 3", 1.0, "000probe3", "pcs", None)
+        yield "get_all", products.get_all
+        yield "get_by_category", lambda: products.get_by_category("manual")
+        yield "get_by_barcode", lambda: products.get_by_barcode("000probe")
+        yield "get_by_id", lambda: products.get_by_id(pid)
+        yield "get_by_name", lambda: products.get_by_name("probe")
+        yield "update", lambda: products.update(pid, price=3.0)
+        yield "swap_order", lambda: products.swap_order(pid, other)
+        yield "apply_order", lambda: products.apply_order("manual", [other, pid])
+        yield "delete", lambda: products.delete(other)
+        yield "delete_by_name", lambda: products.delete_by_name("probe 3")
+        yield "upsert_many", lambda: products.upsert_many(
+            [("probe", 4.0, "000probe", "pcs", None, "manual"), ("probe 4", 1.0, None, "kg", None, "fruits_veg")])
+        yield "iter_all", lambda: list(products.iter_all(chunk_size=2))
+        yield "search_ids", lambda: products.search_ids("prob", category="manual")
+        yield "search", lambda: products.search("prob 000", limit=5)
+        yield "change_version", products.change_version
+
+    def bill_calls():
+        bill_id = bills.create_bill("C1")
+        item_id = bills.add_item(bill_id, 1, 1.0, 1.0)
+        yield "create_bill", lambda: bills.create_bill("C2")
+        yield "add_item", lambda: bills.add_item(bill_id, 1, 2.0, 3.0, "probe", "kg")
+        yield "save_bill", lambda: bills.save_bill(bill_id, [(1, 1.0, 2.0)], replace=True)
+        yield "write_bills", lambda: bills.write_bills(
+            [{"bill_id": bill_id + 100, "customer_id": "C3", "date": "2024-01-01", "lines": [(1, 1.0, 1.0)]}])
+        yield "reserve_bill_ids", lambda: bills.reserve_bill_ids(10)
+        yield "release_bill_ids", lambda: bills.release_bill_ids(bill_id + 101, bill_id + 110)
+        yield "get_bill", lambda: bills.get_bill(bill_id)
+        yield "list_bills", lambda: bills.list_bills(limit=20, before=("2100-01-01", 10**9))
+        yield "latest_bills", lambda: bills.latest_bills(3)
+        yield "iter_bills", lambda: list(bills.iter_bills(page_size=1))
+        yield "remove_item", lambda: bills.remove_item(item_id)
+        yield "clear_items", lambda: bills.clear_items(bill_id)
+        yield "delete_bill", lambda: bills.delete_bill(bill_id)
+
+    def report_calls():
+        yield "daily_sales", lambda: reports.daily_sales("2024-01-01", "2024-01-31")
+        yield "product_sales", lambda: reports.product_sales("2024-01-01", "2024-01-31", 10)
+        yield "rebuild", reports.rebuild
+
+    def archive_calls():
+        old = bills.create_bill("C1", "2020-01-15T10:00:00")
+        bills.save_bill(old, [(1, 1.0, 1.0)])
+        yield "rollover", lambda: archives.rollover("2021-01-01")
+        yield "archives", archives.archives
+        # read-through paths, labelled with the BillDAO method they extend
+        yield "BillDAO.get_bill[archives]", lambda: bills.get_bill(old, include_archives=True)
+        yield "BillDAO.list_bills[archives]", lambda: bills.list_bills(
+            limit=20, before=("2100-01-01", 10**9), include_archives=True)
+
+    def outbox_calls():
+        entries = outbox.due(50)
+        yield "due", lambda: outbox.due(50)
+        yield "acknowledge", lambda: outbox.acknowledge(entries[:1])
+        yield "retry_later", lambda: outbox.retry_later(entries[1:2], "probe", 0.0)
+        yield "backfill", lambda: outbox.backfill("2024-01-01")
+        yield "backlog", outbox.backlog
+
+    for name, call in product_calls():
+        yield f"ProductRepository.{name}", call
+    for name, call in bill_calls():
+        yield f"BillDAO.{name}", call
+    for name, call in report_calls():
+        yield f"ReportDAO.{name}", call
+    for name, call in archive_calls():
+        yield name if "." in name else f"BillArchive.{name}", call
+    for name, call in outbox_calls():
+        yield f"OutboxDAO.{name}", call
+
+
+def _public_methods(cls) -> set[str]:
+    return {f"{cls.__name__}.{n}" for n in vars(cls) if not n.startswith("_") and callable(getattr(cls, n))}
+
+
+def capture_statements(db: DBManager) -> dict[str, list[str]]:
+    """Map "Class.method" to the DML statements it sent to SQLite."""
+    products, bills, reports = ProductRepository(db.db_path), BillDAO(db.db_path, sync=True), ReportDAO(db.db_path)
+    archives, outbox = BillArchive(db.db_path), OutboxDAO(db.db_path)
+    captured: list[str] = []
+    trace = lambda sql: captured.append(sql) if _DML.match(sql) else None
+    db.get_connection().set_trace_callback(trace)
+    db.get_read_connection().set_trace_callback(trace)
+
+    by_method = {}
+    for label, call in _exercises(products, bills, reports, archives, outbox):
+        captured.clear()
+        call()
+        by_method[label] = list(captured)
+
+    db.get_connection().set_trace_callback(None)
+    db.get_read_connection().set_trace_callback(None)
+
+    classes = (ProductRepository, BillDAO, ReportDAO, BillArchive, OutboxDAO)
+    missing = set().union(*map(_public_methods, classes)) - by_method.keys()
+    if missing:
+        raise RuntimeError(f"query_plan does not exercise: {', '.join(sorted(missing))}")
+    return by_method
+
+
+def full_scans(conn, sql: str) -> list[str]:
+    """EXPLAIN QUERY PLAN rows that are plain table scans."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return [row[3] for row in rows if _TABLE_SCAN.match(row[3])]
+
+
+def check(db: DBManager) -> list[tuple[str, str, list[str]]]:
+    """Return (method, sql, scans) for every statement that full-scans."""
+    failures = []
+    conn = db.get_connection()
+    captured = capture_statements(db)
+    # an empty archive, so statements against the attached schema can be explained
+    scratch = os.path.join(os.path.dirname(os.path.abspath(db.db_path)), "explain-archive.db")
+    with archive.attached(conn, scratch):
+        archive.ensure_schema(conn.cursor())
+        for label, statements in captured.items():
+            if label in ALLOWED_FULL_SCANS:
+                continue
+            for sql in dict.fromkeys(statements):
+                scans = full_scans(conn, sql)
+                if scans:
+                    failures.append((label, " ".join(sql.split()), scans))
+    return failures
+
+
+def main() -> int:
+    if DBManager._instance is not None:
+        DBManager._instance.close()
+    workdir = tempfile.mkdtemp(prefix="kpa-plan-")
+    db = DBManager.get_instance(os.path.join(workdir, "plan.db"))
+    try:
+        failures = check(db)
+    finally:
+        db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for label, sql, scans in failures:
+        print(f"FULL SCAN in {label}: {sql}\n    plan: {'; '.join(scans)}")
+    if not failures:
+        print("query plans OK: no unindexed full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+from . import archive, sales_summary
+from .db_manager import DBManager
+
+
+class ReportDAO:
+    """Reads over the daily summary tables maintained by BillDAO."""
+
+    def __init__(self, db_path: str = "pos.db"):
+        self.db = DBManager.get_instance(db_path)
+
+    def _reader(self):
+        return self.db.get_read_connection().cursor()
+
+    def rebuild(self, since: str | None = None) -> None:
+        """
+        Recompute the summaries from raw bills, e.g. after manual fixes.
+        Days already moved to the bill archives keep their summaries.
+        """
+        with self.db.transaction() as cur:
+            sales_summary.rebuild(cur, max(since or "", archive.horizon(cur) or ""))
+
+    def daily_sales(self, start: str, end: str) -> list[tuple[str, float, int]]:
+        """(day, revenue, bill_count) for each day in [start, end]."""
+        cur = self._reader()
+        cur.row_factory = None
+        cur.execute(
+            "SELECT day, revenue, bill_count FROM daily_sales WHERE day BETWEEN ? AND ? ORDER BY day",
+            (start, end),
+        )
+        return cur.fetchall()
+
+    def product_sales(self, start: str, end: str, limit: int | None = None) -> list[tuple[int, str, float, float]]:
+        """
+        (product_id, name, quantity, revenue) over [start, end], best sellers
+        first. The name is the one the product was last sold under in the
+        range, or its current name for days summarised before names were kept.
+        """
+        # the bare name comes from the row with MAX(s.day)
+        sql = """
+            SELECT product_id, name, quantity, revenue FROM (
+                SELECT s.product_id, COALESCE(s.product_name, p.name, '#' || s.product_id) AS name,
+                       SUM(s.quantity) AS quantity, SUM(s.revenue) AS revenue, MAX(s.day)
+                FROM daily_product_sales s LEFT JOIN products p ON p.id = s.product_id
+                WHERE s.day BETWEEN ? AND ?
+                GROUP BY s.product_id)
+            ORDER BY revenue DESC"""
+        params = [start, end]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cur = self._reader()
+        cur.row_factory = None
+        cur.execute(sql, params)
+        return cur.fetchall()
@@ -0,0 +1,126 @@
+"""
+Incremental maintenance of the daily summary tables.
+
+BillDAO calls these inside its own write transactions, so the summaries
+always move together with bills and bill_items. Days are the YYYY-MM-DD
+prefix of bills.date. daily_product_sales also keeps the name the product
+was last sold under that day (the bill line snapshot), so reports show
+renamed and deleted products as they were sold.
+"""
+from sqlite3 import Cursor
+
+_UPSERT_DAY = """
+    INSERT INTO daily_sales(day, revenue, bill_count) VALUES(?,?,?)
+    ON CONFLICT(day) DO UPDATE SET
+        revenue    = revenue + excluded.revenue,
+        bill_count = bill_count + excluded.bill_count"""
+
+# an unknown name is looked up like _INSERT_ITEM in bill_dao does for the line
+_UPSERT_PRODUCT_DAY = """
+    INSERT INTO daily_product_sales(day, product_id, quantity, revenue, product_name)
+    VALUES(?,?,?,?, COALESCE(?, (SELECT name FROM products WHERE id=?)))
+    ON CONFLICT(day, product_id) DO UPDATE SET
+        quantity     = quantity + excluded.quantity,
+        revenue      = revenue + excluded.revenue,
+        product_name = COALESCE(excluded.product_name, product_name)"""
+
+
+def bill_day(cur: Cursor, bill_id: int) -> str | None:
+    cur.execute("SELECT substr(date, 1, 10) FROM bills WHERE id=?", (bill_id,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def add_bills(cur: Cursor, day: str | None, count: int) -> None:
+    if day:
+        cur.execute(_UPSERT_DAY, (day, 0.0, count))
+
+
+def add_lines(cur: Cursor, day: str | None, lines, sign: int = 1) -> None:
+    """Add (or with sign=-1 subtract) (product_id, quantity, price[, product_name]) lines."""
+    if not day:
+        return
+    per_product: dict[int, list] = {}
+    for product_id, quantity, price, *name in lines:
+        totals = per_product.setdefault(product_id, [0.0, 0.0, None])
+        totals[0] += quantity
+        totals[1] += quantity * price
+        totals[2] = (name and name[0]) or totals[2]
+    if not per_product:
+        return
+    # taking lines back never renames what is left of the day
+    cur.executemany(
+        _UPSERT_PRODUCT_DAY,
+        [(day, pid, sign * qty, sign * revenue, name, pid if sign > 0 else None)
+         for pid, (qty, revenue, name) in per_product.items()],
+    )
+    if sign < 0:
+        # products whose sales for the day were fully taken back
+        cur.executemany(
+            "DELETE FROM daily_product_sales WHERE day=? AND product_id=? "
+            "AND abs(quantity) < 1e-9 AND abs(revenue) < 1e-9",
+            [(day, pid) for pid in per_product],
+        )
+    revenue = sum(r for _, r, _ in per_product.values())
+    cur.execute(_UPSERT_DAY, (day, sign * revenue, 0))
+
+
+def remove_bill_lines(cur: Cursor, day: str | None, bill_id: int) -> None:
+    """Subtract every current line of a bill; call before deleting them."""
+    if not day:
+        return
+    cur.execute("SELECT product_id, quantity, price FROM bill_items WHERE bill_id=?", (bill_id,))
+    add_lines(cur, day, cur.fetchall(), sign=-1)
+
+
+def fill_names(cur: Cursor, since: str | None = None) -> None:
+    """Set each product-day's name to the last bill line snapshot of that day (from ``since`` on)."""
+    since = since or ""
+    cur.execute("""
+    CREATE TEMP TABLE day_names (
+        day          TEXT    NOT NULL,
+        product_id   INTEGER NOT NULL,
+        product_name TEXT,
+        PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID""")
+    try:
+        # the bare product_name comes from the row with MAX(i.id): the day's last line
+        cur.execute("""
+        INSERT INTO temp.day_names(day, product_id, product_name)
+        SELECT day, product_id, product_name FROM (
+            SELECT substr(b.date, 1, 10) AS day, i.product_id, i.product_name, MAX(i.id)
+            FROM bill_items i JOIN bills b ON b.id = i.bill_id
+            WHERE b.date >= ? AND i.product_name IS NOT NULL
+            GROUP BY day, i.product_id)""", (since,))
+        cur.execute("""
+        UPDATE daily_product_sales SET product_name = (
+            SELECT n.product_name FROM temp.day_names n
+            WHERE n.day = daily_product_sales.day AND n.product_id = daily_product_sales.product_id)
+        WHERE day >= ?""", (since,))
+    finally:
+        cur.execute("DROP TABLE temp.day_names")
+
+
+def rebuild(cur: Cursor, since: str | None = None) -> None:
+    """Recompute the summaries from bills/bill_items (from ``since`` on)."""
+    since = since or ""
+    cur.execute("DELETE FROM daily_sales WHERE day >= ?", (since,))
+    cur.execute("DELETE FROM daily_product_sales WHERE day >= ?", (since,))
+    cur.execute("""
+    INSERT INTO daily_sales(day, revenue, bill_count)
+    SELECT substr(b.date, 1, 10) AS day,
+           COALESCE(SUM(i.revenue), 0),
+           COUNT(*)
+    FROM bills b
+    LEFT JOIN (SELECT bill_id, SUM(quantity * price) AS revenue
+               FROM bill_items GROUP BY bill_id) i ON i.bill_id = b.id
+    WHERE b.date >= ? AND b.date IS NOT NULL
+    GROUP BY day""", (since,))
+    cur.execute("""
+    INSERT INTO daily_product_sales(day, product_id, quantity, revenue)
+    SELECT substr(b.date, 1, 10) AS day, i.product_id,
+           SUM(i.quantity), SUM(i.quantity * i.price)
+    FROM bill_items i JOIN bills b ON b.id = i.bill_id
+    WHERE b.date >= ? AND b.date IS NOT NULL
+    GROUP BY day, i.product_id""", (since,))
+    fill_names(cur, since)
@@ -0,0 +1,255 @@
+"""
+Optional per-statement timing for DBManager connections.
+
+When enabled (KPA_SQL_STATS=1, or ``DBManager(sql_stats=True)``) every
+connection is opened with InstrumentedConnection, whose cursors time each
+statement from execute() until its rows have been fetched, plus every
+COMMIT. Timings are grouped by normalized SQL text and by the function
+that ran it (e.g. ``BillDAO.save_bill``), with a count, total, max and a
+latency histogram. Statements slower than KPA_SQL_SLOW_MS are logged as
+they happen; the summary is logged at exit and can be taken at any time
+with ``DBManager.get_instance().sql_stats.report()``.
+
+When disabled, connections are plain sqlite3.Connection objects, so the
+instrumentation costs nothing.
+"""
+import json
+import re
+import sqlite3
+import sys
+import threading
+from functools import lru_cache
+from time import perf_counter_ns
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Histogram bucket upper bounds in microseconds; the last bucket is open.
+BUCKETS_US = (50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 100_000, 1_000_000)
+
+_COMMENT = re.compile(r"--[^\n]*")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize(sql: str) -> str:
+    """One line, comments dropped, literals replaced by ?, ``IN (?, ?, ...)`` folded."""
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (?...)", sql)
+
+
+class _Timing:
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(BUCKETS_US) + 1)
+
+    def add(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        us = ns // 1000
+        for i, bound in enumerate(BUCKETS_US):
+            if us < bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile_us(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th sample (max for the open bucket)."""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return BUCKETS_US[i] if i < len(BUCKETS_US) else self.max_ns / 1000
+        return self.max_ns / 1000
+
+
+class SQLStats:
+    """Statement timings of one DBManager, shared by all its connections."""
+
+    def __init__(self, slow_ms: float = 50.0):
+        self.slow_ns = int(slow_ms * 1_000_000)
+        self._lock = threading.Lock()
+        self._timings: dict[tuple[str, str], _Timing] = {}
+
+    def record(self, caller: str, sql: str, ns: int) -> None:
+        key = (caller, normalize(sql))
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = _Timing()
+            timing.add(ns)
+        if ns >= self.slow_ns:
+            log.warning(f"Slow SQL ({ns / 1e6:.1f} ms) in {caller}: {key[1]}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings.clear()
+
+    def summary(self) -> list[dict]:
+        """One dict per (caller, statement), most total time first."""
+        with self._lock:
+            items = list(self._timings.items())
+        rows = [{
+            "caller": caller,
+            "sql": sql,
+            "count": t.count,
+            "total_ms": round(t.total_ns / 1e6, 3),
+            "mean_us": round(t.total_ns / t.count / 1000, 1),
+            "p50_us": t.percentile_us(0.5),
+            "p95_us": t.percentile_us(0.95),
+            "max_us": round(t.max_ns / 1000, 1),
+            "histogram": dict(zip([f"<{b}us" for b in BUCKETS_US] + ["more"], t.buckets)),
+        } for (caller, sql), t in items]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def report(self, limit: int = 25) -> str:
+        """The top ``limit`` statements by total time, as a text table."""
+        lines = [f"{'total ms':>10} {'count':>8} {'mean us':>9} {'p95 us':>9} {'max us':>10}  caller: statement"]
+        for r in self.summary()[:limit]:
+            sql = r["sql"] if len(r["sql"]) <= 120 else r["sql"][:117] + "..."
+            lines.append(f"{r['total_ms']:>10.1f} {r['count']:>8} {r['mean_us']:>9.1f} {r['p95_us']:>9.0f} "
+                         f"{r['max_us']:>10.1f}  {r['caller']}: {sql}")
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def log_summary(self, path: str | None = None) -> None:
+        if not self._timings:
+            return
+        log.info("SQL statement timings:\n" + self.report())
+        if path:
+            self.dump(path)
+
+
+# Frames skipped when naming the caller: this module, and the transaction()
+# plumbing a COMMIT runs through.
+_PLUMBING = {__name__, "contextlib", "database.db_manager"}
+
+
+def _caller(depth: int) -> str:
+    """The function that issued the statement: Class.method or module.function."""
+    frame = sys._getframe(depth)
+    while frame is not None and frame.f_globals.get("__name__") in _PLUMBING:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    name = frame.f_code.co_qualname
+    if "." not in name:
+        name = f"{frame.f_globals.get('__name__', '?').rsplit('.', 1)[-1]}.{name}"
+    return name
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Times each statement from execute() until its rows are consumed."""
+
+    _sql = None
+    _caller = None
+    _ns = 0
+
+    def _finish(self) -> None:
+        if self._sql is not None:
+            self.connection.sql_stats.record(self._caller, self._sql, self._ns)
+            self._sql = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = perf_counter_ns()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._ns = perf_counter_ns() - start
+            self._sql, self._caller = sql, _caller(2)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = perf_counter_ns()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.sql_stats.record(_caller(2), sql, perf_counter_ns() - start)
+
+    def fetchone(self):
+        start = perf_counter_ns()
+        row = super().fetchone()
+        self._ns += perf_counter_ns() - start
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = perf_counter_ns()
+        rows = super().fetchmany(size)
+        self._ns += perf_counter_ns() - start
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = perf_counter_ns()
+        rows = super().fetchall()
+        self._ns += perf_counter_ns() - start
+        self._finish()
+        return rows
+
+    def __next__(self):
+        start = perf_counter_ns()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._ns += perf_counter_ns() - start
+            self._finish()
+            raise
+        self._ns += perf_counter_ns() - start
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # a lookup that read one row and dropped its cursor
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors and commits report to ``sql_stats``."""
+
+    sql_stats: SQLStats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # the C shortcuts bypass cursor(), so route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        start = perf_counter_ns()
+        try:
+            super().commit()
+        finally:
+            self.sql_stats.record(_caller(2), "COMMIT", perf_counter_ns() - start)
@@ -1,27 +1,51 @@
-from core.services.bill_service import BillService
+from core.services.bill_writer import BillWriter
 from core.services.product_service import ProductService
-from utils.print_pkg.printer_config import PrinterTester
+from utils.print_pkg.print_spooler import EXPIRED, PrintSpooler
 
 from utils.logger import get_logger
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QMessageBox
+from ui.utils.weight_bridge import WeightBridge
 from utils.weight import weight_manager
 
 log = get_logger(__name__)
 
 
+class BillWriterSignals(QObject):
+    """Carries BillWriter callbacks from its worker thread to the UI thread."""
+    saved = pyqtSignal(list)
+    failed = pyqtSignal(int, str)
+
+
+class PrintSpoolerSignals(QObject):
+    """Carries PrintSpooler status callbacks from its worker thread to the UI thread."""
+    status = pyqtSignal(int, str, object)
+
+
 class ActionButtonsLogic:
     def __init__(self):
         self.billing_list = None
         self.current_customer = "C1"
         self.billing_section = None
-        self.printer_tester = PrinterTester()
+
+        self.bill_writer = BillWriter.get_instance()
+        self.bill_signals = BillWriterSignals()
+        self.bill_writer.on_saved = self.bill_signals.saved.emit
+        self.bill_writer.on_failed = self.bill_signals.failed.emit
+        self.bill_signals.saved.connect(self._on_bills_saved)
+        self.bill_signals.failed.connect(self._on_bill_failed)
+
+        self.print_spooler = PrintSpooler.get_instance()
+        self.print_signals = PrintSpoolerSignals()
+        self.print_spooler.on_status = self.print_signals.status.emit
+        self.print_signals.status.connect(self._on_print_status)
 
         self._update_total_label = lambda val: None  # safe no-op
         self._printer = None
 
-        self.weight_timer = QTimer()
-        self.weight_timer.timeout.connect(self._refresh_weight)
-        self.weight_timer.start(500)
+        # repaint the weight only when the scale reports a change
+        self.weight_bridge = WeightBridge(weight_manager)
+        self.weight_bridge.weight_changed.connect(self.show_weight)
 
     def on_weight_button_clicked(self):
         if not self.billing_list or not self.billing_list.selected_item_widget:
@@ -31,16 +55,12 @@ class ActionButtonsLogic:
 
         self.billing_list.selected_field_name = "qty"
         item.select_field("qty")
-        current_weight = weight_manager.get_weight()
-        item.item_data.qty = current_weight
-        item.qty_label.setText(f"Qty: {current_weight:.3f}")
-        item.amount_label.setText(f"₹{item.item_data.total():.2f}")
-
-        self.update_bill_amount()
+        # the raw reading now, the settled weight once the pan stops moving
+        item.item_data.qty = weight_manager.get_weight()
+        self.billing_list.fill_settled_weight(item.item_data, self.weight_bridge)
 
-    def _refresh_weight(self):
-        if hasattr(self, 'weight_button'):
-            w = weight_manager.get_weight()
+    def show_weight(self, w):
+        if getattr(self, 'weight_button', None) is not None:
             self.weight_button.setText(f"{w:.3f}")
 
     def set_billing_list(self, billing_list):
@@ -87,20 +107,27 @@ class ActionButtonsLogic:
         total = self.billing_list.get_current_customer_total()
         items = self.billing_list.get_current_customer_items()
         customer = self.billing_list.get_current_customer()
-        bill_service = BillService()
-
-        if self.billing_section and self.billing_section.current_editing_bill:
-            bill_id = self.billing_section.current_editing_bill
-            bill_service.clear_bill_items(bill_id)
-
-
-        else:
-            bill_id = bill_service.create_bill(customer_id=customer)
+        editing_id = self.billing_section.current_editing_bill if self.billing_section else None
         self.service = ProductService()
+        lines, unsaved = [], []
         for item in items:
+            if item.product_id is not None:
+                # rung up or loaded as this product: keep it even if renamed or deleted since
+                lines.append((item.product_id, item.qty, item.price, item.product_name, item.unit))
+                continue
             product = self.service.get_by_name(item.item_name)
             if product:
-                bill_service.add_item_to_bill(bill_id, product.id, item.qty, item.price)
+                lines.append((product.id, item.qty, item.price, product.name, product.unit))
+            else:
+                unsaved.append(item.item_name)
+        if unsaved and QMessageBox.question(
+                None, "Lines Not Saved",
+                "These lines are not products and will not be saved with the bill:\n"
+                + "\n".join(unsaved) + "\n\nSave the bill without them?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No) != QMessageBox.Yes:
+            return
+        # queued for the background writer; the title bar refreshes once it lands
+        self.bill_writer.submit(customer, lines, bill_id=editing_id)
 
         self.billing_list.clear_current_customer()
 
@@ -133,17 +160,25 @@ class ActionButtonsLogic:
         receipt_lines.append("-" * max_character)
         receipt_content = "\n".join(receipt_lines)
 
-        try:
-            if not self.printer_tester.is_printer_initialized():
-                self.printer_tester.run()
-            self.printer_tester.print_receipt(receipt_content, total=total)
-        except Exception as e:
-            log.info(f"Failed to print receipt: {e}")
+        # printed in the background (retried until the printer is back); the next sale starts now
+        self.print_spooler.submit(receipt_content, total)
 
+    def _on_bills_saved(self, bill_ids):
         # 🔁 Refresh title bar buttons after new bill is created
         if self.billing_section and self.billing_section.title_bar_logic:
             self.billing_section.title_bar_logic.refresh_last_bills()
 
+    def _on_bill_failed(self, bill_id, error):
+        log.error(f"Bill {bill_id} could not be saved: {error}")
+        QMessageBox.warning(None, "Bill Not Saved",
+                            f"Bill {bill_id} could not be saved yet. It is kept and saved as soon as "
+                            f"the database accepts it.\n{error}")
+
+    def _on_print_status(self, job_id, status, error):
+        if status == EXPIRED:
+            QMessageBox.warning(None, "Receipt Not Printed",
+                                f"Receipt {job_id} could not be printed and was dropped.\n{error}")
+
     def set_total_updater(self, callback):
         self._update_total_label = callback
 
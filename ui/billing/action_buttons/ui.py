@@ -43,13 +43,14 @@ class ActionButtonsUI:
         self.weight_button = self._create_weight_button()
         self.logic.weight_button = self.weight_button
         self.weight_button.clicked.connect(self.logic.on_weight_button_clicked)
+        self.logic.show_weight(self.logic.weight_bridge.latest())
 
         layout.addWidget(self.weight_button, 2, 4)
 
         layout.addWidget(self.weight_button, 2, 4)
 
         self.barcode_input = QLineEdit()
-        self.barcode_input.setPlaceholderText("Scan Barcode")
+        self.barcode_input.setPlaceholderText("Scan Barcode or Type Name")
         layout.addWidget(self.barcode_input, 3, 4)  # Adjust row as needed
 
 
@@ -97,6 +97,11 @@ class BillingListItem(QFrame):
         self.qty_label.setStyleSheet(field_styles["qty"])
         self.price_label.setStyleSheet(field_styles["price"])
 
+    def show_qty(self, settling=False):
+        """Repaint qty and amount after item_data.qty changed; ``settling`` marks a weight still moving."""
+        self.qty_label.setText(f"Qty: {self.item_data.qty:.3f}" + (" …" if settling else ""))
+        self.amount_label.setText(f"₹{self.item_data.total():.2f}")
+
     def select_field(self, field_name):
         if field_name in ("qty", "price"):
             self.selected_field = field_name
@@ -3,8 +3,11 @@ from PyQt5.QtCore import QObject, pyqtSignal
 
 
 class BillingItemData:
-    def __init__(self, item_count, item_name, qty, price):
+    def __init__(self, item_count, item_name, qty, price, product_id=None, product_name=None, unit=None):
         self.item_count, self.item_name, self.qty, self.price = item_count, item_name, qty, price
+        # the product the line was rung up as (or loaded from a saved bill with):
+        # saving uses these, not item_name, so renamed/deleted products keep their lines
+        self.product_id, self.product_name, self.unit = product_id, product_name, unit
 
     def total(self):
         return self.qty * self.price
@@ -61,13 +64,39 @@ class BillingListLogic(QObject):
             self.selected_item_widget = None
             self.ui._display_current_customer_items()
 
-    def add_item(self, name: str, qty: int, price: float):
+    def add_item(self, name: str, qty: int, price: float, product_id: int = None,
+                 product_name: str = None, unit: str = None):
         count = self.item_counters[self.current_customer]
-        item_data = BillingItemData(count, name, qty, price)
+        item_data = BillingItemData(count, name, qty, price, product_id, product_name, unit)
         self.customer_data[self.current_customer].append(item_data)
         self.item_counters[self.current_customer] += 1
         self.ui._add_item_to_display(item_data)
         self.bill_changed.emit()  # 🔁 emit on add
+        return item_data
+
+    def set_item_qty(self, item_data, qty, settling=False):
+        """Change a line's qty, repainting it if it is on screen."""
+        item_data.qty = qty
+        for widget in self.item_widgets:
+            if widget.item_data is item_data:
+                widget.show_qty(settling)
+        self.bill_changed.emit()
+
+    def fill_settled_weight(self, item_data, weight_bridge):
+        """
+        Show the line's qty (the raw weight) as settling and replace it with
+        the settled weight once the pan stops moving, unless it was retyped
+        in the meantime. A pan that never settles keeps the raw weight.
+        """
+        shown = item_data.qty
+        self.set_item_qty(item_data, shown, settling=True)
+
+        def settled(weight):
+            if weight is None:
+                weight = weight_bridge.latest()
+            if item_data.qty == shown:
+                self.set_item_qty(item_data, weight or shown)
+        weight_bridge.when_settled(settled)
 
     def remove_selected_item(self):
         if not self.selected_item_widget:
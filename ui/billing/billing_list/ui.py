@@ -83,12 +83,15 @@ class BillingListWidget(QWidget):
         if self.logic.selected_item_widget:
             self.logic.selected_item_widget.set_selected(False)
 
-    def add_item(self, name, qty, price):
-        self.logic.add_item(name, qty, price)
+    def add_item(self, name, qty, price, product_id=None, product_name=None, unit=None):
+        return self.logic.add_item(name, qty, price, product_id, product_name, unit)
 
     def remove_selected_item(self):
         self.logic.remove_selected_item()
 
+    def fill_settled_weight(self, item_data, weight_bridge):
+        self.logic.fill_settled_weight(item_data, weight_bridge)
+
     @property
     def selected_item_widget(self):
         return self.logic.selected_item_widget
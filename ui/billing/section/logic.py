@@ -1,5 +1,5 @@
 from core.services.bill_service import BillService
-from core.services.product_service import ProductService
+from core.services.bill_writer import BillWriter
 from ui.billing.action_buttons.logic import ActionButtonsLogic
 from ui.billing.action_buttons.ui import ActionButtonsUI
 from ui.billing.billing_list.ui import BillingListWidget
@@ -81,6 +81,9 @@ class BillingSection:
         self._toggle_editing_ui(False)
 
     def load_bill(self, bill_id):
+        # a bill saved moments ago may still be in the write-behind queue
+        if BillWriter.get_instance().is_pending(bill_id):
+            BillWriter.get_instance().flush(timeout=5)
         bill_service = BillService()
         bill = bill_service.get_bill(bill_id)
         if not bill:
@@ -88,11 +91,9 @@ class BillingSection:
             return
 
         self.billing_list.clear_current_customer()
-        product_service = ProductService()
         for item in bill.items:
-            product = product_service.get_by_id(item.product_id)
-            if product:
-                self.billing_list.add_item(product.name, item.quantity, item.price)
+            self.billing_list.add_item(item.product_name or f"#{item.product_id}", item.quantity, item.price,
+                                       item.product_id, item.product_name, item.unit)
 
         self.current_editing_bill = bill_id
         self.editing_bill_label.setText(f"Editing Bill {bill_id}")
@@ -1,5 +1,6 @@
 from PyQt5.QtWidgets import QMessageBox
 from core.services.product_service import ProductService
+from ui.utils.weight_bridge import WeightBridge
 from utils.weight import weight_manager
 
 
@@ -7,21 +8,31 @@ class POSEventHandler:
     def __init__(self, billing_list):
         self.billing_list = billing_list
         self.service = ProductService()
+        self.weight_bridge = WeightBridge(weight_manager)
 
     def handle_product_click(self, product):
         if product:
             qty = 1
             if product.unit == "kg":
-                w = weight_manager.get_weight()
-                # qty = weight() or 1  # fallback if sensor fails
-                qty = w or 1
-            self.billing_list.add_item(name=product.name, qty=qty, price=product.price)
+                qty = weight_manager.get_weight() or 1
+            item = self.billing_list.add_item(name=product.name, qty=qty, price=product.price,
+                                              product_id=product.id, product_name=product.name, unit=product.unit)
+            if product.unit == "kg":
+                # added now with the raw reading; the settled weight replaces it without blocking the till
+                self.billing_list.fill_settled_weight(item, self.weight_bridge)
 
     def handle_barcode(self, barcode):
         try:
             product = self.service.get_by_barcode(barcode)
             if product:
-                self.billing_list.add_item(product.name, 1, product.price)
+                self.billing_list.add_item(product.name, 1, product.price, product.id, product.name, product.unit)
+                return
+            # typed rather than scanned: take it if the text matches one product
+            matches = self.service.search(barcode, limit=2)
+            if len(matches) == 1:
+                self.handle_product_click(matches[0])
+            elif matches:
+                QMessageBox.warning(None, "Not Unique", f"More than one product matches: {barcode}")
             else:
                 QMessageBox.warning(None, "Not Found", f"No product for barcode: {barcode}")
         except Exception as e:
@@ -3,11 +3,15 @@
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import Qt
 
+from core.services.bill_sync import BillSync
+from core.services.bill_writer import BillWriter
 from core.services.product_service import ProductService
+from database.backup import BackupManager
 from ui.main.pos_main_ui import POSMainUI
 from ui.title_bar.logic import CustomTitleBarLogic
 from ui.main.pos_event_handler import POSEventHandler
 from utils.constants import DEFAULT_CATEGORY
+from utils.print_pkg.print_spooler import PrintSpooler
 from utils.weight import weight_manager
 
 class POSMainController(POSMainUI):
@@ -19,6 +23,13 @@ class POSMainController(POSMainUI):
 
         self._connect_signals()
         weight_manager.start()
+        BillWriter.get_instance().start()
+        PrintSpooler.get_instance().start()   # prints receipts left over from the last run
+        # daily snapshot in the background; the till stays usable meanwhile
+        BackupManager.get_instance().start_if_due()
+        self.bill_sync = BillSync.get_instance()   # None unless KPA_SYNC_TARGET is set
+        if self.bill_sync:
+            self.bill_sync.start()
 
         self.action_barcode_input = self.billing_section.action_buttons_ui.barcode_input
         self.action_barcode_input.returnPressed.connect(self._handle_barcode_input)
@@ -41,6 +52,14 @@ class POSMainController(POSMainUI):
     def _on_category_changed(self, category):
         self.main_content.products_sec.set_category(category)
 
+    def closeEvent(self, event):
+        # flush queued bills to disk before the process goes away
+        BillWriter.get_instance().stop()
+        PrintSpooler.get_instance().stop(timeout=5)
+        if self.bill_sync:
+            self.bill_sync.stop(timeout=5)
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
             self.close()
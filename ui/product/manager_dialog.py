@@ -15,6 +15,9 @@ import os
 IMAGE_DIR = os.path.join(os.getcwd(), "product_images")
 PRODUCT_ICON_SIZE = 128
 PRODUCT_GRID_COLUMNS = 3
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULT_LIMIT = 60
+ORDER_SAVE_DELAY_MS = 800
 
 
 class ProductManagementDialog(QDialog):
@@ -26,6 +29,13 @@ class ProductManagementDialog(QDialog):
         self.selected_btn = None
         self.selected_product = None
         self.last_selected_index = -1
+        # Moves are applied to the grid at once and saved in one write once
+        # the user stops clicking (or before anything reloads from the catalog)
+        self.pending_order = {}  # category -> product ids in their new order
+        self.order_timer = QTimer(self)
+        self.order_timer.setSingleShot(True)
+        self.order_timer.setInterval(ORDER_SAVE_DELAY_MS)
+        self.order_timer.timeout.connect(self._save_order)
         self.init_ui()
         self.showMaximized()
 
@@ -116,7 +126,11 @@ class ProductManagementDialog(QDialog):
         clear_btn = QPushButton("Clear")
 
         search_field.setPlaceholderText("Search products...")
-        # search_field.textChanged.connect(lambda: self._filter_products(tab))
+        # search as you type, once typing pauses
+        search_timer = QTimer(outer_widget)
+        search_timer.setSingleShot(True)
+        search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        search_field.textChanged.connect(lambda _: search_timer.start())
 
         search_layout.addWidget(search_field)
         search_layout.addWidget(search_btn)
@@ -140,12 +154,14 @@ class ProductManagementDialog(QDialog):
             "search_field": search_field,
         }
 
+        search_timer.timeout.connect(lambda: self._filter_products(tab))
         search_btn.clicked.connect(lambda: self._filter_products(tab))
         clear_btn.clicked.connect(lambda: self._clear_search(tab))
 
         return tab
 
     def _load_grid(self, tab, products=None):
+        self._save_order()
         layout = tab["grid"]
         while layout.count():
             item = layout.takeAt(0)
@@ -217,21 +233,12 @@ class ProductManagementDialog(QDialog):
 
 
     def _filter_products(self, tab):
-        text = tab["search_field"].text().strip().lower()
-        products = self.service.get_by_category(tab["category"]) or []
-
-        filtered = []
-        for p in products:
-            if not p:
-                continue  # skip None entries
-
-            name = (p.name or "").lower()
-            barcode = p.barcode or ""
-
-            if text in name or text in barcode:
-                filtered.append(p)
-
-        self._load_grid(tab, filtered)
+        text = tab["search_field"].text().strip()
+        if not text:
+            self._load_grid(tab)
+            return
+        products = self.service.search(text, category=tab["category"], limit=SEARCH_RESULT_LIMIT)
+        self._load_grid(tab, products)
 
     def _clear_search(self, tab):
         tab["search_field"].clear()
@@ -264,19 +271,43 @@ class ProductManagementDialog(QDialog):
         return list(self.tabs.keys())[index]
 
     def _move_product_up(self):
-        tab = self.tabs[self._current_category()]
-        idx = self._get_selected_index()
-        if idx > 0:
-            above = tab["buttons"][idx - 1][1]
-            self.service.reorder_products(self.selected_product.id, above.id)
-            self.last_selected_index = idx - 1
-            self._refresh_current_tab()
+        self._move_product(-1)
 
     def _move_product_down(self):
+        self._move_product(1)
+
+    def _move_product(self, step):
         tab = self.tabs[self._current_category()]
         idx = self._get_selected_index()
-        if 0 <= idx < len(tab["buttons"]) - 1:
-            below = tab["buttons"][idx + 1][1]
-            self.service.reorder_products(self.selected_product.id, below.id)
-            self.last_selected_index = idx + 1
-            self._refresh_current_tab()
+        target = idx + step
+        if idx < 0 or not 0 <= target < len(tab["buttons"]):
+            return
+        buttons = tab["buttons"]
+        (btn, product), (other_btn, other) = buttons[idx], buttons[target]
+
+        # Swap the two in the category's full order (the grid may be a search result)
+        order = self.pending_order.get(tab["category"])
+        if order is None:
+            order = [p.id for p in self.service.get_by_category(tab["category"])]
+        a, b = order.index(product.id), order.index(other.id)
+        order[a], order[b] = order[b], order[a]
+        self.pending_order[tab["category"]] = order
+
+        layout = tab["grid"]
+        layout.removeWidget(btn)
+        layout.removeWidget(other_btn)
+        layout.addWidget(btn, target // PRODUCT_GRID_COLUMNS, target % PRODUCT_GRID_COLUMNS)
+        layout.addWidget(other_btn, idx // PRODUCT_GRID_COLUMNS, idx % PRODUCT_GRID_COLUMNS)
+        buttons[idx], buttons[target] = buttons[target], buttons[idx]
+        self.last_selected_index = target
+        self.order_timer.start()
+
+    def _save_order(self):
+        self.order_timer.stop()
+        for category, order in self.pending_order.items():
+            self.service.apply_order(category, order)
+        self.pending_order.clear()
+
+    def done(self, result):
+        self._save_order()
+        super().done(result)
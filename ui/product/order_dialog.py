@@ -8,6 +8,7 @@ class OrderProductsDialog(QDialog):
         self.service = ProductService()  # Use ProductService instead of ProductRepository
         self.current_category = "fruits_veg"
         self.products = []
+        self.pending = {}  # category -> reordered products, saved on accept
         self._build_ui()
         self._load_products()
 
@@ -51,7 +52,8 @@ class OrderProductsDialog(QDialog):
 
     def _load_products(self):
         self.list_widget.clear()
-        self.products = self.service.get_by_category(self.current_category)  # Use ProductService
+        # Moves are kept per category until "Save & Close"
+        self.products = self.pending.get(self.current_category) or self.service.get_by_category(self.current_category)
         [self.list_widget.addItem(f"{p.name} (₹{p.price:.2f})") for p in self.products]
 
     def _move_up(self):
@@ -67,8 +69,15 @@ class OrderProductsDialog(QDialog):
 
         target = row + direction
         if 0 <= target < len(self.products):
-            self.service.reorder_products(self.products[row].id, self.products[target].id)
-            self._load_products()
-            # Restore selection after reload
-            new_row = row + direction
-            self.list_widget.setCurrentRow(new_row)
+            products = self.products
+            products[row], products[target] = products[target], products[row]
+            self.list_widget.insertItem(target, self.list_widget.takeItem(row))
+            self.list_widget.setCurrentRow(target)
+            self.pending[self.current_category] = products
+
+    def accept(self):
+        # One transaction per reordered category, however many moves were made
+        for category, products in self.pending.items():
+            self.service.apply_order(category, [p.id for p in products])
+        self.pending.clear()
+        super().accept()
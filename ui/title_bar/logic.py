@@ -44,7 +44,7 @@ class CustomTitleBarLogic:
         self.refresh_last_bills()
 
     def refresh_last_bills(self):
-        bills = self.bill_service.list_bills()[:3]
+        bills = self.bill_service.latest_bills(len(self.last_bill_buttons))
         for i, btn in enumerate(self.last_bill_buttons):
             if i < len(bills):
                 bill = bills[i]
@@ -0,0 +1,98 @@
+import threading
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from utils.weight_manager import STABLE, STABLE_WAIT
+
+FRAME_MS = 16   # deliver at most one weight per ~60 Hz frame
+
+
+class WeightBridge(QObject):
+    """
+    Brings WeightManager changes onto the Qt thread as ``weight_changed``.
+
+    The reader thread only stores the latest weight and, if no delivery is
+    pending yet, posts one wake-up to the UI thread. The UI thread waits
+    out the rest of the frame and emits the newest value, so a burst of
+    readings becomes a single repaint and a steady scale causes none.
+
+    ``weight_settled`` is emitted each time the pan settles; when_settled()
+    waits for that without blocking the UI thread.
+    """
+
+    weight_changed = pyqtSignal(float)
+    weight_settled = pyqtSignal(float)
+    _arrived = pyqtSignal()   # reader thread -> UI thread (queued)
+    _settled = pyqtSignal(float)   # reader thread -> UI thread (queued)
+
+    def __init__(self, weight_manager, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._latest = weight_manager.get_weight()
+        self._emitted = None
+        self._pending = False
+        self._frame = QTimer(self)
+        self._frame.setSingleShot(True)
+        self._frame.setInterval(FRAME_MS)
+        self._frame.timeout.connect(self._deliver)
+        self._arrived.connect(self._start_frame)
+        self._settled.connect(self.weight_settled)
+        self._manager = weight_manager
+        self._unsubscribe = weight_manager.subscribe(self._on_weight)
+        self._unsubscribe_stable = weight_manager.subscribe_stable(self._settled.emit)
+
+    def latest(self) -> float:
+        with self._lock:
+            return self._latest
+
+    def close(self):
+        self._unsubscribe()
+        self._unsubscribe_stable()
+        self._frame.stop()
+
+    def when_settled(self, callback, timeout: float = STABLE_WAIT):
+        """
+        Call ``callback(weight)`` on the UI thread with the settled weight:
+        at once if the pan is settled now, otherwise when it settles, or
+        with None if it is still moving after ``timeout`` seconds.
+        """
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        waiting = [True]
+
+        def done(weight):
+            if not waiting:
+                return   # a settle and the timeout both queued: the first one wins
+            waiting.clear()
+            self.weight_settled.disconnect(done)
+            timer.stop()
+            timer.deleteLater()
+            callback(weight)
+
+        # connected before looking, so a settle in between is not missed
+        self.weight_settled.connect(done)
+        timer.timeout.connect(lambda: done(None))
+        state, weight = self._manager.stability()
+        if state == STABLE:
+            done(weight)
+        else:
+            timer.start(int(timeout * 1000))
+
+    def _on_weight(self, weight):
+        # reader thread: never touches widgets
+        with self._lock:
+            self._latest = weight
+            if self._pending:
+                return
+            self._pending = True
+        self._arrived.emit()
+
+    def _start_frame(self):
+        self._frame.start()
+
+    def _deliver(self):
+        with self._lock:
+            weight, self._pending = self._latest, False
+        if weight != self._emitted:
+            self._emitted = weight
+            self.weight_changed.emit(weight)
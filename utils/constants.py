@@ -1,5 +1,6 @@
 # UI Constants
 import os
+import platform
 
 BUTTON_SIZE = 50
 ACTION_BUTTON_WIDTH = 80
@@ -25,7 +26,8 @@ BILLING_SECTION_WIDTH = 350
 PRODUCT_BUTTON_FONT_FAMILY = "Arial"
 PRODUCT_BUTTON_FONT_SIZE = 18
 
-# Default Category
+# Product categories
+CATEGORIES = ("fruits_veg", "manual", "barcode_only")
 DEFAULT_CATEGORY = "fruits_veg"
 # Title Bar Constants
 TITLE_BAR_HEIGHT = 50
@@ -60,3 +62,29 @@ APP_TITLE = "FPOS"
 
 # Placeholder Text
 BARCODE_PLACEHOLDER = "Scan barcode here..."
+
+# Head-office bill sync (core.services.bill_sync)
+# KPA_SYNC_TARGET: http(s):// URL of a sync endpoint or path of a SQLite file; unset = no sync
+SYNC_TARGET = os.environ.get("KPA_SYNC_TARGET")
+LANE_ID = os.environ.get("KPA_LANE_ID") or platform.node() or "lane"
+
+# SQL statement timing (database.sql_stats)
+# KPA_SQL_STATS=1 times every statement; slower ones than KPA_SQL_SLOW_MS are logged,
+# and the summary is logged at exit (and written as JSON to KPA_SQL_STATS_FILE if set)
+SQL_STATS = os.environ.get("KPA_SQL_STATS", "") not in ("", "0")
+SQL_SLOW_MS = float(os.environ.get("KPA_SQL_SLOW_MS", "50"))
+SQL_STATS_FILE = os.environ.get("KPA_SQL_STATS_FILE")
+
+# Weighing scale (utils.weight_manager)
+# KPA_SCALE_PROTOCOL: wire format, one of utils.scale_protocol.DECODERS
+SCALE_PROTOCOL = os.environ.get("KPA_SCALE_PROTOCOL", "bracket")
+SCALE_BAUD = int(os.environ.get("KPA_SCALE_BAUD", "2400"))
+# KPA_SCALE_PORT: serial device of the scale (default: the first of /dev/ttyUSB0, /dev/ttyAMA0 that opens)
+SCALE_PORT = os.environ.get("KPA_SCALE_PORT")
+# KPA_VIRTUAL_SCALE: "demo" or a trace file replayed by utils.virtual_scale on a pty instead of a real scale
+VIRTUAL_SCALE = os.environ.get("KPA_VIRTUAL_SCALE")
+
+# Receipt printer (utils.print_pkg)
+# KPA_PRINTER: file:/path writes the ESC/POS bytes to a file, tcp:host:port sends them to a
+# network printer or utils.print_pkg.fake_printer; unset = the first USB printer found
+PRINTER_TARGET = os.environ.get("KPA_PRINTER")
@@ -0,0 +1,72 @@
+import json
+import os
+
+
+def path_beside(db_path: str, name: str) -> str:
+    """Journal file next to the database: pos.db -> pos.<name>.jsonl."""
+    return os.path.splitext(db_path)[0] + f".{name}.jsonl"
+
+
+class JsonlJournal:
+    """
+    Append-only JSON-lines journal of records keyed by one field.
+
+    Producers append() a record per change; a later record for the same
+    key replaces the earlier one when the journal is read back. Once
+    records are done with, rewrite() atomically replaces the file with the
+    ones still open (fsynced before the rename), which also keeps the
+    file short. Not thread-safe: callers hold their own lock.
+    """
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        self._file = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> list[dict]:
+        """Open for appending and return the records left from the last run."""
+        records = self.read()
+        self._file = open(self.path, "a", encoding="utf-8")
+        return records
+
+    def read(self) -> list[dict]:
+        records: dict = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                records[record[self.key]] = record
+        return list(records.values())
+
+    def append(self, record: dict) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def rewrite(self, records) -> None:
+        """Replace the journal with ``records``."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file:
+            self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self, records=None) -> None:
+        """Close, first rewriting the journal to ``records`` when given."""
+        if records is not None:
+            self.rewrite(records)
+        if self._file:
+            self._file.close()
+            self._file = None
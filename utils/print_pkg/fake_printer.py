@@ -0,0 +1,115 @@
+"""
+A receipt printer without hardware: a raw TCP print server (the port 9100
+kind) that captures the ESC/POS bytes it is sent.
+
+Point the app at it with KPA_PRINTER=tcp:127.0.0.1:<port>. The stream is
+split into one job per paper cut; jobs are kept in ``jobs`` and, with
+``capture_dir``, written as job-0001.bin, job-0002.bin, ... ``speed``
+(bytes a second) makes it drain as slowly as a real printer.
+
+    python -m utils.print_pkg.fake_printer --port 9100 --capture-dir receipts
+"""
+import argparse
+import os
+import socketserver
+import threading
+import time
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+CUT = b"\x1dV"    # GS V m [n]: the cut ends a receipt
+
+
+def split_jobs(data: bytes) -> tuple[list[bytes], bytes]:
+    """Complete jobs (each ending with its cut) and the unfinished rest."""
+    jobs, start = [], 0
+    while (cut := data.find(CUT, start)) >= 0:
+        end = cut + len(CUT) + 1
+        if end > len(data):
+            break
+        if data[end - 1] in b"AB":   # modes A and B (65, 66) take a feed count
+            end += 1
+            if end > len(data):
+                break
+        jobs.append(data[start:end])
+        start = end
+    return jobs, data[start:]
+
+
+class _PrintHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        printer = self.server.printer
+        pending = b""
+        while chunk := self.request.recv(65536):
+            if printer.speed:
+                time.sleep(len(chunk) / printer.speed)
+            jobs, pending = split_jobs(pending + chunk)
+            for job in jobs:
+                printer._add_job(job)
+        if pending.strip(b"\x00"):
+            printer._add_job(pending)   # connection closed without a cut
+
+
+class FakePrinter:
+    """Captures print jobs sent over TCP; ``target`` is the KPA_PRINTER value for it."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, capture_dir: str | None = None,
+                 speed: float = 0.0):
+        self.capture_dir = capture_dir
+        self.speed = speed
+        self.jobs: list[bytes] = []
+        self._jobs_changed = threading.Condition()
+        self._server = socketserver.ThreadingTCPServer((host, port), _PrintHandler)
+        self._server.daemon_threads = True
+        self._server.printer = self
+        self.host, self.port = self._server.server_address[:2]
+        if capture_dir:
+            os.makedirs(capture_dir, exist_ok=True)
+
+    @property
+    def target(self) -> str:
+        return f"tcp:{self.host}:{self.port}"
+
+    def start(self) -> "FakePrinter":
+        threading.Thread(target=self._server.serve_forever, name="fake-printer", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def wait_for_jobs(self, count: int, timeout: float | None = None) -> bool:
+        """Wait until ``count`` jobs have been captured in total."""
+        with self._jobs_changed:
+            return self._jobs_changed.wait_for(lambda: len(self.jobs) >= count, timeout)
+
+    def _add_job(self, job: bytes) -> None:
+        with self._jobs_changed:
+            self.jobs.append(job)
+            number = len(self.jobs)
+            self._jobs_changed.notify_all()
+        if self.capture_dir:
+            with open(os.path.join(self.capture_dir, f"job-{number:04d}.bin"), "wb") as f:
+                f.write(job)
+        log.debug(f"Fake printer captured job {number} ({len(job)} bytes)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Raw TCP print server capturing ESC/POS jobs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--capture-dir", default="receipts")
+    parser.add_argument("--speed", type=float, default=0.0, help="bytes a second, 0 = instant")
+    args = parser.parse_args(argv)
+    printer = FakePrinter(args.host, args.port, args.capture_dir, args.speed).start()
+    print(f"capturing print jobs in {args.capture_dir}/ (KPA_PRINTER={printer.target}), Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        printer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import queue
+import threading
+from datetime import datetime
+
+from utils.jsonl_journal import JsonlJournal, path_beside
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_STOP = object()
+
+# Job states reported to on_status(job_id, status, error)
+QUEUED = "queued"
+PRINTING = "printing"
+WAITING = "waiting"        # no printer, or it failed mid-job: retried until it is back
+PRINTED = "printed"
+EXPIRED = "expired"        # waited longer than MAX_AGE; dropped
+
+
+class PrintSpooler:
+    """
+    Background receipt printing.
+
+    submit() appends the receipt to a journal file and returns at once. A
+    worker thread owns the printer and prints jobs in order; while the
+    printer is missing or failing, the job at the head waits and is retried
+    with backoff, re-detecting the printer each time, so printing resumes
+    by itself once it is plugged back in or has paper again. Printed jobs
+    are dropped from the journal; jobs still in it when the process ends
+    are printed after the next start(), unless older than MAX_AGE.
+
+    on_status(job_id, status, error) is called from the worker thread for
+    every job; submit() also takes a callback for one job. The UI bridges
+    them to Qt signals.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    RETRY_DELAYS = (1.0, 2.0, 5.0, 10.0)   # the last one repeats
+    MAX_AGE = 15 * 60                       # seconds a receipt is still worth printing
+
+    def __init__(self, printer=None, journal_path: str | None = None):
+        if printer is None:
+            from utils.print_pkg.printer_config import PrinterTester
+            printer = PrinterTester()
+        self.printer = printer
+        if journal_path is None:
+            from database.db_manager import DBManager
+            journal_path = path_beside(DBManager.get_instance().db_path, "print_queue")
+        self.journal_path = journal_path
+        self.on_status = None
+        self._queue = queue.Queue()
+        self._state = threading.Condition()
+        self._pending: dict[int, dict] = {}
+        self._callbacks: dict[int, object] = {}
+        self._statuses: dict[int, str] = {}
+        self._next_id = 1
+        self._journal = JsonlJournal(self.journal_path, "job_id")
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._exited = False       # the worker has left _run()
+        self._abandoned = False    # stop() timed out; the worker closes up
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        with self._state:
+            if self._thread is not None:
+                return
+            recovered = self._journal.open()
+            if recovered:
+                self._next_id = max(self._next_id, max(job["job_id"] for job in recovered) + 1)
+            self._stopping = self._exited = self._abandoned = False
+            self._queue = queue.Queue()   # drop a _STOP the last worker did not take
+            self._thread = threading.Thread(target=self._run, name="print-spooler", daemon=True)
+            self._thread.start()
+        if recovered:
+            log.info(f"Printing {len(recovered)} receipt(s) left in {self.journal_path}")
+            for job in recovered:
+                self._enqueue(job)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Finish the job being printed and stop; the rest stay in the journal."""
+        with self._state:
+            thread = self._thread
+            self._stopping = True
+        if thread is None:
+            return
+        self._wake.set()
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._state:
+            if not self._exited:
+                # still inside print_receipt(): the worker closes up when it returns
+                self._abandoned = True
+                log.warning("Print spooler still printing; it will stop after the current receipt")
+                return
+        self._close()
+
+    def _close(self) -> None:
+        with self._state:
+            if not self._journal.is_open:
+                return   # closed already
+            self._thread = None
+            self._journal.close(self._pending.values())
+        self.printer.cleanup()
+
+    def retry_now(self) -> None:
+        """Try a waiting job again now instead of after its backoff."""
+        self._wake.set()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every submitted job has been printed or dropped."""
+        with self._state:
+            return self._state.wait_for(lambda: not self._pending, timeout)
+
+    # --- Producer side (UI thread) ---
+    def submit(self, receipt_content: str, total: float, on_status=None) -> int:
+        """Queue a receipt and return its job id without touching the printer."""
+        self.start()
+        with self._state:
+            job = {
+                "job_id": self._next_id,
+                "created": datetime.now().isoformat(),
+                "receipt": receipt_content,
+                "total": total,
+            }
+            self._next_id += 1
+            if on_status is not None:
+                self._callbacks[job["job_id"]] = on_status
+            self._journal.append(job)
+        self._enqueue(job)
+        return job["job_id"]
+
+    def status(self, job_id: int) -> str | None:
+        with self._state:
+            return self._statuses.get(job_id)
+
+    def pending(self) -> int:
+        with self._state:
+            return len(self._pending)
+
+    def _enqueue(self, job: dict) -> None:
+        with self._state:
+            self._pending[job["job_id"]] = job
+        self._set_status(job["job_id"], QUEUED)
+        self._queue.put(job["job_id"])
+
+    # --- Worker side ---
+    def _run(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is _STOP:
+                break
+            with self._state:
+                job = self._pending.get(job_id)
+            if job is not None:
+                self._print(job)
+            with self._state:
+                if self._stopping:
+                    break
+        with self._state:
+            self._exited = True
+            abandoned = self._abandoned
+        if abandoned:
+            # stop() gave up waiting for us: the journal and printer are ours to close
+            self._close()
+
+    def _print(self, job: dict) -> None:
+        """Print one job, waiting for the printer as long as it takes (or MAX_AGE)."""
+        job_id = job["job_id"]
+        if self._age(job) > self.MAX_AGE:
+            # left in the journal from an earlier run: too late to hand to the customer
+            log.error(f"Dropping receipt {job_id}: queued {self._age(job) / 60:.0f} min ago")
+            self._finish(job_id, EXPIRED, "too old to print")
+            return
+        attempt = 0
+        while True:
+            self._set_status(job_id, PRINTING)
+            error = self._attempt(job)
+            if error is None:
+                self._finish(job_id, PRINTED)
+                return
+            if self._age(job) > self.MAX_AGE:
+                log.error(f"Dropping receipt {job_id} after {self._age(job) / 60:.0f} min without a printer")
+                self._finish(job_id, EXPIRED, error)
+                return
+            delay = self.RETRY_DELAYS[min(attempt, len(self.RETRY_DELAYS) - 1)]
+            if attempt == 0:
+                log.warning(f"Receipt {job_id} not printed ({error}), retrying until the printer is back")
+            else:
+                log.debug(f"Receipt {job_id} still not printed ({error}), retrying in {delay:g}s")
+            attempt += 1
+            self._set_status(job_id, WAITING, error)
+            self._wake.wait(delay)
+            self._wake.clear()
+            with self._state:
+                if self._stopping:
+                    return
+
+    def _attempt(self, job: dict) -> str | None:
+        """None when printed, otherwise why not."""
+        printer = self.printer
+        try:
+            if not printer.is_printer_initialized():
+                printer.run()
+            if not printer.is_printer_initialized():
+                return "printer not found"
+            if printer.print_receipt(job["receipt"], total=job["total"]):
+                return None
+            error = "printing failed"
+        except Exception as e:
+            log.exception(f"Printing receipt {job['job_id']} failed")
+            error = str(e)
+        # look for the printer afresh next time: it may have been unplugged
+        printer.cleanup()
+        return error
+
+    def _finish(self, job_id: int, status: str, error: str | None = None) -> None:
+        with self._state:
+            self._pending.pop(job_id, None)
+            self._journal.rewrite(self._pending.values())
+            self._state.notify_all()
+        self._set_status(job_id, status, error)
+        with self._state:
+            self._callbacks.pop(job_id, None)
+
+    def _set_status(self, job_id: int, status: str, error: str | None = None) -> None:
+        with self._state:
+            if self._statuses.get(job_id) == status and status != WAITING:
+                return
+            self._statuses[job_id] = status
+            callbacks = (self._callbacks.get(job_id), self.on_status)
+        for callback in callbacks:
+            if callback:
+                try:
+                    callback(job_id, status, error)
+                except Exception:
+                    log.exception("Print spooler callback failed")
+
+    @staticmethod
+    def _age(job: dict) -> float:
+        return (datetime.now() - datetime.fromisoformat(job["created"])).total_seconds()
@@ -5,6 +5,7 @@ import usb.core
 import usb.util
 from time import sleep
 from escpos import printer
+from utils.constants import PRINTER_TARGET
 from utils.logger import get_logger
 log = get_logger(__name__)
 
@@ -37,11 +38,31 @@ class PrinterTester:
         except Exception as e:
             log.info("❌ Printer initialization failed:", e)
 
+    def initialize_target(self, target):
+        """Open the printer named by KPA_PRINTER: ``file:/path`` or ``tcp:host:port``."""
+        if self.is_printer_initialized():
+            return
+
+        kind, _, address = target.partition(":")
+        try:
+            if kind == "file":
+                self.p = printer.File(address)
+            elif kind == "tcp":
+                host, _, port = address.rpartition(":")
+                self.p = printer.Network(host, int(port))
+            else:
+                log.error(f"❌ Unknown printer target {target!r} (expected file:/path or tcp:host:port)")
+                return
+            self.printer_initialized = True
+            log.info(f"✅ Printer initialized on {target}.")
+        except Exception as e:
+            log.error(f"❌ Printer initialization failed on {target}: {e}")
+
     def print_receipt(self, receipt_content ,total):
-        """Print the receipt with a bold header using ESC/POS commands."""
+        """Print the receipt with a bold header using ESC/POS commands. True if it printed."""
         if not self.is_printer_initialized():
             log.info("❌ Printer is not initialized. Cannot print.")
-            return
+            return False
 
         try:
             self.p._raw(b'\x1B\x40')  # Reset printer
@@ -81,8 +102,10 @@ class PrinterTester:
             # Cut the paper
             self.p.cut()
             log.info("✅ Receipt printed successfully with bold header in Font B.")
+            return True
         except Exception as e:
             log.exception(f"❌ Failed to print receipt: {e}")
+            return False
 
 
     def stringtohex(self, strin):
@@ -142,6 +165,10 @@ class PrinterTester:
         self.printer_initialized = False
 
     def run(self):
+        if PRINTER_TARGET:
+            self.initialize_target(PRINTER_TARGET)
+            return
+
         if platform.system() == 'Windows':
             log.info("This script is for Linux (USB printer detection won't work on Windows).")
             return
@@ -0,0 +1,179 @@
+"""
+Scale wire formats and a streaming frame parser.
+
+A decoder describes one scale model's frames: they begin with ``START``
+and are either ``LENGTH`` bytes long after it or run up to ``END``.
+``decode(body)`` turns the bytes between the delimiters into kilograms,
+returns None for a valid frame that carries no weight (e.g. overload),
+and raises ValueError for a corrupt one. ``encode(weight)`` builds a whole
+frame, for the virtual scale (utils.virtual_scale).
+
+FrameParser takes whatever bytes the port had waiting, keeps them in one
+bytearray, cuts out every complete frame and skips noise up to the next
+START, so a dropped or garbled byte costs at most one frame.
+
+Add a model by subclassing FrameDecoder and registering it in DECODERS;
+KPA_SCALE_PROTOCOL picks one by name.
+"""
+import math
+import time
+
+
+class FrameDecoder:
+    NAME = ""
+    START = b""
+    LENGTH = None        # fixed body length after START, or None to read up to END
+    END = b""
+    MAX_LENGTH = 64      # longest body accepted while waiting for END
+
+    @property
+    def read_size(self) -> int:
+        """Bytes to ask the port for when nothing is waiting: one whole frame."""
+        return len(self.START) + (self.LENGTH if self.LENGTH is not None else len(self.END) + 1)
+
+    def decode(self, body: bytes) -> float | None:
+        raise NotImplementedError
+
+    def encode(self, weight: float | None) -> bytes:
+        raise NotImplementedError
+
+
+class BracketDecoder(FrameDecoder):
+    """
+    ``[`` + a six-character grams field (digits, possibly space padded or
+    signed) + two status bytes; ``/////00@`` means no reading.
+    """
+
+    NAME = "bracket"
+    START = b"["
+    LENGTH = 8
+    NO_READING = b"/////00@"
+
+    def decode(self, body: bytes) -> float | None:
+        if body == self.NO_READING:
+            return None
+        # parsed like float(): scales pad with spaces or send a sign
+        field = body[:6]
+        try:
+            grams = float(field.decode("ascii"))
+        except ValueError:   # UnicodeDecodeError included
+            raise ValueError(f"bad weight field {field!r}") from None
+        if not math.isfinite(grams):
+            raise ValueError(f"bad weight field {field!r}")
+        return grams / 1000
+
+    def encode(self, weight: float | None) -> bytes:
+        if weight is None:
+            return self.START + self.NO_READING
+        return b"[%06d00" % min(999999, max(0, round(weight * 1000)))
+
+
+class LineDecoder(FrameDecoder):
+    """
+    CR LF terminated ASCII lines of the ``ST,GS,+001.234kg`` kind: the
+    header says stable (ST) or unstable (US); OL is overload.
+    """
+
+    NAME = "line"
+    START = b""
+    END = b"\r\n"
+    MAX_LENGTH = 32
+
+    def decode(self, body: bytes) -> float | None:
+        fields = body.split(b",")
+        if len(fields) != 3 or fields[0] not in (b"ST", b"US", b"OL"):
+            raise ValueError(f"bad line {body!r}")
+        if fields[0] == b"OL":
+            return None
+        value = fields[2].strip()
+        if not value.endswith(b"kg"):
+            raise ValueError(f"bad unit in {body!r}")
+        return float(value[:-2])
+
+    def encode(self, weight: float | None) -> bytes:
+        if weight is None:
+            return b"OL,GS,+999.999kg" + self.END
+        return b"ST,GS,%+08.3fkg" % weight + self.END
+
+
+DECODERS = {cls.NAME: cls for cls in (BracketDecoder, LineDecoder)}
+
+
+def decoder_for(name: str) -> FrameDecoder:
+    try:
+        return DECODERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown scale protocol {name!r} (known: {', '.join(DECODERS)})") from None
+
+
+class FrameParser:
+    """Splits a byte stream into weights for one decoder, counting what it sees."""
+
+    def __init__(self, decoder: FrameDecoder):
+        self.decoder = decoder
+        self._buffer = bytearray()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.bytes = 0
+        self.frames = 0          # frames decoded to a weight
+        self.empty_frames = 0    # valid frames without a weight
+        self.bad_frames = 0      # frames the decoder rejected
+        self.skipped_bytes = 0   # noise between frames
+        self.started = time.monotonic()
+
+    def feed(self, chunk: bytes) -> list[float]:
+        """Weights of every frame completed by ``chunk``, oldest first."""
+        self.bytes += len(chunk)
+        buffer = self._buffer
+        buffer += chunk
+        decoder = self.decoder
+        start_mark, end_mark, length = decoder.START, decoder.END, decoder.LENGTH
+        weights = []
+        pos = 0
+        while True:
+            start = buffer.find(start_mark, pos) if start_mark else pos
+            if start < 0:
+                # keep a possible partial START at the tail
+                keep = max(pos, len(buffer) - len(start_mark) + 1)
+                self.skipped_bytes += keep - pos
+                pos = keep
+                break
+            self.skipped_bytes += start - pos
+            pos = start
+            body_start = start + len(start_mark)
+            if length is not None:
+                end = body_start + length
+                if end > len(buffer):
+                    break
+                next_pos = end
+            else:
+                end = buffer.find(end_mark, body_start, body_start + decoder.MAX_LENGTH + len(end_mark))
+                if end < 0:
+                    if len(buffer) - body_start <= decoder.MAX_LENGTH:
+                        break
+                    self.bad_frames += 1    # runaway line: drop it and look for the next END
+                    pos = body_start + decoder.MAX_LENGTH
+                    continue
+                next_pos = end + len(end_mark)
+            try:
+                weight = decoder.decode(bytes(buffer[body_start:end]))
+            except ValueError:
+                self.bad_frames += 1
+                # the frame may have started inside the garbage: look again one byte on
+                pos = start + 1 if start_mark else next_pos
+                continue
+            pos = next_pos
+            if weight is None:
+                self.empty_frames += 1
+            else:
+                self.frames += 1
+                weights.append(weight)
+        del buffer[:pos]
+        return weights
+
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {"protocol": self.decoder.NAME, "bytes": self.bytes, "frames": self.frames,
+                "empty_frames": self.empty_frames, "bad_frames": self.bad_frames,
+                "skipped_bytes": self.skipped_bytes, "frames_per_second": round(self.frames / elapsed, 1)}
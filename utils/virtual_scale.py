@@ -0,0 +1,210 @@
+"""
+A scale without hardware: a pseudo-terminal that streams weight frames.
+
+VirtualScale replays a weight trace on the master side of a pty in the wire
+format of any utils.scale_protocol decoder, paced like the real line
+(10 bits a byte at ``baud``). The slave side (``scale.port``) opens like
+a serial port, so WeightManager reads it through the same code as
+/dev/ttyUSB0. Set KPA_VIRTUAL_SCALE to use one in the app.
+
+A trace is a list of (seconds, kg) steps; the weight holds from each
+step to the next (the last one until the trace is replaced with play()
+or put()), and None sends no-reading frames. It comes from a file
+of ``seconds kg`` lines (``-`` for no reading), as written by ``record``,
+or from ``demo``: items put on and taken off the pan, swinging before
+they settle.
+
+    python -m utils.virtual_scale demo            # prints the pty to point KPA_SCALE_PORT at
+    python -m utils.virtual_scale play trace.txt
+    python -m utils.virtual_scale record trace.txt --port /dev/ttyUSB0
+"""
+import argparse
+import bisect
+import math
+import os
+import random
+import threading
+import time
+import tty
+
+from utils.constants import SCALE_BAUD, SCALE_PROTOCOL
+from utils.scale_protocol import FrameParser, decoder_for
+
+
+def load_trace(path: str) -> list[tuple[float, float | None]]:
+    """``seconds kg`` per line; ``-`` for no reading; blank lines and # comments ignored."""
+    trace = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                seconds, kg = line.split()
+                trace.append((float(seconds), None if kg == "-" else float(kg)))
+            except ValueError:
+                raise ValueError(f"{path}:{number}: expected 'seconds kg', got {line!r}") from None
+    trace.sort(key=lambda step: step[0])
+    return trace
+
+
+def demo_trace(items: int = 20, seed: int = 1, rate: float = 20.0) -> list[tuple[float, float | None]]:
+    """Items placed on an empty pan one at a time: a damped swing, a settled hold, removal."""
+    rng = random.Random(seed)
+    trace, t = [], 0.0
+    for _ in range(items):
+        trace.append((t, 0.0))
+        t += rng.uniform(0.5, 1.5)
+        weight = round(rng.uniform(0.1, 8.0), 3)
+        amplitude = weight * rng.uniform(0.05, 0.3)
+        decay, frequency = rng.uniform(3.0, 6.0), rng.uniform(1.5, 4.0)
+        swing_seconds = math.log(amplitude / 0.001) / decay
+        for i in range(int(swing_seconds * rate)):
+            dt = i / rate
+            swing = amplitude * math.exp(-decay * dt) * math.cos(2 * math.pi * frequency * dt)
+            trace.append((t + dt, round(weight + swing, 3)))
+        t += swing_seconds
+        trace.append((t, weight))
+        t += rng.uniform(1.5, 3.0)
+    trace.append((t, 0.0))
+    return trace
+
+
+def trace_for(spec: str) -> list[tuple[float, float | None]]:
+    """``demo`` or the path of a trace file."""
+    return demo_trace() if spec == "demo" else load_trace(spec)
+
+
+class VirtualScale:
+    """Streams ``trace`` on a pty until stopped; ``port`` is the device to open."""
+
+    def __init__(self, trace, protocol: str = SCALE_PROTOCOL, baud: int = SCALE_BAUD,
+                 loop: bool = True, speed: float = 1.0):
+        self.decoder = decoder_for(protocol)
+        self.byte_seconds = 10 / baud
+        self.speed = speed
+        self.frames_sent = 0
+        self.frames_dropped = 0    # nobody reading and the pty buffer full
+        self.play(trace, loop)
+        self._master = self._slave = None
+        self._open()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _open(self) -> None:
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+
+    def start(self) -> "VirtualScale":
+        if self._thread is None:
+            if self._master is None:
+                self._open()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="virtual-scale", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except (OSError, TypeError):
+                pass
+        self._master = self._slave = None
+
+    def unplug(self) -> None:
+        """Vanish like a pulled USB cable: readers get an I/O error, the port is gone."""
+        self.stop()
+
+    def replug(self) -> None:
+        """Come back, on a new ``port``, as a replugged adapter may."""
+        self.start()
+
+    def play(self, trace, loop: bool = False) -> None:
+        """Replay ``trace`` from now on, once or (``loop``) over and over."""
+        if not trace:
+            raise ValueError("empty weight trace")
+        times = [t for t, _ in trace]
+        weights = [w for _, w in trace]
+        # swapped as one tuple so the writer thread never sees half of it
+        self._playing = (times, weights, loop, time.monotonic())
+
+    def put(self, weight: float | None) -> None:
+        """Hold ``weight`` from now on."""
+        self.play([(0.0, weight)])
+
+    def weight_now(self) -> float | None:
+        times, weights, loop, started = self._playing
+        seconds = (time.monotonic() - started) * self.speed
+        if loop and times[-1] > 0:
+            seconds %= times[-1]
+        return weights[max(bisect.bisect_right(times, seconds) - 1, 0)]
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            frame = self.decoder.encode(self.weight_now())
+            try:
+                os.write(self._master, frame)
+                self.frames_sent += 1
+            except BlockingIOError:
+                self.frames_dropped += 1
+            except OSError:
+                break   # closed under us
+            self._stopping.wait(len(frame) * self.byte_seconds)
+
+
+def record(path: str, port: str, seconds: float, protocol: str = SCALE_PROTOCOL, baud: int = SCALE_BAUD) -> int:
+    """Write what the scale on ``port`` sends for ``seconds`` as a trace file; returns the steps written."""
+    import serial
+
+    parser = FrameParser(decoder_for(protocol))
+    steps, last = 0, object()
+    with serial.Serial(port, baud, timeout=0.5) as device, open(path, "w", encoding="utf-8") as out:
+        started = time.monotonic()
+        while (now := time.monotonic() - started) < seconds:
+            for weight in parser.feed(device.read(max(parser.decoder.read_size, device.in_waiting))):
+                if weight != last:
+                    out.write(f"{now:.3f} {weight:.3f}\n")
+                    last = weight
+                    steps += 1
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Virtual weighing scale on a pseudo-terminal")
+    sub = parser.add_subparsers(dest="command", required=True)
+    play = sub.add_parser("play", help="replay a trace file")
+    play.add_argument("trace")
+    sub.add_parser("demo", help="replay the built-in demo trace")
+    for p in (play, sub.choices["demo"]):
+        p.add_argument("--protocol", default=SCALE_PROTOCOL)
+        p.add_argument("--baud", type=int, default=SCALE_BAUD)
+        p.add_argument("--speed", type=float, default=1.0)
+    rec = sub.add_parser("record", help="record a real scale into a trace file")
+    rec.add_argument("trace")
+    rec.add_argument("--port", required=True)
+    rec.add_argument("--seconds", type=float, default=60)
+    rec.add_argument("--protocol", default=SCALE_PROTOCOL)
+    rec.add_argument("--baud", type=int, default=SCALE_BAUD)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        print(f"{record(args.trace, args.port, args.seconds, args.protocol, args.baud)} steps written to {args.trace}")
+        return
+    trace = demo_trace() if args.command == "demo" else load_trace(args.trace)
+    scale = VirtualScale(trace, args.protocol, args.baud, speed=args.speed).start()
+    print(f"virtual scale on {scale.port} (KPA_SCALE_PORT={scale.port}), Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        scale.stop()
+
+
+if __name__ == "__main__":
+    main()
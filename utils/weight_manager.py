@@ -1,14 +1,96 @@
+import bisect
+import glob
+import math
+import operator
+import os
 import platform
 import threading
 import time
 import random
+from array import array
+
 import serial
 
+from utils.constants import SCALE_BAUD, SCALE_PORT, SCALE_PROTOCOL, VIRTUAL_SCALE
+from utils.logger import get_logger
+from utils.scale_protocol import FrameParser, decoder_for
+
+log = get_logger(__name__)
+
+# Stability detection: the weight is stable once every sample of the last
+# STABLE_SECONDS stays within STABLE_MAX_STDDEV kg of their mean.
+RING_SIZE = 64             # samples kept (about 6 s of a 10 Hz scale)
+STABLE_SECONDS = 0.5
+STABLE_MAX_STDDEV = 0.002  # kg
+STABLE_MIN_SAMPLES = 3
+STABLE_WAIT = 1.5          # seconds a click waits for the pan to settle
+
+# Scale connection: candidate ports are rescanned on every attempt, so a
+# replugged adapter is found under whatever name it comes back as.
+SERIAL_PORTS = ["/dev/ttyUSB0", "/dev/ttyAMA0"]
+SERIAL_PORT_PATTERNS = ["/dev/serial/by-id/*", "/dev/ttyUSB*", "/dev/ttyACM*"]
+RECONNECT_MIN = 0.5        # seconds between scans while no scale answers, doubling...
+RECONNECT_MAX = 2.0        # ...up to this
+SILENCE_SECONDS = 2.0      # an open port without a valid frame for this long is dropped
+
+STABLE = "stable"
+SETTLING = "settling"
+
+CONNECTED = "connected"
+CONNECTING = "connecting"
+DISCONNECTED = "disconnected"
+
+
 class WeightManager:
-    def __init__(self):
+    """
+    Current scale reading, kept up to date by a reader thread.
+
+    get_weight() returns the latest raw value. Every sample also goes into a
+    ring buffer of (timestamp, weight); stability() and get_stable_weight()
+    look at the samples of the last ``stable_seconds`` to tell a settled
+    pan from one that is still moving.
+
+    subscribe(callback) has callback(weight) called from the reader thread
+    each time the weight changes (never for a repeated identical reading),
+    subscribe_stable(callback) each time the pan settles, with the settled
+    weight; UI code goes through ui.utils.weight_bridge.WeightBridge to get it on
+    the Qt thread.
+
+    The reader supervises the serial connection: a port counts as the scale
+    once valid frames arrive on it; when it errors or falls silent it is
+    closed, the weight drops to 0 and the candidate ports are rescanned
+    with backoff until a scale answers again. connection() reports the
+    state and how long the last recovery took.
+    """
+
+    def __init__(self, ring_size: int = RING_SIZE, stable_seconds: float = STABLE_SECONDS,
+                 max_stddev: float = STABLE_MAX_STDDEV, min_samples: int = STABLE_MIN_SAMPLES,
+                 port: str | None = SCALE_PORT, virtual_scale=None):
+        self.port = port
+        self.virtual_scale = virtual_scale
         self._current_weight = 0.0
         self._running = False
         self._lock = threading.Lock()
+        self._stable_changed = threading.Condition(self._lock)
+        self._subscribers = ()   # replaced, never mutated, so it can be read unlocked
+        self._stable_subscribers = ()
+        self.stable_seconds = stable_seconds
+        self.max_variance = max_stddev ** 2
+        self.min_samples = min_samples
+        # ring buffer: slot _next is overwritten next; _count slots are filled
+        self._weights = array("d", bytes(8 * ring_size))
+        self._times = array("d", bytes(8 * ring_size))
+        self._next = 0
+        self._count = 0
+        self._state = SETTLING
+        self._stable_weight = None
+        self._settling_since = None
+        self.last_settle_seconds = None   # first moving sample -> stable, for the last settle
+        self._parser = None
+        self._wake = threading.Event()
+        self._connection = {"state": DISCONNECTED, "port": None, "since": time.monotonic(),
+                            "reconnects": 0, "last_error": None, "last_recover_seconds": None}
+        self._lost_at = None
 
     def start(self):
         if self._running:
@@ -18,54 +100,253 @@ class WeightManager:
 
     def stop(self):
         self._running = False
+        self._wake.set()
 
     def get_weight(self):
         with self._lock:
             return self._current_weight
 
-    def _update_weight(self, new_weight):
+    def stability(self) -> tuple[str, float | None]:
+        """(STABLE, settled weight) or (SETTLING, None)."""
+        with self._lock:
+            return self._state, self._stable_weight
+
+    def scale_stats(self) -> dict | None:
+        """Frame counters of the serial connection, None before it opened."""
+        parser = self._parser
+        return parser.stats() if parser is not None else None
+
+    def connection(self) -> dict:
+        """
+        Scale connection: ``state`` (CONNECTED, CONNECTING, DISCONNECTED),
+        ``port``, ``for_seconds`` in that state, ``reconnects``,
+        ``last_error`` and ``last_recover_seconds`` (lost -> frames again).
+        """
+        with self._lock:
+            info = dict(self._connection)
+        info["for_seconds"] = round(time.monotonic() - info.pop("since"), 3)
+        return info
+
+    def get_stable_weight(self, timeout: float | None = STABLE_WAIT) -> float | None:
+        """
+        The settled weight, waiting up to ``timeout`` seconds for the pan to
+        settle. None if it is still moving by then.
+        """
+        with self._stable_changed:
+            if self._stable_changed.wait_for(lambda: self._state == STABLE, timeout):
+                return self._stable_weight
+            return None
+
+    def subscribe(self, callback):
+        """Call ``callback(weight)`` on every change; returns a function that unsubscribes."""
+        with self._lock:
+            self._subscribers += (callback,)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = tuple(cb for cb in self._subscribers if cb is not callback)
+            self._stable_subscribers = tuple(cb for cb in self._stable_subscribers if cb is not callback)
+
+    def subscribe_stable(self, callback):
+        """Call ``callback(weight)`` each time the pan settles; returns a function that unsubscribes."""
+        with self._lock:
+            self._stable_subscribers += (callback,)
+        return lambda: self.unsubscribe(callback)
+
+    def _update_weight(self, new_weight, now: float | None = None):
+        """Record one sample from the scale (``now`` defaults to time.monotonic())."""
+        now = time.monotonic() if now is None else now
         with self._lock:
-            self._current_weight = new_weight
+            settled = self._record(new_weight, now)
+            calls = []
+            if new_weight != self._current_weight:
+                self._current_weight = new_weight
+                calls = [(callback, new_weight) for callback in self._subscribers]
+            if settled is not None:
+                calls += [(callback, settled) for callback in self._stable_subscribers]
+        for callback, weight in calls:
+            try:
+                callback(weight)
+            except Exception:
+                log.exception("Weight subscriber failed")
+
+    # --- Stability (called with the lock held) ---
+    def _record(self, weight, now) -> float | None:
+        """Add a sample; returns the settled weight if the pan has just settled."""
+        size = len(self._weights)
+        self._weights[self._next] = weight
+        self._times[self._next] = now
+        self._next = (self._next + 1) % size
+        self._count = min(self._count + 1, size)
+
+        stable_mean = self._settled_mean(now)
+        if stable_mean is None:
+            if self._state == STABLE:
+                self._state, self._stable_weight = SETTLING, None
+                self._settling_since = now
+                self._stable_changed.notify_all()
+            elif self._settling_since is None:
+                self._settling_since = now
+            return None
+        settled = self._state != STABLE
+        if settled:
+            self._state = STABLE
+            if self._settling_since is not None:
+                self.last_settle_seconds = now - self._settling_since
+            self._settling_since = None
+        self._stable_weight = round(stable_mean, 3)
+        self._stable_changed.notify_all()
+        return self._stable_weight if settled else None
+
+    def _settled_mean(self, now) -> float | None:
+        """Mean of the last stable_seconds of samples if they are quiet enough, else None."""
+        if self._count < len(self._weights):
+            times, weights = self._times[:self._count], self._weights[:self._count]
+        else:   # oldest first
+            times = self._times[self._next:] + self._times[:self._next]
+            weights = self._weights[self._next:] + self._weights[:self._next]
+        start = bisect.bisect_left(times, now - self.stable_seconds)
+        if start == 0 and times[0] > now - self.stable_seconds:
+            return None   # not watched for the whole window yet
+        window = weights[start:]
+        n = len(window)
+        if n < self.min_samples:
+            return None
+        mean = math.fsum(window) / n
+        variance = math.fsum(map(operator.mul, window, window)) / n - mean * mean
+        return mean if variance <= self.max_variance else None
 
     def _weight_loop(self):
-        if platform.system() == 'Windows':
+        if self.port:
+            self._supervise(lambda: [self.port])
+        elif self.virtual_scale is not None or VIRTUAL_SCALE:
+            if self.virtual_scale is None:
+                from utils.virtual_scale import VirtualScale, trace_for   # needs a pty: not on Windows
+                self.virtual_scale = VirtualScale(trace_for(VIRTUAL_SCALE)).start()
+            log.info(f"Reading the virtual scale on {self.virtual_scale.port}")
+            self._supervise(lambda: [self.virtual_scale.port])
+        elif platform.system() == 'Windows':
+            # no scale on the dev box: settle on a new weight every few seconds
             while self._running:
-                fake_weight = round(random.uniform(1.000, 10.000), 3)
-                self._update_weight(fake_weight)
-                time.sleep(0.5)
+                target = round(random.uniform(1.000, 10.000), 3)
+                for _ in range(40):
+                    if not self._running:
+                        break
+                    self._update_weight(round(target + random.gauss(0, 0.0005), 3))
+                    time.sleep(0.1)
         else:
-            self._read_serial_loop()
+            self._supervise(self._scan_ports)
 
-    def _read_serial_loop(self):
-        port_paths = ["/dev/ttyUSB0", "/dev/ttyAMA0"]
-        serialport = None
+    # --- Serial connection ---
+    def _scan_ports(self) -> list[str]:
+        """Serial devices that exist now, the last good one first, each device once."""
+        last = self._connection["port"]
+        found = [last] if last else []
+        found += SERIAL_PORTS
+        for pattern in SERIAL_PORT_PATTERNS:
+            found += sorted(glob.glob(pattern))
+        ports, seen = [], set()
+        for port in found:
+            device = os.path.realpath(port)
+            if device not in seen and os.path.exists(device):
+                seen.add(device)
+                ports.append(port)
+        return ports
 
-        for port in port_paths:
-            try:
-                serialport = serial.Serial(port, 2400, timeout=1)
-                break
-            except Exception:
-                continue
+    def _supervise(self, candidates):
+        """Keep a scale connected: try every candidate port, back off while none answers."""
+        delay = RECONNECT_MIN
+        while self._running:
+            for port in candidates():
+                if not self._running:
+                    return
+                if self._read_port(port):
+                    delay = RECONNECT_MIN   # it was the scale: rescan straight away
+                    break
+            else:
+                self._set_connection(DISCONNECTED, None)
+                self._wake.wait(delay * random.uniform(0.8, 1.0))
+                delay = min(delay * 2, RECONNECT_MAX)
 
-        if not serialport:
-            print("⚠️ No valid serial port found")
-            return
+    def _read_port(self, port) -> bool:
+        """Read weights from ``port`` until it fails or falls silent; True if it sent frames."""
+        try:
+            serialport = serial.Serial(port, SCALE_BAUD, timeout=1)
+        except (serial.SerialException, OSError) as e:
+            self._set_connection(None, None, error=str(e))
+            return False
 
+        self._set_connection(CONNECTING, port)
+        parser = self._parser = FrameParser(decoder_for(SCALE_PROTOCOL))
+        read_size = parser.decoder.read_size
+        valid_frames = 0
+        last_frame = time.monotonic()
         try:
             while self._running:
-                if serialport.read() == b'[':
-                    data = serialport.read(8)
-                    if data != b'/////00@':
-                        try:
-                            fullstring = data.decode("utf-8")
-                            if "" in fullstring:
-                                weight_str = fullstring[0:6]
-                                weight_kg = float(weight_str) / 1000
-                                self._update_weight(round(weight_kg, 3))
-                        except:
-                            continue
-                serialport.flushInput()
-        except Exception as e:
-            print(f"❌ Serial read error: {e}")
+                # at least one frame (blocks until it arrives), plus whatever else is waiting
+                chunk = serialport.read(max(read_size, serialport.in_waiting))
+                for weight in parser.feed(chunk):
+                    self._update_weight(round(weight, 3))
+                now = time.monotonic()
+                if parser.frames + parser.empty_frames > valid_frames:
+                    if not valid_frames:
+                        self._scale_found(port)
+                    valid_frames = parser.frames + parser.empty_frames
+                    last_frame = now
+                elif now - last_frame > SILENCE_SECONDS:
+                    self._set_connection(None, None, error=f"no frames from {port} for {SILENCE_SECONDS:.0f}s")
+                    break
+        except (serial.SerialException, OSError) as e:
+            self._set_connection(None, None, error=str(e))
         finally:
             serialport.close()
+        if not self._running:
+            self._set_connection(DISCONNECTED, None)
+        elif valid_frames:
+            self._scale_lost(port)
+        return valid_frames > 0
+
+    def _set_connection(self, state, port, error=None):
+        with self._lock:
+            info = self._connection
+            if state is not None and state != info["state"]:
+                info["state"], info["since"] = state, time.monotonic()
+            if port is not None:
+                info["port"] = port
+            if error is not None:
+                info["last_error"] = error
+
+    def _scale_found(self, port):
+        now = time.monotonic()
+        with self._lock:
+            info = self._connection
+            info.update(state=CONNECTED, port=port, since=now, last_error=None)
+            recovered = None
+            if self._lost_at is not None:
+                recovered = info["last_recover_seconds"] = round(now - self._lost_at, 3)
+                info["reconnects"] += 1
+                self._lost_at = None
+        if recovered is None:
+            log.info(f"Scale connected on {port}")
+        else:
+            log.info(f"Scale reconnected on {port} after {recovered:.1f}s")
+
+    def _scale_lost(self, port):
+        """Forget the last readings: a weight from before the outage must not be taken as current."""
+        with self._lock:
+            self._lost_at = time.monotonic()
+            error = self._connection["last_error"]
+            self._connection.update(state=DISCONNECTED, since=self._lost_at)
+            self._next = self._count = 0
+            self._state, self._stable_weight, self._settling_since = SETTLING, None, None
+            self._stable_changed.notify_all()
+            changed = self._current_weight != 0.0
+            self._current_weight = 0.0
+            subscribers = self._subscribers if changed else ()
+        log.warning(f"Scale on {port} lost ({error}), reconnecting")
+        for callback in subscribers:
+            try:
+                callback(0.0)
+            except Exception:
+                log.exception("Weight subscriber failed")